@@ -0,0 +1,96 @@
+# utils/agregaciones.py
+# Núcleo de agregación del embudo por dimensiones (Industria, Pais, Proceso, ...).
+# Suma las columnas de estado precalculadas (invite_ok, replied, session_ok, ...)
+# por grupo con np.bincount sobre los códigos de la dimensión, en una sola pasada
+# y sin lambdas por grupo. Las dimensiones se factorizan una vez por carga de datos.
+
+import numpy as np
+import pandas as pd
+from datos.esquemas import vacio_como_nulo
+
+# Contadores booleanos que se suman por grupo (ver utils/motor_kpis.py)
+COLUMNAS_CONTADOR = ["invite_ok", "first_msg_sent", "replied", "session_ok"]
+
+
+class KernelAgregacion:
+    """
+    Códigos por dimensión y contadores de `df`, reutilizables para cualquier subconjunto
+    de filas. Si `df` es un cubo (columna "n", ver datos/cubo_prospectos.py), cada fila
+    pesa "n" prospectos y los contadores ya son conteos.
+    """
+
+    def __init__(self, df):
+        self.df = df
+        self._dimensiones = {}
+        self._pesos = df["n"].to_numpy(dtype=np.int64) if "n" in df.columns else None
+        self._contadores = {
+            col: df[col].to_numpy(dtype=np.int64)
+            for col in COLUMNAS_CONTADOR if col in df.columns
+        }
+
+    def _codigos(self, dimension):
+        if dimension not in self._dimensiones:
+            serie = self.df[dimension]
+            if dimension == "¿Quién Prospecto?":
+                # Igual que aplicar_filtros: el prospectador vacío se trata como nulo
+                serie = vacio_como_nulo(serie)
+            self._dimensiones[dimension] = pd.factorize(serie)
+        return self._dimensiones[dimension]
+
+    def agregar(self, dimensiones, posiciones=None):
+        """
+        Un grupo por combinación de valores de `dimensiones` presente en las filas
+        `posiciones` (todas si es None), con "Prospectados" y un total por contador.
+        Como groupby(dimensiones).sum(): sin nulos y ordenado por las dimensiones.
+        """
+        codigos, valores = zip(*(self._codigos(d) for d in dimensiones))
+        if posiciones is not None:
+            codigos = [c[posiciones] for c in codigos]
+        validas = np.logical_and.reduce([c >= 0 for c in codigos])
+        combinado = np.ravel_multi_index([c[validas] for c in codigos],
+                                         [max(len(v), 1) for v in valores])
+        grupos, inverso = np.unique(combinado, return_inverse=True)
+
+        resultado = {}
+        for dimension, codigos_grupo, valores_dim in zip(
+                dimensiones,
+                np.unravel_index(grupos, [max(len(v), 1) for v in valores]),
+                valores):
+            resultado[dimension] = np.asarray(valores_dim, dtype=object)[codigos_grupo]
+        if self._pesos is None:
+            resultado["Prospectados"] = np.bincount(inverso, minlength=len(grupos))
+        else:
+            pesos = self._pesos if posiciones is None else self._pesos[posiciones]
+            resultado["Prospectados"] = np.bincount(
+                inverso, weights=pesos[validas],
+                minlength=len(grupos)).astype(np.int64)
+        for col, contador in self._contadores.items():
+            if posiciones is not None:
+                contador = contador[posiciones]
+            resultado[col] = np.bincount(inverso,
+                                         weights=contador[validas],
+                                         minlength=len(grupos)).astype(np.int64)
+
+        return pd.DataFrame(resultado).sort_values(
+            list(dimensiones), kind="stable").reset_index(drop=True)
+
+
+class VistaAgregada:
+    """Agregados de un subconjunto de filas, calculados una vez por dimensión y rerun."""
+
+    def __init__(self, kernel, posiciones=None):
+        self.kernel = kernel
+        self.posiciones = posiciones
+        self._memo = {}
+
+    def por(self, *dimensiones):
+        # Los DataFrames devueltos se comparten: seleccionar/renombrar, no modificar
+        if dimensiones not in self._memo:
+            self._memo[dimensiones] = self.kernel.agregar(dimensiones,
+                                                          self.posiciones)
+        return self._memo[dimensiones]
+
+
+def vista_para(df):
+    """Vista sobre todas las filas de `df` (para componentes usados sin el dashboard)."""
+    return VistaAgregada(KernelAgregacion(df))
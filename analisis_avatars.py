@@ -1,12 +1,12 @@
 # componentes/analisis_avatars.py
 import streamlit as st
-from utils.limpieza import limpiar_valor_kpi, estandarizar_avatar
 import pandas as pd
+from utils.agregaciones import vista_para
 import plotly.express as px
 
 
 def mostrar_analisis_por_avatar(
-        df):  # df aquí es df_kpis (ya filtrado por sidebar)
+        df, agregados=None):  # df aquí es df_kpis (ya filtrado por sidebar)
     st.markdown("---")
     st.markdown(
         "### 👤 Análisis de Rendimiento por Avatar (Enfoque Agendamiento)")
@@ -23,18 +23,19 @@ def mostrar_analisis_por_avatar(
         )
         return
 
-    df_analisis = df.copy()
-    df_analisis["Avatar"] = df_analisis["Avatar"].apply(estandarizar_avatar)
-
-    resumen_avatar = df_analisis.groupby("Avatar").agg(
-        Prospectados=("Avatar", "count"),
-        Invites_Aceptadas=("¿Invite Aceptada?", lambda col:
-                           (col.apply(limpiar_valor_kpi) == "si").sum()),
-        Respuestas_1er_Msj=("Respuesta Primer Mensaje", lambda col: (col.apply(
-            lambda x: limpiar_valor_kpi(x) not in ["no", "", "nan"])).sum()),
-        Sesiones_Agendadas=(
-            "Sesion Agendada?", lambda col:
-            (col.apply(limpiar_valor_kpi) == "si").sum())).reset_index()
+    # "Avatar" ya viene estandarizado desde la carga (mismas equivalencias que
+    # estandarizar_avatar), así que se agrupa directamente sin copiar df
+    if agregados is None:
+        agregados = vista_para(df)
+    resumen_avatar = agregados.por("Avatar").rename(
+        columns={
+            "invite_ok": "Invites_Aceptadas",
+            "replied": "Respuestas_1er_Msj",
+            "session_ok": "Sesiones_Agendadas"
+        })[[
+            "Avatar", "Prospectados", "Invites_Aceptadas",
+            "Respuestas_1er_Msj", "Sesiones_Agendadas"
+        ]]
 
     # Calcular Tasas Clave para Agendamiento
     resumen_avatar["Tasa Aceptación (%)"] = (
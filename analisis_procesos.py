@@ -2,7 +2,7 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from utils.limpieza import limpiar_valor_kpi
+from utils.agregaciones import vista_para
 
 # Reutilizamos la función flexible, adaptando el nombre para claridad si se desea
 # O simplemente llamamos a la función de top_industrias_paises directamente.
@@ -11,7 +11,8 @@ from utils.limpieza import limpiar_valor_kpi
 
 def mostrar_analisis_procesos_con_prospectador(df_filtrado,
                                                top_n_grafico_proceso=10,
-                                               mostrar_tabla_proceso=True):
+                                               mostrar_tabla_proceso=True,
+                                               agregados=None):
     dimension_col_proceso = "Proceso"  # Columna de Proceso
     titulo_dimension_proceso = "Procesos"
 
@@ -28,11 +29,13 @@ def mostrar_analisis_procesos_con_prospectador(df_filtrado,
         return
 
     # --- Análisis General de Procesos (Gráfico y Tabla Opcional) ---
-    resumen_proceso_completo = df_filtrado.groupby(
-        dimension_col_proceso, as_index=False).agg(
-            Total_Prospectados=(dimension_col_proceso, 'count'),
-            Sesiones_Agendadas=("Sesion Agendada?", lambda x:
-                                (x.apply(limpiar_valor_kpi) == "si").sum()))
+    if agregados is None:
+        agregados = vista_para(df_filtrado)
+    resumen_proceso_completo = agregados.por(dimension_col_proceso).rename(
+        columns={
+            "Prospectados": "Total_Prospectados",
+            "session_ok": "Sesiones_Agendadas"
+        })[[dimension_col_proceso, "Total_Prospectados", "Sesiones_Agendadas"]]
     resumen_proceso_completo.rename(
         columns={resumen_proceso_completo.columns[0]: dimension_col_proceso},
         inplace=True)
@@ -196,22 +199,22 @@ def mostrar_analisis_procesos_con_prospectador(df_filtrado,
     st.markdown(f"### 📊 Efectividad por Proceso y Prospectador")
     if "Proceso" in df_filtrado.columns and "¿Quién Prospecto?" in df_filtrado.columns:
         # Filtrar prospectadores con pocos datos para no saturar el gráfico
-        prospectadores_validos = df_filtrado["¿Quién Prospecto?"].value_counts(
-        )
-        prospectadores_a_mostrar = prospectadores_validos[
-            prospectadores_validos >=
-            5].index.tolist()  # Mínimo 5 prospectos por prospectador
+        prospectadores_validos = agregados.por("¿Quién Prospecto?")
+        prospectadores_a_mostrar = prospectadores_validos.loc[
+            prospectadores_validos["Prospectados"] >= 5,
+            "¿Quién Prospecto?"].tolist()  # Mínimo 5 prospectos por prospectador
 
         if prospectadores_a_mostrar:
-            df_proceso_prospectador = df_filtrado[df_filtrado[
-                "¿Quién Prospecto?"].isin(prospectadores_a_mostrar)]
-
-            resumen_proc_prosp = df_proceso_prospectador.groupby(
-                ["Proceso", "¿Quién Prospecto?"], as_index=False).agg(
-                    Total_Prospectados_PP=("Proceso", 'count'),
-                    Sesiones_Agendadas_PP=(
-                        "Sesion Agendada?", lambda x:
-                        (x.apply(limpiar_valor_kpi) == "si").sum()))
+            resumen_proc_prosp = agregados.por("Proceso", "¿Quién Prospecto?")
+            resumen_proc_prosp = resumen_proc_prosp[resumen_proc_prosp[
+                "¿Quién Prospecto?"].isin(prospectadores_a_mostrar)].rename(
+                    columns={
+                        "Prospectados": "Total_Prospectados_PP",
+                        "session_ok": "Sesiones_Agendadas_PP"
+                    })[[
+                        "Proceso", "¿Quién Prospecto?",
+                        "Total_Prospectados_PP", "Sesiones_Agendadas_PP"
+                    ]].reset_index(drop=True)
             resumen_proc_prosp["Tasa Agendamiento PP (%)"] = (
                 (resumen_proc_prosp["Sesiones_Agendadas_PP"] /
                  resumen_proc_prosp["Total_Prospectados_PP"]) *
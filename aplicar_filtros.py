@@ -1,50 +1,30 @@
-import pandas as pd
+from filtros.indice_filtros import IndiceFiltros
+from datos.esquemas import vacio_como_nulo
 
 def aplicar_filtros(
     df,
     filtro_fuente_lista, filtro_proceso, filtro_pais, filtro_industria, filtro_avatar,
     filtro_prospectador, filtro_invite_aceptada_simple, filtro_sesion_agendada,
-    fecha_ini, fecha_fin
+    fecha_ini, fecha_fin, indice=None
 ):
-    df_filtrado = df.copy()
+    # indice: IndiceFiltros ya construido para este mismo df (p. ej. cacheado por carga
+    # de datos). Si no se pasa, se construye aquí solo para las columnas filtradas.
+    if indice is None:
+        indice = IndiceFiltros(df)
 
-    if "¿Quién Prospecto?" in df_filtrado.columns:
-        df_filtrado["¿Quién Prospecto?"] = df_filtrado["¿Quién Prospecto?"].replace("", pd.NA)
-
-    if filtro_fuente_lista and "– Todos –" not in filtro_fuente_lista:
-        df_filtrado = df_filtrado[df_filtrado["Fuente de la Lista"].isin(filtro_fuente_lista)]
-
-    if filtro_proceso and "– Todos –" not in filtro_proceso:
-        df_filtrado = df_filtrado[df_filtrado["Proceso"].isin(filtro_proceso)]
-
-    if filtro_pais and "– Todos –" not in filtro_pais:
-        df_filtrado = df_filtrado[df_filtrado["Pais"].isin(filtro_pais)]
+    posiciones = indice.posiciones(
+        filtro_fuente_lista, filtro_proceso, filtro_pais, filtro_industria, filtro_avatar,
+        filtro_prospectador, filtro_invite_aceptada_simple, filtro_sesion_agendada,
+        fecha_ini, fecha_fin
+    )
+    return tomar_filas(df, posiciones)
 
-    if filtro_industria and "– Todos –" not in filtro_industria:
-        df_filtrado = df_filtrado[df_filtrado["Industria"].isin(filtro_industria)]
 
-    if filtro_avatar and "– Todos –" not in filtro_avatar:
-        df_filtrado = df_filtrado[df_filtrado["Avatar"].isin(filtro_avatar)]
+def tomar_filas(df, posiciones):
+    # Un único take al final en lugar de un DataFrame intermedio por filtro
+    df_filtrado = df.take(posiciones)
 
-    if filtro_invite_aceptada_simple != "– Todos –":
-        df_filtrado = df_filtrado[
-            df_filtrado["¿Invite Aceptada?"]
-            .apply(lambda x: str(x).strip().lower() == filtro_invite_aceptada_simple.strip().lower())
-        ]
-
-    if fecha_ini and fecha_fin:
-        df_filtrado = df_filtrado[
-            (df_filtrado["Fecha de Invite"].dt.date >= fecha_ini) &
-            (df_filtrado["Fecha de Invite"].dt.date <= fecha_fin)
-        ]
-
-    if filtro_sesion_agendada != "– Todos –":
-        df_filtrado = df_filtrado[
-            df_filtrado["Sesion Agendada?"]
-            .apply(lambda x: str(x).strip().lower() == filtro_sesion_agendada.strip().lower())
-        ]
-
-    if filtro_prospectador and "– Todos –" not in filtro_prospectador:
-        df_filtrado = df_filtrado[df_filtrado["¿Quién Prospecto?"].isin(filtro_prospectador)]
+    if "¿Quién Prospecto?" in df_filtrado.columns:
+        df_filtrado["¿Quién Prospecto?"] = vacio_como_nulo(df_filtrado["¿Quién Prospecto?"])
 
     return df_filtrado
@@ -0,0 +1,41 @@
+# componentes/boton_exportacion.py
+# Descarga bajo demanda: en cada rerun solo se pintan el selector de formato y el
+# botón "Preparar"; el archivo se genera (ver utils/exportacion.py) únicamente en el
+# rerun en que se pulsa, y el botón de descarga no provoca otro rerun.
+import streamlit as st
+from utils.exportacion import FORMATOS_EXPORTACION, MAX_FILAS_XLSX, exportar_bytes
+
+ETIQUETAS_FORMATO = {"xlsx": "Excel", "csv": "CSV", "parquet": "Parquet"}
+
+
+def mostrar_boton_exportacion(datos, nombre_archivo, clave, formatos=("xlsx", "csv", "parquet"),
+                              hoja="Datos", etiqueta="Descargar", filas=None):
+    """
+    Botones para exportar `datos` (DataFrame o función sin argumentos que lo devuelve,
+    para no construirlo si nadie descarga) como `nombre_archivo`.<extensión>.
+    `filas` (si `datos` es una función) permite descartar Excel por encima de su límite.
+    """
+    if filas is None and not callable(datos):
+        filas = len(datos)
+    formatos = [f for f in formatos
+                if f != "xlsx" or filas is None or filas <= MAX_FILAS_XLSX]
+    if not formatos:
+        return
+
+    if len(formatos) > 1:
+        formato = st.radio("Formato de descarga", formatos,
+                           format_func=ETIQUETAS_FORMATO.get, horizontal=True,
+                           key=f"{clave}_formato")
+    else:
+        formato = formatos[0]
+
+    extension, mime = FORMATOS_EXPORTACION[formato]
+    if not st.button(f"📦 Preparar archivo ({ETIQUETAS_FORMATO[formato]})",
+                     key=f"{clave}_preparar"):
+        return
+    with st.spinner("Generando archivo..."):
+        tabla = datos() if callable(datos) else datos
+        contenido = exportar_bytes(tabla, formato, hoja=hoja)
+    st.download_button(f"⬇️ {etiqueta} ({ETIQUETAS_FORMATO[formato]})",
+                       contenido, f"{nombre_archivo}.{extension}", mime,
+                       key=f"{clave}_descarga", on_click="ignore")
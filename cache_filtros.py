@@ -0,0 +1,90 @@
+# filtros/cache_filtros.py
+# Caché (LRU + TTL) de resultados de filtrado. La clave es la selección de la
+# sidebar normalizada más la versión de los datos, así que volver a una
+# combinación de filtros ya vista no vuelve a filtrar ni a contar KPIs.
+
+import threading
+import datetime
+from cachetools import TTLCache
+from filtros.indice_filtros import TODOS
+from utils.motor_kpis import calcular_kpis
+
+TAMANO_CACHE_FILTROS = 64
+TTL_CACHE_FILTROS_SEGUNDOS = 600
+
+_cache = TTLCache(maxsize=TAMANO_CACHE_FILTROS, ttl=TTL_CACHE_FILTROS_SEGUNDOS)
+# TTLCache no es thread-safe y Streamlit atiende cada sesión en su propio hilo
+_lock = threading.Lock()
+
+
+def _normalizar_multiselect(seleccion):
+    if not seleccion or TODOS in seleccion:
+        return None
+    return tuple(sorted({str(v) for v in seleccion}))
+
+
+def _normalizar_selectbox(valor):
+    return None if valor == TODOS else str(valor).strip().lower()
+
+
+def _normalizar_fecha(fecha):
+    return fecha.isoformat() if isinstance(fecha, datetime.date) else fecha
+
+
+def clave_filtros(version_datos, filtros):
+    """
+    Clave canónica para los 10 filtros de la sidebar (sin la búsqueda de texto).
+    Selecciones equivalentes ("– Todos –" frente a lista vacía, orden de los
+    valores, "Si" frente a "si") producen la misma clave.
+    """
+    (filtro_fuente_lista, filtro_proceso, filtro_pais, filtro_industria,
+     filtro_avatar, filtro_prospectador, filtro_invite_aceptada_simple,
+     filtro_sesion_agendada, fecha_ini, fecha_fin) = filtros
+    multiselects = tuple(
+        _normalizar_multiselect(s) for s in
+        (filtro_fuente_lista, filtro_proceso, filtro_pais, filtro_industria,
+         filtro_avatar, filtro_prospectador))
+    estados = (_normalizar_selectbox(filtro_invite_aceptada_simple),
+               _normalizar_selectbox(filtro_sesion_agendada))
+    # aplicar_filtros solo usa el rango de fechas si vienen las dos
+    fechas = ((_normalizar_fecha(fecha_ini), _normalizar_fecha(fecha_fin))
+              if fecha_ini and fecha_fin else None)
+    return (version_datos, ) + multiselects + estados + (fechas, )
+
+
+def filtrar_con_cache(df, indice, filtros, cubo=None):
+    """
+    Devuelve (posiciones, kpis, posiciones_cubo) para la selección `filtros` sobre `df`.
+
+    posiciones son las filas de `df` que pasan los filtros (para df.take) y kpis
+    los conteos del embudo. Con `cubo` (CuboProspectos de df) los KPIs salen de
+    sumar sus celdas y posiciones_cubo son esas celdas; sin cubo, de calcular_kpis
+    sobre las filas y posiciones_cubo es None. Sin version_datos en df.attrs no se cachea.
+    """
+    version_datos = df.attrs.get("version_datos")
+    clave = clave_filtros(version_datos, filtros)
+    if version_datos is not None:
+        with _lock:
+            resultado = _cache.get(clave)
+        if resultado is not None:
+            return resultado
+
+    posiciones = indice.posiciones(*filtros)
+    # Solo lectura: el mismo array se comparte entre reruns y sesiones
+    posiciones.flags.writeable = False
+    if cubo is not None:
+        posiciones_cubo = cubo.posiciones(filtros)
+        posiciones_cubo.flags.writeable = False
+        resultado = (posiciones, cubo.kpis(posiciones_cubo), posiciones_cubo)
+    else:
+        resultado = (posiciones, calcular_kpis(df, posiciones), None)
+
+    if version_datos is not None:
+        with _lock:
+            _cache[clave] = resultado
+    return resultado
+
+
+def limpiar_cache_filtros():
+    with _lock:
+        _cache.clear()
@@ -1,57 +1,120 @@
 import pandas as pd
-import gspread
 import streamlit as st # Importar streamlit para usar st.write y st.error/stop
-from oauth2client.service_account import ServiceAccountCredentials
 from collections import Counter
 # Asegúrate de que estas funciones de limpieza estén disponibles en utils.limpieza
 # Es posible que necesites importar st en utils/limpieza.py si esas funciones lo usan.
 from utils.limpieza import calcular_dias_respuesta, estandarizar_avatar
+from datos.fuentes_datos import obtener_fuente
+from datos.snapshot_prospectos import sincronizar_snapshot, leer_snapshot
+from datos.precarga import iniciar_precarga, obtener_precargado
+from utils.motor_kpis import agregar_columnas_estado
+from utils.parseo import parsear_fechas
+from datos.esquemas import aplicar_esquema
 
-def cargar_y_limpiar_datos():
-    # Autenticación y conexión a Google Sheets
+# Copy-on-write para todo el proceso: todas las páginas importan este módulo, así que
+# la semántica de copias no depende de qué página se abrió primero
+pd.set_option("mode.copy_on_write", True)
+
+class ColumnaFaltanteError(ValueError):
+    """La hoja no tiene una columna imprescindible (limpiar_filas corre también en hilos de precarga)."""
+
+
+def cargar_y_limpiar_datos(forzar_recarga=False):
+    # forzar_recarga: vuelve a leer la hoja completa sin usar el snapshot ni la precarga
+    # Conexión a la fuente de prospectos (Google Sheets o copia local, ver datos/fuentes_datos.py)
     # Asegúrate de tener el archivo credenciales.json en la ubicación correcta
-    scope = ["https://spreadsheets.google.com/feeds", "https://www.googleapis.com/auth/drive"]
+    fuente = obtener_fuente("prospectos")
     try:
-        creds = ServiceAccountCredentials.from_json_keyfile_name("credenciales.json", scope)
-        client = gspread.authorize(creds)
-    except FileNotFoundError:
-        st.error("Error: El archivo 'credenciales.json' no se encontró.")
-        st.info("Asegúrate de tener el archivo de credenciales de Google Sheets en la misma carpeta que la aplicación.")
+        fuente.conectar()
+    except FileNotFoundError as e:
+        st.error(f"Error: {e}")
+        st.info("Asegúrate de tener el archivo de credenciales de Google Sheets (o la fuente local configurada) en la misma carpeta que la aplicación.")
         st.stop() # Detenemos la ejecución si no se encuentran las credenciales
     except Exception as e:
         st.error(f"Error al autenticar con Google Sheets: {e}")
         st.stop()
 
 
-    # Abrir hoja por URL
-    # Asegúrate de que esta URL sea la correcta para tu hoja de cálculo
+    # Avance de la lectura por bloques de la hoja; se borra al terminar
+    aviso_progreso = st.empty()
+
+    def mostrar_progreso(filas_leidas):
+        aviso_progreso.caption(f"Cargando prospectos... {filas_leidas:,} filas leídas")
+
+    # Sincronizar el snapshot local con la hoja
     try:
-        # Abre la hoja por URL y selecciona la primera hoja (sheet1)
-        sheet = client.open_by_url("https://docs.google.com/spreadsheets/d/1h-hNu0cH0W_CnGx4qd3JvF-Fg9Z18ZyI9lQ7wVhROkE/edit#gid=0").sheet1
-        raw_data = sheet.get_all_values()
-        headers = raw_data[0]
-        rows = raw_data[1:]
-    except Exception as e:
-        st.error(f"Error al leer la hoja de cálculo de Google Sheets: {e}")
-        st.info("Verifica la URL de la hoja, los permisos de la cuenta de servicio y la conexión a internet.")
+        # Solo se descargan las filas añadidas desde el último snapshot (ver datos/snapshot_prospectos.py)
+        # Si la precarga de arranque ya sincronizó la hoja, se usa su resultado
+        if forzar_recarga:
+            df_base = sincronizar_snapshot(fuente, limpiar_filas, forzar_recarga=True,
+                                           progreso=mostrar_progreso)
+        else:
+            df_base = obtener_precargado(
+                "prospectos",
+                lambda: sincronizar_snapshot(fuente, limpiar_filas, progreso=mostrar_progreso))
+    except ColumnaFaltanteError as e:
+        aviso_progreso.empty()
+        st.error(f"¡ERROR! {e}")
+        st.info("Por favor, verifica el nombre de la columna de la fecha de invitación en la salida de debugging.")
         st.stop()
+    except Exception as e:
+        df_base, _ = leer_snapshot()
+        if df_base is None:
+            st.error(f"Error al leer la hoja de cálculo de Google Sheets: {e}")
+            st.info("Verifica la URL de la hoja, los permisos de la cuenta de servicio y la conexión a internet.")
+            st.stop()
+        # Sin conexión a la hoja seguimos con la última copia local
+        st.warning(f"No se pudo sincronizar con Google Sheets ({e}). Se muestran los datos del último snapshot local.")
+    aviso_progreso.empty()
+
+    if df_base.empty:
+         st.warning("El DataFrame base está vacío después de filtrar por 'Fecha de Invite' no vacía.")
+
+    # df_base es el conjunto de datos filtrado por "Fecha de Invite" no vacía como texto,
+    # con otras columnas limpiadas y la columna de fecha convertida (con NaT para errores).
+    # Esta es la base que se pasará a cargar_y_procesar_datos.
+    return df_base
 
 
-    def make_unique(headers):
-        counts = Counter()
-        new_headers = []
-        for h in headers:
-            h = h.strip()
-            counts[h] += 1
-            if counts[h] == 1:
-                new_headers.append(h)
-            else:
-                # Añadir un sufijo si el encabezado está duplicado
-                new_headers.append(f"{h}_{counts[h]-1}")
-        return new_headers
-
+def precargar_fuentes():
+    """
+    Lanza (una vez por proceso) la lectura concurrente de prospectos, KPIs semanales
+    y sesiones; los cargadores de cada página recogen el resultado con obtener_precargado.
+    """
+    iniciar_precarga({
+        "prospectos":
+        lambda: sincronizar_snapshot(obtener_fuente("prospectos"), limpiar_filas),
+        "kpis_semanales":
+        lambda: obtener_fuente("kpis_semanales").leer_valores(),
+        "sesiones":
+        lambda: obtener_fuente("sesiones").leer_valores(),
+    })
+
+
+def make_unique(headers):
+    counts = Counter()
+    new_headers = []
+    for h in headers:
+        h = h.strip()
+        counts[h] += 1
+        if counts[h] == 1:
+            new_headers.append(h)
+        else:
+            # Añadir un sufijo si el encabezado está duplicado
+            new_headers.append(f"{h}_{counts[h]-1}")
+    return new_headers
+
+
+def limpiar_filas(headers, rows, desplazamiento=0):
+    # Limpia un bloque de filas crudas de la hoja (sin la fila de encabezados).
+    # desplazamiento es la posición de la primera fila dentro de la hoja, para que
+    # el índice sea el mismo tanto en una carga completa como en una incremental.
     headers = make_unique(headers)
+    # get_values recorta las celdas vacías al final de cada fila
+    rows = [row + [""] * (len(headers) - len(row)) if len(row) < len(headers) else row[:len(headers)]
+            for row in rows]
     df = pd.DataFrame(rows, columns=headers)
+    df.index = pd.RangeIndex(desplazamiento, desplazamiento + len(df))
 
     # La validación del nombre de la columna ocurrirá justo después de mostrar las columnas.
     nombre_columna_fecha_invite = "Fecha de Invite" # Nombre esperado. Lo corregiremos si es necesario.
@@ -66,16 +129,14 @@ def cargar_y_limpiar_datos():
 
         # Convertimos la columna de fecha a datetime *después* del filtro de texto no vacío.
         # Los valores que no se puedan convertir resultarán en NaT.
-        df_base[nombre_columna_fecha_invite] = pd.to_datetime(df_base[nombre_columna_fecha_invite], format='%d/%m/%Y', errors="coerce")
-
-
-        if df_base.empty:
-             st.warning(f"El DataFrame base está vacío después de filtrar por '{nombre_columna_fecha_invite}' no vacía.")
+        # Parseo por lotes de los textos distintos, solo con dd/mm/aaaa (ver utils/parseo.py)
+        df_base[nombre_columna_fecha_invite] = parsear_fechas(df_base[nombre_columna_fecha_invite], inferir=False, nombre=nombre_columna_fecha_invite)
 
     else:
-        st.error(f"¡ERROR! La columna '{nombre_columna_fecha_invite}' no se encontró al cargar los datos.")
-        st.info("Por favor, verifica el nombre de la columna de la fecha de invitación en la salida de debugging.")
-        st.stop()
+        # Sin st.error / st.stop: esta función también corre en el hilo de la precarga;
+        # cargar_y_limpiar_datos muestra el error en la página
+        raise ColumnaFaltanteError(
+            f"La columna '{nombre_columna_fecha_invite}' no se encontró al cargar los datos.")
 
 
     # --- AHORA REALIZAR LA LIMPIEZA Y CONVERSIÓN DE FECHA EN df_base ---
@@ -102,13 +163,10 @@ def cargar_y_limpiar_datos():
     for col in columnas_a_limpiar_filtrada:
         if col in df_base.columns:
             # Llenamos NaN/cadenas vacías/solo espacios con "No" para estas columnas
-            df_base[col] = df_base[col].fillna("No").replace(r'^\s*$', "No", regex=True)
-
-    # La conversión de fecha a datetime ya se hizo antes del debug de NaT
+            # (máscara con str.strip en lugar de una regex evaluada celda a celda)
+            valores = df_base[col].fillna("No")
+            df_base[col] = valores.mask(valores.astype(str).str.strip() == "", "No")
 
-    # df_base ahora es el conjunto de datos filtrado por "Fecha de Invite" no vacía como texto,
-    # con otras columnas limpiadas y la columna de fecha convertida (con NaT para errores).
-    # Esta es la base que se pasará a cargar_y_procesar_datos.
     return df_base
 
 
@@ -127,4 +185,15 @@ def cargar_y_procesar_datos(df):
          # Si esta función falla, retornamos el df como está hasta ahora
          pass # Si calcular_dias_respuesta no está implementada o falla, simplemente seguimos
 
+    # Columnas de estado normalizadas (invite_ok, replied, session_ok, ...), calculadas una
+    # sola vez por carga para que filtros y componentes no repitan strip().lower() en cada rerun
+    df = agregar_columnas_estado(df)
+
+    # Columnas de filtro con pocos valores distintos como category (ver datos/esquemas.py)
+    df = aplicar_esquema(df, "prospectos")
+
+    # Huella de los datos cargados: permite cachear estructuras derivadas (p. ej. el
+    # índice de filtros) y reconstruirlas solo cuando cambian los datos
+    df.attrs["version_datos"] = int(pd.util.hash_pandas_object(df, index=True).sum())
+
     return df
\ No newline at end of file
@@ -0,0 +1,88 @@
+# filtros/catalogo_facetas.py
+# Catálogo de las opciones de los filtros (facetas) de una página: valores distintos
+# ordenados con cuántas filas tiene cada uno, rango de fechas y años/semanas con datos.
+# Se calcula una vez por versión de los datos (ver datos/carga_datos.py); en cada
+# rerun la sidebar solo recorre las opciones, no las filas.
+
+import numpy as np
+import pandas as pd
+
+# Facetas de la sidebar del dashboard (ver filtros/filtros_sidebar.py)
+FACETAS_PROSPECTOS = [
+    "Fuente de la Lista", "Proceso", "Pais", "Industria", "Avatar",
+    "¿Quién Prospecto?"
+]
+# Los selectbox muestran los valores con strip().title()
+FACETAS_PROSPECTOS_NORMALIZADAS = ["¿Invite Aceptada?", "Sesion Agendada?"]
+
+
+def contar_valores(serie, normalizar=False):
+    """
+    Filas por valor no nulo de `serie`, como dict ordenado por el valor en texto.
+    Con normalizar=True los valores se agrupan por su str.strip().title().
+    Se normaliza cada valor distinto una vez, no cada fila.
+    """
+    conteos = serie.value_counts(sort=False)
+    # En columnas category value_counts incluye las categorías sin filas
+    conteos = conteos[conteos > 0]
+    etiquetas = conteos.index.astype(str)
+    if normalizar:
+        etiquetas = etiquetas.str.strip().str.title()
+    agrupado = pd.Series(conteos.to_numpy(), index=etiquetas).groupby(level=0).sum()
+    return {valor: int(n) for valor, n in agrupado.items()}
+
+
+class CatalogoFacetas:
+    """
+    Opciones y conteos de los filtros de `df`: `columnas` con sus valores tal cual,
+    `normalizadas` agrupadas con strip().title(), el rango de `columna_fecha` y los
+    pares (año, semana) de `columnas_semana`.
+    """
+
+    def __init__(self, df, columnas=(), normalizadas=(), columna_fecha=None,
+                 columnas_semana=None):
+        self.valores = {
+            col: contar_valores(df[col]) for col in columnas if col in df.columns
+        }
+        self.valores.update({
+            col: contar_valores(df[col], normalizar=True)
+            for col in normalizadas if col in df.columns
+        })
+
+        self.rango_fechas = (None, None)
+        if columna_fecha in df.columns and pd.api.types.is_datetime64_any_dtype(
+                df[columna_fecha]):
+            minimo, maximo = df[columna_fecha].min(), df[columna_fecha].max()
+            if pd.notna(minimo):
+                self.rango_fechas = (minimo.date(), maximo.date())
+
+        # Año -> semanas con datos, ambos ordenados
+        self._semanas_por_anio = {}
+        if columnas_semana and all(col in df.columns for col in columnas_semana):
+            pares = df[list(columnas_semana)].dropna().to_numpy(dtype=np.int64)
+            for anio, semana in np.unique(pares.reshape(-1, 2), axis=0).tolist():
+                self._semanas_por_anio.setdefault(anio, []).append(semana)
+
+    def opciones(self, columna):
+        """Valores de `columna` ordenados (vacío si la columna no está en los datos)."""
+        return list(self.valores.get(columna, {}))
+
+    def formato(self, columna):
+        """format_func para el widget de `columna`: "valor (filas)"; el resto tal cual."""
+        conteos = self.valores.get(columna, {})
+
+        def formatear(valor):
+            n = conteos.get(valor)
+            return valor if n is None else f"{valor} ({n:,})"
+
+        return formatear
+
+    def anios(self):
+        """Años con datos, del más reciente al más antiguo."""
+        return sorted(self._semanas_por_anio, reverse=True)
+
+    def semanas(self, anio=None):
+        """Semanas con datos de `anio` (de todos los años si es None), ordenadas."""
+        if anio is not None:
+            return list(self._semanas_por_anio.get(anio, []))
+        return sorted({s for semanas in self._semanas_por_anio.values() for s in semanas})
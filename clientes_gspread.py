@@ -0,0 +1,103 @@
+# datos/clientes_gspread.py
+# Pool de clientes gspread autorizados para todo el proceso (la misma vida que un
+# st.cache_resource): uno por archivo de credenciales, cada uno con su sesión HTTP.
+# El archivo de claves se lee y el token OAuth se pide una sola vez. Si al entregar
+# un cliente su token está a punto de caducar, se renueva en ese momento, así que la
+# renovación nunca ocurre a mitad de una lectura. Las métricas (latencia de
+# autorización y de renovación, reutilizaciones) se consultan con metricas_clientes().
+
+import datetime
+import logging
+import threading
+import time
+import gspread
+from oauth2client.service_account import ServiceAccountCredentials
+
+logger = logging.getLogger(__name__)
+
+CREDS_PATH = "credenciales.json"
+SCOPE = [
+    "https://spreadsheets.google.com/feeds",
+    "https://www.googleapis.com/auth/drive"
+]
+
+# Un token que caduca antes de este margen se renueva al entregar el cliente
+MARGEN_RENOVACION = datetime.timedelta(minutes=5)
+
+_clientes = {}
+# Hojas, páginas y los hilos de la precarga (ver datos/precarga.py) piden clientes a la vez
+_lock = threading.Lock()
+_metricas = {
+    "autorizaciones": 0,
+    "reutilizaciones": 0,
+    "renovaciones": 0,
+    "segundos_autorizacion": 0.0,
+    "segundos_renovacion": 0.0,
+}
+
+
+def obtener_cliente(creds_path=CREDS_PATH):
+    """Cliente gspread autorizado con `creds_path`, con el token vigente al menos MARGEN_RENOVACION."""
+    with _lock:
+        cliente = _clientes.get(creds_path)
+        if cliente is None:
+            inicio = time.perf_counter()
+            creds = ServiceAccountCredentials.from_json_keyfile_name(
+                creds_path, SCOPE)
+            cliente = gspread.authorize(creds)
+            # El token se pide ahora y no en la primera lectura de una hoja
+            cliente.http_client.login()
+            _registrar("autorizaciones", "segundos_autorizacion", inicio)
+            _clientes[creds_path] = cliente
+            return cliente
+
+        _metricas["reutilizaciones"] += 1
+        if _por_caducar(cliente):
+            inicio = time.perf_counter()
+            try:
+                cliente.http_client.login()
+            except Exception:
+                # Un cliente que no se puede renovar sale del pool: el siguiente se reautoriza
+                del _clientes[creds_path]
+                raise
+            _registrar("renovaciones", "segundos_renovacion", inicio)
+        return cliente
+
+
+def _por_caducar(cliente):
+    # google-auth guarda la caducidad en UTC sin zona horaria
+    expiry = getattr(cliente.http_client.auth, "expiry", None)
+    if expiry is None:
+        return True
+    ahora = datetime.datetime.now(datetime.timezone.utc).replace(tzinfo=None)
+    return expiry - ahora < MARGEN_RENOVACION
+
+
+def _registrar(contador, segundos, inicio):
+    duracion = time.perf_counter() - inicio
+    _metricas[contador] += 1
+    _metricas[segundos] += duracion
+    logger.info("gspread: %s en %.2fs", contador, duracion)
+
+
+def metricas_clientes():
+    """Contadores del pool más latencias medias y la proporción de peticiones servidas sin autorizar."""
+    with _lock:
+        metricas = dict(_metricas)
+        metricas["clientes"] = len(_clientes)
+    peticiones = metricas["autorizaciones"] + metricas["reutilizaciones"]
+    metricas["tasa_reutilizacion"] = (metricas["reutilizaciones"] / peticiones
+                                      if peticiones else 0.0)
+    metricas["latencia_media_autorizacion"] = (
+        metricas["segundos_autorizacion"] / metricas["autorizaciones"]
+        if metricas["autorizaciones"] else 0.0)
+    metricas["latencia_media_renovacion"] = (
+        metricas["segundos_renovacion"] / metricas["renovaciones"]
+        if metricas["renovaciones"] else 0.0)
+    return metricas
+
+
+def limpiar_clientes():
+    """Vacía el pool (p. ej. tras rotar las credenciales); las métricas se conservan."""
+    with _lock:
+        _clientes.clear()
@@ -0,0 +1,96 @@
+# datos/cubo_prospectos.py
+# Cubo preagregado de prospectos: una fila por combinación distinta de las
+# dimensiones de filtro (Fuente, Proceso, Pais, Industria, Avatar, Prospectador,
+# estados de invite/sesión y día de invite) con el número de prospectos y los
+# contadores del embudo. KPIs, embudo y gráficos por dimensión se responden
+# filtrando y sumando celdas del cubo en lugar de recorrer filas.
+# "Puesto" queda fuera: es texto libre y casi no agrupa, así que se agrega sobre filas.
+# La fecha va por día (y no por semana) porque el filtro de fechas de la sidebar y los
+# conteos cruzados de facetas (ver filtros/facetas_cruzadas.py) admiten cualquier rango
+# de días y se responden exactos desde las celdas; con semanas, cualquier rango que no
+# empiece en lunes y acabe en domingo tendría que volver a las filas.
+# Celdas <= min(filas, días con invites x combinaciones de las demás dimensiones en
+# cada día). El cubo compensa cuando cada prospectador carga listas por lotes (misma
+# fuente, país, industria y día): varias filas por celda. Con datos repartidos al azar
+# entre las dimensiones apenas agrupa (1651 filas sintéticas -> 1576 celdas, las mismas
+# por semana y 1333 sin fecha) y los resultados son iguales que sobre filas; el número
+# de celdas por filas queda en el log de cada carga.
+
+import logging
+import numpy as np
+import pandas as pd
+from filtros.indice_filtros import IndiceFiltros
+from utils.agregaciones import KernelAgregacion
+from datos.esquemas import vacio_como_nulo
+
+logger = logging.getLogger(__name__)
+
+DIMENSIONES_CUBO = [
+    "Fuente de la Lista", "Proceso", "Pais", "Industria", "Avatar",
+    "¿Quién Prospecto?", "invite_estado", "session_estado", "Fecha de Invite"
+]
+CONTADORES_CUBO = [
+    "invite_ok", "first_msg_sent", "replied", "session_ok", "oportunidades"
+]
+
+
+def construir_cubo(df):
+    """Agrega `df` (salida de cargar_y_procesar_datos) por DIMENSIONES_CUBO."""
+    dimensiones = [d for d in DIMENSIONES_CUBO if d in df.columns]
+    contadores = [c for c in CONTADORES_CUBO[:-1] if c in df.columns]
+
+    base = df[dimensiones + contadores]
+    if "¿Quién Prospecto?" in base.columns:
+        # Igual que aplicar_filtros: el prospectador vacío se trata como nulo
+        base = base.assign(**{"¿Quién Prospecto?": vacio_como_nulo(base["¿Quién Prospecto?"])})
+    if "Fecha de Invite" in base.columns and pd.api.types.is_datetime64_any_dtype(
+            base["Fecha de Invite"]):
+        base = base.assign(**{"Fecha de Invite": base["Fecha de Invite"].dt.normalize()})
+    if all(c in base.columns for c in ["invite_ok", "replied"]) and "session_no" in df.columns:
+        # Las oportunidades combinan tres estados de la misma fila: no se derivan de las sumas
+        base = base.assign(oportunidades=df["invite_ok"] & df["replied"] & df["session_no"])
+        contadores.append("oportunidades")
+    base = base.assign(n=1)
+
+    # dropna=False: las filas con dimensiones vacías siguen contando en los KPIs
+    cubo = base.groupby(dimensiones, dropna=False, observed=True,
+                        sort=False)[["n"] + contadores].sum().reset_index()
+    logger.info("Cubo de prospectos: %d celdas para %d filas", len(cubo), len(df))
+    return cubo
+
+
+class CuboProspectos:
+    """Cubo con su índice de filtros y su núcleo de agregación (uno por carga de datos)."""
+
+    def __init__(self, df):
+        self.cubo = construir_cubo(df)
+        # Los filtros de la sidebar se resuelven sobre las celdas con el mismo índice que sobre filas
+        self.indice = IndiceFiltros(self.cubo)
+        # Con la columna "n" el núcleo pondera cada celda por su número de prospectos
+        self.kernel = KernelAgregacion(self.cubo)
+        self._columnas = {
+            col: self.cubo[col].to_numpy(dtype=np.int64)
+            for col in ["n"] + CONTADORES_CUBO if col in self.cubo.columns
+        }
+
+    def posiciones(self, filtros):
+        """Celdas del cubo que cumplen los 10 filtros de la sidebar (ver aplicar_filtros)."""
+        return self.indice.posiciones(*filtros)
+
+    def kpis(self, posiciones=None):
+        """Conteos del embudo (mismas claves que calcular_kpis) sumando celdas."""
+
+        def total(col):
+            if col not in self._columnas:
+                return 0
+            valores = self._columnas[col]
+            return int(valores.sum() if posiciones is None else valores[posiciones].sum())
+
+        return {
+            "total": total("n"),
+            "inv_acept": total("invite_ok"),
+            "primeros_mensajes_enviados_count": total("first_msg_sent"),
+            "resp_primer": total("replied"),
+            "sesiones": total("session_ok"),
+            "oportunidades": total("oportunidades"),
+        }
@@ -0,0 +1,63 @@
+# datos/esquemas.py
+# Tipos de las columnas de pocos valores distintos de cada hoja (ver datos/fuentes_datos.py).
+# Al cargar se convierten a category: cada fila guarda un código entero y los textos
+# se guardan una sola vez, así que filtros (isin), groupby y unique() trabajan sobre
+# códigos. Las categorías van ordenadas alfabéticamente, salvo las que tienen un
+# orden de negocio fijo (p. ej. la calificación SQL).
+
+import pandas as pd
+
+# Orden de importancia de la calificación SQL (Sesiones)
+SQL_ORDER_OF_IMPORTANCE = ['SQL1', 'SQL2', 'MQL', 'NA', 'SIN CALIFICACIÓN SQL']
+
+# Columna -> orden fijo de categorías (None = alfabético con los valores de los datos)
+ESQUEMAS = {
+    "prospectos": {
+        "Fuente de la Lista": None,
+        "Proceso": None,
+        "Pais": None,
+        "Industria": None,
+        "Avatar": None,
+        "¿Quién Prospecto?": None,
+    },
+    "kpis_semanales": {
+        "Analista": None,
+        "Región": None,
+    },
+    "sesiones": {
+        "LG": None,
+        "AE": None,
+        "País": None,
+        "SQL_Estandarizado": SQL_ORDER_OF_IMPORTANCE,
+    },
+}
+
+
+def tipo_categoria(serie, orden=None):
+    """
+    CategoricalDtype para los valores de `serie`: alfabético si `orden` es None y, si
+    no, ordenado con `orden` primero y el resto de valores detrás en orden alfabético.
+    """
+    valores = sorted(pd.unique(serie.dropna()))
+    if orden is None:
+        return pd.CategoricalDtype(valores)
+    otros = [v for v in valores if v not in orden]
+    return pd.CategoricalDtype(list(orden) + otros, ordered=True)
+
+
+def aplicar_esquema(df, nombre):
+    """Convierte a category las columnas de ESQUEMAS[nombre] presentes en `df`."""
+    for columna, orden in ESQUEMAS[nombre].items():
+        if columna in df.columns and not isinstance(df[columna].dtype,
+                                                    pd.CategoricalDtype):
+            df[columna] = df[columna].astype(tipo_categoria(df[columna], orden))
+    return df
+
+
+def vacio_como_nulo(serie):
+    """`serie` con "" como nulo. En columnas category quita la categoría sin recorrer filas."""
+    if isinstance(serie.dtype, pd.CategoricalDtype):
+        if "" in serie.cat.categories:
+            return serie.cat.remove_categories([""])
+        return serie
+    return serie.replace("", pd.NA)
@@ -0,0 +1,126 @@
+# utils/exportacion.py
+# Exportación de tablas a Excel, CSV o Parquet por bloques de filas. Ninguna
+# escritura pasa por una copia completa de la tabla en otro formato: el Excel se
+# escribe con xlsxwriter en modo de memoria constante (cada fila va directa al
+# archivo), el CSV bloque a bloque y el Parquet como un grupo de filas por bloque.
+# Los archivos solo se generan cuando el usuario los pide (ver componentes/boton_exportacion.py).
+
+import io
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+import xlsxwriter
+
+FILAS_POR_BLOQUE_EXPORTACION = 10_000
+# Filas de datos que caben en una hoja de Excel (más el encabezado)
+MAX_FILAS_XLSX = 1_048_575
+
+# Formato -> (extensión, tipo MIME)
+FORMATOS_EXPORTACION = {
+    "xlsx": ("xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet"),
+    "csv": ("csv", "text/csv"),
+    "parquet": ("parquet", "application/vnd.apache.parquet"),
+}
+
+
+def bloques(df, filas_por_bloque=FILAS_POR_BLOQUE_EXPORTACION):
+    """Trozos consecutivos de `df` de `filas_por_bloque` filas (vistas, sin copiar)."""
+    for inicio in range(0, len(df), filas_por_bloque):
+        yield df.iloc[inicio:inicio + filas_por_bloque]
+
+
+def escribir_csv(df, destino, filas_por_bloque=FILAS_POR_BLOQUE_EXPORTACION):
+    """Escribe `df` como CSV UTF-8 en el buffer binario `destino` (igual que df.to_csv)."""
+    df = _fechas_como_texto(df)
+    texto = io.TextIOWrapper(destino, encoding="utf-8", newline="")
+    df.iloc[:0].to_csv(texto, index=False)
+    for bloque in bloques(df, filas_por_bloque):
+        bloque.to_csv(texto, index=False, header=False)
+    # Sin cerrar `destino`: el llamador lee su contenido
+    texto.flush()
+    texto.detach()
+
+
+def _fechas_como_texto(df):
+    # to_csv elige el formato de fechas y duraciones según los valores que ve (sin hora
+    # si todas son medianoche): se formatea cada columna entera una vez, antes de
+    # partirla en bloques, para que todos los bloques usen el mismo formato
+    columnas = [col for col in df.columns
+                if pd.api.types.is_datetime64_any_dtype(df[col])
+                or pd.api.types.is_timedelta64_dtype(df[col])]
+    if not columnas:
+        return df
+    df = df.copy()
+    for col in columnas:
+        df[col] = df[col].astype(str).where(df[col].notna(), "")
+    return df
+
+
+def escribir_xlsx(df, destino, hoja="Datos"):
+    """Escribe `df` como Excel en `destino`; encabezados en negrita y vacíos como celdas vacías."""
+    libro = xlsxwriter.Workbook(destino, {
+        "constant_memory": True,
+        "default_date_format": "dd/mm/yyyy hh:mm:ss",
+        "remove_timezone": True,
+        # LinkedIn y demás URLs se quedan como texto, igual que en la tabla
+        "strings_to_urls": False,
+    })
+    hoja_xlsx = libro.add_worksheet(hoja[:31])
+    hoja_xlsx.write_row(0, 0, [str(col) for col in df.columns],
+                        libro.add_format({"bold": True}))
+    fila = 1
+    for bloque in bloques(df):
+        # Tipos de Python (int, float, str, Timestamp) y None en lugar de NaN / NaT / pd.NA
+        valores = bloque.astype(object)
+        valores = valores.where(bloque.notna(), None)
+        for registro in valores.itertuples(index=False, name=None):
+            hoja_xlsx.write_row(fila, 0, registro)
+            fila += 1
+    libro.close()
+
+
+def escribir_parquet(df, destino):
+    """Escribe `df` como Parquet en `destino`, un grupo de filas por bloque."""
+    esquema = None
+    escritor = None
+    for bloque in bloques(_columnas_homogeneas(df)):
+        tabla = pa.Table.from_pandas(bloque, schema=esquema, preserve_index=False)
+        if escritor is None:
+            # Una columna sin valores en el primer bloque sería de tipo nulo: texto
+            esquema = pa.schema([
+                campo.with_type(pa.string()) if pa.types.is_null(campo.type) else campo
+                for campo in tabla.schema
+            ], metadata=tabla.schema.metadata)
+            tabla = tabla.cast(esquema)
+            escritor = pq.ParquetWriter(destino, esquema)
+        escritor.write_table(tabla)
+    if escritor is None:
+        pq.write_table(pa.Table.from_pandas(df, preserve_index=False), destino)
+    else:
+        escritor.close()
+
+
+def _columnas_homogeneas(df):
+    # Parquet necesita un tipo por columna: las columnas de texto (object) con valores
+    # de tipos mezclados se exportan como texto, conservando los nulos
+    objeto = [col for col in df.columns if df[col].dtype == object]
+    if not objeto:
+        return df
+    df = df.copy()
+    for col in objeto:
+        df[col] = df[col].where(df[col].isna(), df[col].astype(str))
+    return df
+
+
+def exportar_bytes(df, formato, hoja="Datos"):
+    """Contenido de `df` exportado en `formato` (una clave de FORMATOS_EXPORTACION)."""
+    destino = io.BytesIO()
+    if formato == "xlsx":
+        escribir_xlsx(df, destino, hoja=hoja)
+    elif formato == "csv":
+        escribir_csv(df, destino)
+    elif formato == "parquet":
+        escribir_parquet(df, destino)
+    else:
+        raise ValueError(f"Formato de exportación desconocido: '{formato}'.")
+    return destino.getvalue()
@@ -0,0 +1,168 @@
+# filtros/facetas_cruzadas.py
+# Conteos cruzados de las facetas de la sidebar: para cada opción de un filtro,
+# cuántos prospectos quedarían al elegirla con el resto de filtros activos (el
+# filtro de la propia faceta no cuenta, como en cualquier navegación por facetas).
+# Trabaja sobre las celdas del cubo (ver datos/cubo_prospectos.py) ponderadas por "n".
+# Cada sesión guarda, por celda, cuántos filtros no cumple y un vector de conteos por
+# faceta; cuando cambia un filtro solo se suman o restan las celdas que cambian de
+# estado, sin volver a contar el cubo entero.
+
+import numpy as np
+import pandas as pd
+from filtros.cache_filtros import clave_filtros
+from filtros.indice_filtros import TODOS
+
+# Columna del widget -> columna del cubo, en el orden de los filtros de la sidebar
+FACETAS_CRUZADAS = [
+    ("Fuente de la Lista", "Fuente de la Lista"),
+    ("Proceso", "Proceso"),
+    ("Pais", "Pais"),
+    ("Industria", "Industria"),
+    ("Avatar", "Avatar"),
+    ("¿Quién Prospecto?", "¿Quién Prospecto?"),
+    ("¿Invite Aceptada?", "invite_estado"),
+    ("Sesion Agendada?", "session_estado"),
+]
+# Los selectbox muestran "Si"/"No" pero filtran por el estado normalizado en minúsculas
+FACETAS_ESTADO = {"¿Invite Aceptada?", "Sesion Agendada?"}
+
+
+class MotorFacetas:
+    """Códigos por faceta y pesos de las celdas de un CuboProspectos (uno por carga de datos)."""
+
+    def __init__(self, cubo):
+        tabla = cubo.cubo
+        self.n = len(tabla)
+        self.pesos = tabla["n"].to_numpy(dtype=np.int64)
+        self._facetas = {}
+        for columna, columna_cubo in FACETAS_CRUZADAS:
+            if columna_cubo in tabla.columns:
+                # En el cubo el prospectador vacío ya es nulo (código -1): no cuenta
+                codigos, valores = pd.factorize(tabla[columna_cubo])
+                self._facetas[columna] = (codigos,
+                                          pd.Index(np.asarray(valores, dtype=object)))
+        self._dias = None
+        if "Fecha de Invite" in tabla.columns and pd.api.types.is_datetime64_any_dtype(
+                tabla["Fecha de Invite"]):
+            self._dias = tabla["Fecha de Invite"].to_numpy(dtype="datetime64[D]")
+
+    def facetas(self):
+        return list(self._facetas)
+
+    def codigos(self, columna):
+        return self._facetas[columna]
+
+    def conteos_iniciales(self, columna):
+        """Prospectos por valor de `columna` sin ningún filtro."""
+        codigos, valores = self._facetas[columna]
+        validas = codigos >= 0
+        return np.bincount(codigos[validas], weights=self.pesos[validas],
+                           minlength=len(valores)).astype(np.int64)
+
+    def fallan(self, filtro, valor):
+        """
+        Celdas que no cumplen el filtro número `filtro` (orden de clave_filtros) con
+        el valor normalizado `valor`; None si el filtro no restringe nada.
+        """
+        if valor is None:
+            return None
+        if filtro < len(FACETAS_CRUZADAS):
+            columna = FACETAS_CRUZADAS[filtro][0]
+            if columna not in self._facetas:
+                return None
+            codigos, valores = self._facetas[columna]
+            seleccion = valores.get_indexer(
+                list(valor) if isinstance(valor, tuple) else [valor])
+            # Tabla código -> cumple; el último hueco recoge los nulos (código -1)
+            cumple = np.zeros(len(valores) + 1, dtype=bool)
+            cumple[seleccion[seleccion >= 0]] = True
+            return ~cumple[codigos]
+        if self._dias is None:
+            return None
+        # Rango de fechas: las celdas sin fecha (NaT) nunca lo cumplen
+        fecha_ini, fecha_fin = (np.datetime64(f, "D") for f in valor)
+        return ~((self._dias >= fecha_ini) & (self._dias <= fecha_fin))
+
+
+class EstadoFacetas:
+    """Conteos cruzados de una sesión, actualizados por diferencias al cambiar los filtros."""
+
+    def __init__(self, motor):
+        self.motor = motor
+        self._selecciones = [None] * (len(FACETAS_CRUZADAS) + 1)
+        self._fallos = np.zeros(motor.n, dtype=np.int8)
+        self._falla = [None] * len(self._selecciones)
+        self._conteos = {
+            columna: motor.conteos_iniciales(columna) for columna in motor.facetas()
+        }
+
+    def actualizar(self, filtros):
+        """Lleva los conteos a la selección `filtros` (los 10 filtros de la sidebar)."""
+        # Misma normalización que la caché de filtros; sin la versión de datos
+        for filtro, valor in enumerate(clave_filtros(None, filtros)[1:]):
+            if valor != self._selecciones[filtro]:
+                self._cambiar_filtro(filtro, valor)
+
+    def _cambiar_filtro(self, filtro, valor):
+        motor = self.motor
+        falla_antes = self._falla[filtro]
+        falla_despues = motor.fallan(filtro, valor)
+        self._selecciones[filtro] = valor
+        self._falla[filtro] = falla_despues
+
+        if falla_antes is None and falla_despues is None:
+            return
+        if falla_antes is None:
+            cambiadas = np.flatnonzero(falla_despues)
+        elif falla_despues is None:
+            cambiadas = np.flatnonzero(falla_antes)
+        else:
+            cambiadas = np.flatnonzero(falla_antes != falla_despues)
+        if len(cambiadas) == 0:
+            return
+
+        fallos_antes = self._fallos[cambiadas]
+        ahora_falla = (falla_despues[cambiadas] if falla_despues is not None else
+                       np.zeros(len(cambiadas), dtype=bool))
+        fallos_despues = fallos_antes + np.where(ahora_falla, 1, -1).astype(np.int8)
+        pesos = motor.pesos[cambiadas]
+
+        for otro, (columna, _) in enumerate(FACETAS_CRUZADAS):
+            # La faceta del filtro que cambió no depende de él: sus conteos no se mueven
+            if otro == filtro or columna not in self._conteos:
+                continue
+            # Una celda cuenta en la faceta si solo falla (como mucho) su propio filtro
+            propia = (self._falla[otro][cambiadas] if self._falla[otro] is not None
+                      else np.zeros(len(cambiadas), dtype=bool))
+            delta = ((fallos_despues - propia) == 0).astype(np.int64) - (
+                (fallos_antes - propia) == 0)
+            codigos = motor.codigos(columna)[0][cambiadas]
+            afectadas = (delta != 0) & (codigos >= 0)
+            if afectadas.any():
+                self._conteos[columna] += np.rint(
+                    np.bincount(codigos[afectadas],
+                                weights=(pesos * delta)[afectadas],
+                                minlength=len(self._conteos[columna]))).astype(np.int64)
+
+        self._fallos[cambiadas] = fallos_despues
+
+    def conteo(self, columna, valor):
+        """Prospectos que quedarían eligiendo `valor` en `columna` (None si no es faceta)."""
+        if columna not in self._conteos:
+            return None
+        if columna in FACETAS_ESTADO:
+            valor = str(valor).strip().lower()
+        posicion = self.motor.codigos(columna)[1].get_indexer([valor])[0]
+        return int(self._conteos[columna][posicion]) if posicion >= 0 else 0
+
+    def formato(self, columna):
+        """format_func para el widget de `columna`: "valor (prospectos con los demás filtros)"."""
+        if columna not in self._conteos:
+            return lambda valor: valor
+
+        def formatear(valor):
+            if valor == TODOS:
+                return valor
+            return f"{valor} ({self.conteo(columna, valor):,})"
+
+        return formatear
@@ -1,6 +1,15 @@
 import streamlit as st
 import datetime
-import pandas as pd
+from filtros.catalogo_facetas import (CatalogoFacetas, FACETAS_PROSPECTOS,
+                                     FACETAS_PROSPECTOS_NORMALIZADAS)
+from filtros.facetas_cruzadas import EstadoFacetas
+
+# Claves de session_state de los 10 filtros, en el orden de aplicar_filtros
+CLAVES_FILTROS = [
+    "filtro_fuente_lista", "filtro_proceso", "filtro_pais", "filtro_industria",
+    "filtro_avatar", "filtro_prospectador", "filtro_invite_aceptada_simple",
+    "filtro_sesion_agendada", "fecha_ini", "fecha_fin"
+]
 
 
 # Función para resetear el estado de los filtros a sus valores por defecto
@@ -21,58 +30,67 @@ def reset_filters_state():
 
 
 # Función genérica para crear selectores múltiples (Multiselect) - Usa st.multiselect
-def crear_multiselect(df, columna, etiqueta, key):
+def crear_multiselect(catalogo, columna, etiqueta, key, formato=None):
     """Creates a multiselect widget for a given column, managing state with key."""
     if key not in st.session_state:
         st.session_state[key] = ["– Todos –"]
 
-    options = ["– Todos –"]
-    if columna in df.columns and not df[columna].empty:
-        valores_data = sorted(df[columna].dropna().astype(str).unique())
-        options = ["– Todos –"] + valores_data
+    # Opciones precalculadas por versión de datos (ver filtros/catalogo_facetas.py)
+    options = ["– Todos –"] + catalogo.opciones(columna)
 
     current_value = st.session_state[key]
     valid_value = [val for val in current_value if val in options]
 
     if len(valid_value) != len(current_value):
         st.session_state[key] = ["– Todos –"]
+    # El ID del widget depende de las etiquetas de las opciones, que cambian con los
+    # conteos cruzados al tocar otro filtro: se reescribe la selección en session_state
+    # para que el widget (con su nuevo ID) la conserve
+    st.session_state[key] = list(st.session_state[key])
 
     selected_value = st.multiselect(  # Usar st.multiselect
-        etiqueta, options, key=key)
+        etiqueta, options, key=key, format_func=formato or catalogo.formato(columna))
     return st.session_state[key]
 
 
 # Función genérica para crear selectores simples (Selectbox) - Usa st.selectbox
-def crear_selectbox(df, columna, etiqueta, key):
+def crear_selectbox(catalogo, columna, etiqueta, key, formato=None):
     """Creates a selectbox widget for a given column, normalizing options and managing state with key."""
     if key not in st.session_state:
         st.session_state[key] = "– Todos –"
 
-    options = ["– Todos –"]
-    if columna in df.columns and not df[columna].empty:
-        valores_unicos_normalizados = df[columna].dropna().astype(
-            str).str.strip().str.title().unique()
-        valores_ordenados_para_filtro = sorted(
-            valores_unicos_normalizados.tolist())
-        options = ["– Todos –"] + valores_ordenados_para_filtro
+    # Valores ya normalizados con strip().title() en el catálogo
+    options = ["– Todos –"] + catalogo.opciones(columna)
 
     widget_value = st.session_state[key]
 
     if widget_value not in options:
         st.session_state[key] = "– Todos –"
-        widget_value = st.session_state[key]
-
-    index_valor = options.index(widget_value) if widget_value in options else 0
+    # Igual que en crear_multiselect: la selección sobrevive al cambio de ID del widget
+    # (sin index, el valor sale de session_state)
+    st.session_state[key] = st.session_state[key]
 
     return st.selectbox(  # Usar st.selectbox
-        etiqueta, options, index=index_valor, key=key)
+        etiqueta,
+        options,
+        key=key,
+        format_func=formato or catalogo.formato(columna))
 
 
 # --- FUNCIÓN PRINCIPAL PARA MOSTRAR FILTROS ---
 
 
-def mostrar_filtros_sidebar(df):
+def mostrar_filtros_sidebar(df, catalogo=None, facetas=None):
     """Displays all filter widgets in the sidebar using columns for horizontal grouping."""
+    # catalogo: CatalogoFacetas de df (p. ej. cacheado por versión de datos). Si no se
+    # pasa, se calcula aquí.
+    # facetas: MotorFacetas del cubo de df. Si se pasa, cada opción muestra cuántos
+    # prospectos quedarían con el resto de filtros (ver filtros/facetas_cruzadas.py);
+    # si no, el total de filas de cada valor.
+    if catalogo is None:
+        catalogo = CatalogoFacetas(df, FACETAS_PROSPECTOS,
+                                   FACETAS_PROSPECTOS_NORMALIZADAS,
+                                   "Fecha de Invite")
     st.sidebar.header("🎯 Filtros de Búsqueda")
 
     # Inicializar estado si no existe (esto ya estaba, lo mantenemos)
@@ -98,58 +116,74 @@ def mostrar_filtros_sidebar(df):
     if "fecha_fin" not in st.session_state:
         st.session_state["fecha_fin"] = None
 
+    formatos = {}
+    if facetas is not None:
+        # Los conteos de la sesión se llevan a la selección actual sumando y restando
+        # solo las celdas del cubo que cambian con el filtro que se tocó
+        estado_facetas = st.session_state.get("facetas_cruzadas")
+        if estado_facetas is None or estado_facetas.motor is not facetas:
+            estado_facetas = EstadoFacetas(facetas)
+            st.session_state["facetas_cruzadas"] = estado_facetas
+        estado_facetas.actualizar(
+            tuple(st.session_state[k] for k in CLAVES_FILTROS))
+        formatos = {
+            columna: estado_facetas.formato(columna)
+            for columna in facetas.facetas()
+        }
+
     st.sidebar.subheader("Filtros de Origen")
     # Agrupar filtros de origen en columnas (sin botones individuales de reset)
     # Dividimos los 6 filtros en 3 filas de 2 columnas cada una
     col1_1, col1_2 = st.sidebar.columns(2)
     with col1_1:
-        filtro_fuente_lista = crear_multiselect(df, "Fuente de la Lista",
+        filtro_fuente_lista = crear_multiselect(catalogo, "Fuente de la Lista",
                                                 "Fuente de la Lista",
-                                                "filtro_fuente_lista")
+                                                "filtro_fuente_lista",
+                                                formatos.get("Fuente de la Lista"))
     with col1_2:
-        filtro_proceso = crear_multiselect(df, "Proceso", "Proceso",
-                                           "filtro_proceso")
+        filtro_proceso = crear_multiselect(catalogo, "Proceso", "Proceso",
+                                           "filtro_proceso",
+                                           formatos.get("Proceso"))
 
     col2_1, col2_2 = st.sidebar.columns(2)
     with col2_1:
-        filtro_pais = crear_multiselect(df, "Pais", "País", "filtro_pais")
+        filtro_pais = crear_multiselect(catalogo, "Pais", "País", "filtro_pais",
+                                        formatos.get("Pais"))
     with col2_2:
-        filtro_industria = crear_multiselect(df, "Industria", "Industria",
-                                             "filtro_industria")
+        filtro_industria = crear_multiselect(catalogo, "Industria", "Industria",
+                                             "filtro_industria",
+                                             formatos.get("Industria"))
 
     col3_1, col3_2 = st.sidebar.columns(2)
     with col3_1:
-        filtro_avatar = crear_multiselect(df, "Avatar", "Avatar",
-                                          "filtro_avatar")
+        filtro_avatar = crear_multiselect(catalogo, "Avatar", "Avatar",
+                                          "filtro_avatar",
+                                          formatos.get("Avatar"))
     with col3_2:
-        filtro_prospectador = crear_multiselect(df, "¿Quién Prospecto?",
+        filtro_prospectador = crear_multiselect(catalogo, "¿Quién Prospecto?",
                                                 "¿Quién Prospectó?",
-                                                "filtro_prospectador")
+                                                "filtro_prospectador",
+                                                formatos.get("¿Quién Prospecto?"))
 
     st.sidebar.subheader("Filtros de Interacción")
     # Agrupar filtros de interacción en columnas (2 columnas)
     col_invite, col_sesion = st.sidebar.columns(2)
     with col_invite:
         filtro_invite_aceptada_simple = crear_selectbox(
-            df, "¿Invite Aceptada?", "¿Invite Aceptada?",
-            "filtro_invite_aceptada_simple")
+            catalogo, "¿Invite Aceptada?", "¿Invite Aceptada?",
+            "filtro_invite_aceptada_simple",
+            formatos.get("¿Invite Aceptada?"))
     with col_sesion:
-        filtro_sesion_agendada = crear_selectbox(df, "Sesion Agendada?",
+        filtro_sesion_agendada = crear_selectbox(catalogo, "Sesion Agendada?",
                                                  "¿Sesión Agendada?",
-                                                 "filtro_sesion_agendada")
+                                                 "filtro_sesion_agendada",
+                                                 formatos.get("Sesion Agendada?"))
 
     st.sidebar.subheader("Filtro de Fechas")
     # Agrupar filtros de fecha en columnas (2 columnas)
     col_f1, col_f2 = st.sidebar.columns(2)
 
-    fecha_min_data = None
-    fecha_max_data = None
-    if "Fecha de Invite" in df.columns and pd.api.types.is_datetime64_any_dtype(
-            df["Fecha de Invite"]):
-        valid_dates = df["Fecha de Invite"].dropna()
-        if not valid_dates.empty:
-            fecha_min_data = valid_dates.min().date()
-            fecha_max_data = valid_dates.max().date()
+    fecha_min_data, fecha_max_data = catalogo.rango_fechas
 
     with col_f1:
         fecha_ini = st.date_input(  # Usar st.date_input
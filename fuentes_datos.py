@@ -0,0 +1,243 @@
+# datos/fuentes_datos.py
+# Fuentes de datos intercambiables para las hojas del dashboard.
+# Todas devuelven los valores crudos como listas de strings (encabezados + filas),
+# igual que gspread.get_all_values(), para que la limpieza de cada página no cambie.
+# leer_bloques entrega las filas por tramos para no tener la hoja entera en memoria.
+
+import os
+import sqlite3
+from abc import ABC, abstractmethod
+from contextlib import closing
+import pandas as pd
+import pyarrow.parquet as pq
+from gspread.utils import rowcol_to_a1
+from datos.clientes_gspread import obtener_cliente, CREDS_PATH
+
+# Filas de datos por bloque en la carga por bloques (ver datos/snapshot_prospectos.py)
+FILAS_POR_BLOQUE = 5000
+
+# Formato en que la hoja muestra las fechas (el que esperan los parseos de cada página)
+FORMATO_FECHA_HOJA = "%d/%m/%Y"
+
+# Configuración por hoja. Para trabajar con una copia local basta con definir la
+# variable de entorno FUENTE_<NOMBRE> (p. ej. FUENTE_SESIONES=/datos/sesiones.parquet)
+# con la ruta a un .csv, .parquet o .sqlite/.db. En SQLite la tabla se toma de
+# FUENTE_<NOMBRE>_TABLA o, si no existe, del nombre de la pestaña / de la fuente.
+FUENTES = {
+    "prospectos": {
+        "url": "https://docs.google.com/spreadsheets/d/1h-hNu0cH0W_CnGx4qd3JvF-Fg9Z18ZyI9lQ7wVhROkE/edit#gid=0",
+        "hoja": None,  # None = primera pestaña (sheet1)
+    },
+    "kpis_semanales": {
+        "url": "https://docs.google.com/spreadsheets/d/1vaJ2lPK7hbWsuikjmycPePKRrFXiOrlwXMXOdoXRY60/edit?gid=0#gid=0",
+        "hoja": None,
+    },
+    "sesiones": {
+        "url": "https://docs.google.com/spreadsheets/d/1Cejc7xfxd62qqsbzBOMRSI9HiJjHe_JSFnjf3lrXai4/edit?gid=1354854902#gid=1354854902",
+        "hoja": "Sesiones 2024-2025",
+    },
+}
+
+
+class FuenteDatos(ABC):
+    """Interfaz común. Las filas se indexan desde 0 sin contar los encabezados."""
+
+    # Identifica el origen de los datos (p. ej. para invalidar snapshots locales)
+    identificador = ""
+
+    def conectar(self):
+        return self
+
+    @abstractmethod
+    def leer_valores(self):
+        """Encabezados + filas de datos, como listas de strings."""
+
+    def leer_encabezados(self):
+        valores = self.leer_valores()
+        return valores[0] if valores else []
+
+    def leer_filas(self, desde, hasta=None):
+        return self.leer_valores()[1:][desde:hasta]
+
+    def leer_bloques(self, desde=0, filas_por_bloque=FILAS_POR_BLOQUE):
+        """Pares (fila inicial, filas) con las filas de datos desde `desde`, por tramos."""
+        while True:
+            filas = self.leer_filas(desde, desde + filas_por_bloque)
+            if not filas:
+                return
+            yield desde, filas
+            if len(filas) < filas_por_bloque:
+                return
+            desde += filas_por_bloque
+
+
+class FuenteGoogleSheets(FuenteDatos):
+
+    def __init__(self, url, hoja=None, creds_path=CREDS_PATH):
+        self.url = url
+        self.hoja = hoja
+        self.creds_path = creds_path
+        self.identificador = f"{url}#{hoja or ''}"
+        self._worksheet = None
+
+    def conectar(self):
+        # Errores de credenciales (FileNotFoundError) y de API se propagan a la página
+        if self._worksheet is None:
+            # Cliente compartido del pool: sin releer las claves ni repetir el OAuth
+            workbook = obtener_cliente(self.creds_path).open_by_url(self.url)
+            self._worksheet = workbook.worksheet(
+                self.hoja) if self.hoja else workbook.sheet1
+        return self
+
+    def leer_valores(self):
+        return self.conectar()._worksheet.get_all_values()
+
+    def leer_encabezados(self):
+        return self.conectar()._worksheet.row_values(1)
+
+    def leer_filas(self, desde, hasta=None):
+        # Fila 1 de la hoja = encabezados, así que la fila de datos i está en i + 2
+        worksheet = self.conectar()._worksheet
+        ultima_columna = rowcol_to_a1(1, worksheet.col_count).rstrip("0123456789")
+        fin = f"{ultima_columna}{hasta + 1}" if hasta is not None else ultima_columna
+        return worksheet.get_values(f"A{desde + 2}:{fin}")
+
+    def leer_bloques(self, desde=0, filas_por_bloque=FILAS_POR_BLOQUE):
+        # Rangos tipo A2:Z5001 hasta el final de la cuadrícula. La API no devuelve las
+        # filas vacías del final de un rango, así que un bloque corto no marca el final
+        filas_cuadricula = self.conectar()._worksheet.row_count - 1
+        while desde < filas_cuadricula:
+            hasta = min(desde + filas_por_bloque, filas_cuadricula)
+            filas = self.leer_filas(desde, hasta)
+            if filas:
+                yield desde, filas
+            desde = hasta
+
+
+class FuenteArchivo(FuenteDatos):
+    """Copia local en CSV, Parquet o SQLite, sin red ni cuotas de API."""
+
+    def __init__(self, ruta, tabla=None):
+        self.ruta = ruta
+        self.tabla = tabla
+        self.identificador = f"{os.path.abspath(ruta)}#{tabla or ''}"
+
+    def conectar(self):
+        if not os.path.exists(self.ruta):
+            raise FileNotFoundError(f"No se encontró la fuente local '{self.ruta}'.")
+        return self
+
+    def _extension(self):
+        extension = os.path.splitext(self.ruta)[1].lower()
+        if extension not in (".csv", ".parquet", ".sqlite", ".db"):
+            raise ValueError(f"Formato de fuente no soportado: '{extension}'.")
+        return extension
+
+    def leer_valores(self):
+        self.conectar()
+        extension = self._extension()
+        if extension == ".csv":
+            # header=None para conservar la fila de encabezados tal cual (incluidos duplicados)
+            df = pd.read_csv(self.ruta, header=None, dtype=str,
+                             keep_default_na=False)
+            return df.values.tolist()
+        if extension == ".parquet":
+            df = pd.read_parquet(self.ruta)
+        else:
+            with closing(sqlite3.connect(self.ruta)) as conexion:
+                df = pd.read_sql_query(f'SELECT * FROM "{self.tabla}"', conexion)
+                df = _fechas_sqlite(df, _columnas_fecha(conexion, self.tabla))
+        return [list(df.columns)] + _como_texto(df)
+
+    def leer_encabezados(self):
+        self.conectar()
+        extension = self._extension()
+        if extension == ".csv":
+            return pd.read_csv(self.ruta, header=None, dtype=str, nrows=1,
+                               keep_default_na=False).iloc[0].tolist()
+        if extension == ".parquet":
+            # Vía pandas, para que el índice guardado en el archivo no cuente como columna
+            return list(pq.read_schema(self.ruta).empty_table().to_pandas().columns)
+        with closing(sqlite3.connect(self.ruta)) as conexion:
+            cursor = conexion.execute(f'SELECT * FROM "{self.tabla}" LIMIT 0')
+            return [columna[0] for columna in cursor.description]
+
+    def leer_bloques(self, desde=0, filas_por_bloque=FILAS_POR_BLOQUE):
+        # Lectura en streaming: nunca se carga el archivo entero
+        self.conectar()
+        extension = self._extension()
+        if extension == ".csv":
+            try:
+                bloques = pd.read_csv(self.ruta, header=None, dtype=str,
+                                      keep_default_na=False, skiprows=desde + 1,
+                                      chunksize=filas_por_bloque)
+            except pd.errors.EmptyDataError:
+                # No quedan filas después de `desde`
+                return
+            inicio = desde
+            with bloques:
+                for bloque in bloques:
+                    yield inicio, bloque.values.tolist()
+                    inicio += len(bloque)
+        elif extension == ".parquet":
+            inicio = 0
+            for lote in pq.ParquetFile(self.ruta).iter_batches(
+                    batch_size=filas_por_bloque):
+                fin = inicio + lote.num_rows
+                if fin > desde:
+                    lote = lote.slice(max(desde - inicio, 0))
+                    yield max(inicio, desde), _como_texto(lote.to_pandas())
+                inicio = fin
+        else:
+            with closing(sqlite3.connect(self.ruta)) as conexion:
+                bloques = pd.read_sql_query(
+                    f'SELECT * FROM "{self.tabla}" LIMIT -1 OFFSET {int(desde)}',
+                    conexion, chunksize=filas_por_bloque)
+                columnas_fecha = _columnas_fecha(conexion, self.tabla)
+                inicio = desde
+                for bloque in bloques:
+                    yield inicio, _como_texto(_fechas_sqlite(bloque, columnas_fecha))
+                    inicio += len(bloque)
+
+
+def _como_texto(df):
+    # Mismo formato que get_all_values: todo texto, vacíos como "" y las fechas como
+    # las muestra la hoja (dd/mm/aaaa), no como "2024-05-21 00:00:00"
+    columnas_fecha = [col for col in df.columns
+                      if pd.api.types.is_datetime64_any_dtype(df[col])]
+    if columnas_fecha:
+        df = df.copy()
+        for col in columnas_fecha:
+            df[col] = df[col].dt.strftime(FORMATO_FECHA_HOJA)
+    return df.astype(object).where(df.notna(), "").astype(str).values.tolist()
+
+
+def _columnas_fecha(conexion, tabla):
+    # SQLite guarda las fechas como texto; el tipo declarado (p. ej. TIMESTAMP de
+    # DataFrame.to_sql) indica qué columnas lo son
+    return [
+        columna[1] for columna in conexion.execute(f'PRAGMA table_info("{tabla}")')
+        if "DATE" in (columna[2] or "").upper() or "TIME" in (columna[2] or "").upper()
+    ]
+
+
+def _fechas_sqlite(df, columnas_fecha):
+    # Solo se convierten los valores ISO (aaaa-mm-dd ...); el resto se deja como está
+    df = df.copy() if columnas_fecha else df
+    for col in columnas_fecha:
+        if col not in df.columns:
+            continue
+        fechas = pd.to_datetime(df[col], format="ISO8601", errors="coerce")
+        df[col] = df[col].where(fechas.isna(), fechas.dt.strftime(FORMATO_FECHA_HOJA))
+    return df
+
+
+def obtener_fuente(nombre):
+    """Devuelve la fuente configurada para la hoja `nombre` (ver FUENTES)."""
+    config = FUENTES[nombre]
+    variable = f"FUENTE_{nombre.upper()}"
+    ruta_local = os.environ.get(variable)
+    if ruta_local:
+        tabla = os.environ.get(f"{variable}_TABLA") or config.get("hoja") or nombre
+        return FuenteArchivo(ruta_local, tabla=tabla)
+    return FuenteGoogleSheets(config["url"], hoja=config.get("hoja"))
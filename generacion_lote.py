@@ -0,0 +1,97 @@
+# mensajes/generacion_lote.py
+# Generación en lote: un mensaje por prospecto con la plantilla de su categoría
+# (Categoría, ver clasificar_procesos) en una sola pasada, repartiendo las
+# variantes de cada categoría por rotación o por A/B estable, y exportación del
+# lote completo a un único archivo (tabla_exportacion).
+
+import numpy as np
+import pandas as pd
+from mensajes.plantillas import (PLANTILLAS_POR_CATEGORIA, compilar_plantilla,
+                                 primer_nombre, avatar_mensaje, columna_o_vacia)
+
+# Modo de reparto de variantes -> texto para la interfaz
+MODOS_ASIGNACION = {
+    "rotacion": "Rotación (Mensaje 1, 2, 3, 1, ...)",
+    "ab": "A/B (cada prospecto siempre recibe la misma variante)",
+}
+# Columnas que identifican a un prospecto para el reparto A/B
+COLUMNAS_CLAVE_AB = ["LinkedIn", "Nombre_Completo", "Empresa"]
+
+COLUMNAS_LOTE = [
+    "Nombre_Completo", "Empresa", "Puesto", "Sesion Agendada?", "LinkedIn",
+    "Categoría", "Plantilla", "Mensaje_Personalizado"
+]
+# Formatos de descarga del lote (ver utils/exportacion.py)
+FORMATOS_LOTE = ("csv", "parquet", "xlsx")
+
+
+def asignar_variantes(df, modo="rotacion"):
+    """
+    Número de variante (0, 1, ...) de cada fila de `df` entre las plantillas de su
+    Categoría. "rotacion" las reparte en orden dentro de cada categoría; "ab" según un
+    hash de COLUMNAS_CLAVE_AB, así que el reparto no depende del orden ni del filtro.
+    """
+    n_variantes = df["Categoría"].map(
+        {c: len(p) for c, p in PLANTILLAS_POR_CATEGORIA.items()}).fillna(0)
+    n_variantes = np.maximum(n_variantes.to_numpy(dtype=np.int64), 1)
+    if modo == "rotacion":
+        orden = df.groupby("Categoría", sort=False).cumcount().to_numpy()
+    elif modo == "ab":
+        columnas = [c for c in COLUMNAS_CLAVE_AB if c in df.columns]
+        hashes = pd.util.hash_pandas_object(df[columnas].astype(str),
+                                            index=False).to_numpy()
+        # Los 31 bits altos del hash, como int64 (uint64 % int64 pasaría por float)
+        orden = (hashes >> np.uint64(33)).astype(np.int64)
+    else:
+        raise ValueError(f"Modo de asignación desconocido: '{modo}'.")
+    return pd.Series(orden % n_variantes, index=df.index)
+
+
+def resumen_lote(df, modo="rotacion"):
+    """
+    Mensajes por (Categoría, Plantilla) que tendría generar_lote(df, modo), contando
+    solo el reparto de variantes, sin renderizar ningún mensaje.
+    """
+    df = df[df["Categoría"].isin(list(PLANTILLAS_POR_CATEGORIA))]
+    conteos = df.groupby([df["Categoría"], asignar_variantes(df, modo)],
+                         sort=False).size()
+    resumen = pd.DataFrame({
+        "Categoría": [categoria for categoria, _ in conteos.index],
+        "Plantilla": [list(PLANTILLAS_POR_CATEGORIA[categoria])[variante]
+                      for categoria, variante in conteos.index],
+        "Mensajes": conteos.to_numpy(),
+    })
+    return resumen.sort_values(["Categoría", "Plantilla"], ignore_index=True)
+
+
+def generar_lote(df, modo="rotacion"):
+    """
+    Copia de `df` (con Categoría, y Nombre y Avatar si los hay) con las columnas
+    Plantilla y Mensaje_Personalizado. Cada par (categoría, variante) se renderiza una
+    sola vez sobre todas sus filas; las filas de categorías sin plantillas quedan fuera.
+    """
+    lote = df[df["Categoría"].isin(list(PLANTILLAS_POR_CATEGORIA))].copy()
+    variantes = asignar_variantes(lote, modo)
+    nombres = primer_nombre(columna_o_vacia(lote, "Nombre"))
+    avatares = avatar_mensaje(columna_o_vacia(lote, "Avatar"))
+
+    plantillas = np.empty(len(lote), dtype=object)
+    mensajes = np.empty(len(lote), dtype=object)
+    grupos = lote.groupby([lote["Categoría"], variantes], sort=False).indices
+    for (categoria, variante), filas in grupos.items():
+        nombre_plantilla, texto = list(
+            PLANTILLAS_POR_CATEGORIA[categoria].items())[variante]
+        plantillas[filas] = nombre_plantilla
+        mensajes[filas] = compilar_plantilla(texto).renderizar(
+            {"nombre": nombres.iloc[filas], "avatar": avatares.iloc[filas]},
+            lote.index[filas]).to_numpy()
+
+    lote["Plantilla"] = plantillas
+    lote["Mensaje_Personalizado"] = mensajes
+    return lote
+
+
+def tabla_exportacion(lote):
+    """Tabla a descargar: COLUMNAS_LOTE presentes, con los vacíos como "" (y no "NA")."""
+    columnas = [c for c in COLUMNAS_LOTE if c in lote.columns]
+    return lote[columnas].astype(object).fillna("")
@@ -1,47 +1,25 @@
 import streamlit as st
 import pandas as pd
-from utils.limpieza import limpiar_valor_kpi
+from utils.motor_kpis import calcular_kpis
 
 
-def mostrar_kpis(df_kpis, base_kpis_counts, limpiar_valor_kpi):
+def mostrar_kpis(df_kpis, base_kpis_counts, kpis=None):
     st.markdown("---")
     st.markdown("## 📊 Indicadores Clave de Rendimiento (KPIs)")
 
     total_filtered = len(df_kpis)
     base_total = base_kpis_counts["total_base"]
 
-    inv_acept = 0
-    if "¿Invite Aceptada?" in df_kpis.columns:
-        inv_acept = sum(
-            limpiar_valor_kpi(x) == "si" for x in df_kpis["¿Invite Aceptada?"])
-
-    primeros_mensajes_enviados_count = 0
-    if "Fecha Primer Mensaje" in df_kpis.columns:
-        primeros_mensajes_enviados_count = sum(
-            limpiar_valor_kpi(x) not in ["no", "", "nan"]
-            for x in df_kpis["Fecha Primer Mensaje"])
-
-    resp_primer = 0
-    if "Respuesta Primer Mensaje" in df_kpis.columns:
-        resp_primer = sum(
-            limpiar_valor_kpi(x) not in ["no", "", "nan"]
-            for x in df_kpis["Respuesta Primer Mensaje"])
-
-    sesiones = 0
-    if "Sesion Agendada?" in df_kpis.columns:
-        sesiones = sum(
-            limpiar_valor_kpi(x) == "si" for x in df_kpis["Sesion Agendada?"])
+    # Conteos vectorizados (ver utils/motor_kpis.py); el dashboard los pasa ya calculados
+    if kpis is None:
+        kpis = calcular_kpis(df_kpis)
+    inv_acept = kpis["inv_acept"]
+    primeros_mensajes_enviados_count = kpis["primeros_mensajes_enviados_count"]
+    resp_primer = kpis["resp_primer"]
+    sesiones = kpis["sesiones"]
 
     # Nuevo KPI: Oportunidades para Agendar
-    oportunidades_para_agendar = 0
-    if all(
-            col in df_kpis.columns for col in
-        ["¿Invite Aceptada?", "Respuesta Primer Mensaje", "Sesion Agendada?"]):
-        oportunidades_para_agendar = len(df_kpis[
-            (df_kpis["¿Invite Aceptada?"].apply(limpiar_valor_kpi) == "si")
-            & (df_kpis["Respuesta Primer Mensaje"].apply(
-                lambda x: limpiar_valor_kpi(x) not in ["no", "", "nan"])) &
-            (df_kpis["Sesion Agendada?"].apply(limpiar_valor_kpi) == "no")])
+    oportunidades_para_agendar = kpis["oportunidades"]
 
     # Tasas del conjunto FILTRADO
     tasa_aceptacion_filtrado_vs_base = (inv_acept / base_total *
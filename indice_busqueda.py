@@ -0,0 +1,146 @@
+# utils/indice_busqueda.py
+# Índice de texto para la caja de búsqueda (Nombre, Apellido, Empresa, Puesto).
+# Se construye una vez por carga de datos: los textos se guardan en minúsculas y
+# sin acentos, con un índice invertido de trigramas para búsquedas por subcadena,
+# una lista ordenada de palabras para búsquedas por prefijo y búsqueda aproximada
+# (difflib) de nombres de empresa mal escritos.
+
+import re
+import bisect
+import difflib
+import unicodedata
+from collections import defaultdict
+import numpy as np
+import pandas as pd
+
+TAMANO_NGRAMA = 3
+
+
+def normalizar_texto(texto):
+    """Minúsculas y sin acentos ("Peña Gómez" -> "pena gomez")."""
+    texto = unicodedata.normalize("NFKD", str(texto).lower())
+    return "".join(c for c in texto if not unicodedata.combining(c))
+
+
+def _campos_busqueda(df):
+    # Mismos campos que la búsqueda original: nombre completo (o Nombre / Apellido
+    # por separado si falta alguno), Empresa y Puesto
+    campos = {}
+    if "Nombre" in df.columns and "Apellido" in df.columns:
+        campos["Nombre Completo"] = (df["Nombre"].fillna('').astype(str) + ' ' +
+                                     df["Apellido"].fillna('').astype(str))
+    else:
+        for col in ["Nombre", "Apellido"]:
+            if col in df.columns:
+                campos[col] = df[col]
+    for col in ["Empresa", "Puesto"]:
+        if col in df.columns:
+            campos[col] = df[col]
+    return campos
+
+
+class IndiceBusqueda:
+    """Índice de búsqueda sobre las filas de `df`; los resultados son posiciones de fila."""
+
+    def __init__(self, df):
+        self.index = df.index
+        n = len(df)
+        campos = _campos_busqueda(df)
+
+        # Texto normalizado de cada celda, normalizando una sola vez cada valor distinto
+        textos_por_campo = []
+        for serie in campos.values():
+            codigos, valores = pd.factorize(serie)
+            plegados = np.array([normalizar_texto(v) for v in valores] + [""],
+                                dtype=object)
+            textos_por_campo.append(plegados[codigos])
+        if textos_por_campo:
+            todos = np.concatenate(textos_por_campo)
+        else:
+            todos = np.empty(0, dtype=object)
+        filas = np.tile(np.arange(n), len(textos_por_campo))
+
+        # Textos distintos -> filas que los contienen (en cualquier campo)
+        codigos, textos = pd.factorize(todos)
+        orden = np.argsort(codigos, kind="stable")
+        conteos = np.bincount(codigos, minlength=len(textos))
+        self.textos = list(textos)
+        self._id_texto = {texto: i for i, texto in enumerate(self.textos)}
+        self._filas_por_texto = np.split(filas[orden], np.cumsum(conteos)[:-1])
+
+        # Índices invertidos: trigrama -> textos y palabra -> textos (ids ascendentes)
+        ngramas = defaultdict(list)
+        palabras = defaultdict(list)
+        for i, texto in enumerate(self.textos):
+            for ngrama in {texto[j:j + TAMANO_NGRAMA]
+                           for j in range(len(texto) - TAMANO_NGRAMA + 1)}:
+                ngramas[ngrama].append(i)
+            for palabra in set(re.findall(r"\w+", texto)):
+                palabras[palabra].append(i)
+        self._ngramas = {g: np.array(ids, dtype=np.intp)
+                         for g, ids in ngramas.items()}
+        self._palabras = sorted(palabras)
+        self._textos_por_palabra = [np.array(palabras[p], dtype=np.intp)
+                                    for p in self._palabras]
+
+        # Empresas para la búsqueda aproximada: texto normalizado -> nombre original
+        self._empresas = {}
+        if "Empresa" in campos:
+            for valor in pd.unique(campos["Empresa"].dropna()):
+                self._empresas.setdefault(normalizar_texto(valor), valor)
+
+    def _textos_con_subcadena(self, consulta):
+        if len(consulta) < TAMANO_NGRAMA:
+            # Consultas muy cortas: recorremos los textos distintos
+            return [i for i, texto in enumerate(self.textos) if consulta in texto]
+        ngramas = {consulta[j:j + TAMANO_NGRAMA]
+                   for j in range(len(consulta) - TAMANO_NGRAMA + 1)}
+        if any(g not in self._ngramas for g in ngramas):
+            return []
+        # Intersección empezando por el trigrama menos frecuente
+        listas = sorted((self._ngramas[g] for g in ngramas), key=len)
+        candidatos = listas[0]
+        for lista in listas[1:]:
+            candidatos = np.intersect1d(candidatos, lista, assume_unique=True)
+        # Los trigramas solo filtran: confirmamos la subcadena en cada candidato
+        return [i for i in candidatos if consulta in self.textos[i]]
+
+    def _textos_con_prefijo(self, consulta):
+        inicio = bisect.bisect_left(self._palabras, consulta)
+        fin = bisect.bisect_left(self._palabras, consulta + "\uffff")
+        if inicio == fin:
+            return []
+        return np.unique(np.concatenate(self._textos_por_palabra[inicio:fin]))
+
+    def _filas(self, ids_textos):
+        if len(ids_textos) == 0:
+            return np.empty(0, dtype=np.intp)
+        return np.unique(
+            np.concatenate([self._filas_por_texto[i] for i in ids_textos]))
+
+    def buscar(self, consulta, modo="subcadena"):
+        """
+        Posiciones (ordenadas) de las filas donde algún campo contiene `consulta`
+        (modo="subcadena") o tiene una palabra que empieza por ella (modo="prefijo").
+        Sin distinguir mayúsculas ni acentos.
+        """
+        consulta = normalizar_texto(consulta).strip()
+        if not consulta:
+            return np.arange(len(self.index))
+        if modo == "prefijo":
+            return self._filas(self._textos_con_prefijo(consulta))
+        return self._filas(self._textos_con_subcadena(consulta))
+
+    def empresas_similares(self, consulta, n=5, corte=0.75):
+        """Empresas cuyo nombre se parece a `consulta` (p. ej. mal escrito) y sus filas."""
+        consulta = normalizar_texto(consulta).strip()
+        if not consulta or not self._empresas:
+            return [], np.empty(0, dtype=np.intp)
+        parecidas = difflib.get_close_matches(consulta, list(self._empresas),
+                                              n=n, cutoff=corte)
+        ids = [self._id_texto[p] for p in parecidas if p in self._id_texto]
+        return [self._empresas[p] for p in parecidas], self._filas(ids)
+
+    def etiquetas(self, posiciones):
+        """Etiquetas del índice del DataFrame original para `posiciones`."""
+        return self.index[posiciones]
@@ -0,0 +1,99 @@
+# filtros/indice_filtros.py
+# Índice invertido para los filtros de la sidebar: por cada columna de filtro
+# guarda, para cada valor, las posiciones de las filas que lo contienen.
+# Una combinación de filtros se resuelve con máscaras booleanas sobre esas
+# posiciones y un único df.take() al final, sin copiar el DataFrame por filtro.
+
+import numpy as np
+import pandas as pd
+from datos.esquemas import vacio_como_nulo
+
+TODOS = "– Todos –"
+
+
+class IndiceFiltros:
+    """Índice valor -> posiciones de fila por columna de filtro (uno por carga de datos)."""
+
+    def __init__(self, df):
+        self.df = df
+        self.n = len(df)
+        # Las listas de posiciones se construyen la primera vez que se usa cada columna
+        self._postings = {}
+        self._fechas = None
+
+    def _postings_columna(self, columna):
+        if columna not in self._postings:
+            serie = self.df[columna]
+            if columna == "¿Quién Prospecto?":
+                # Igual que aplicar_filtros: el prospectador vacío no cuenta como valor
+                serie = vacio_como_nulo(serie)
+            codigos, valores = pd.factorize(serie)
+            # Ordenamos las filas por código; los nulos (-1) quedan al principio
+            orden = np.argsort(codigos, kind="stable")
+            nulos = int(np.count_nonzero(codigos < 0))
+            conteos = np.bincount(codigos[codigos >= 0], minlength=len(valores))
+            grupos = np.split(orden[nulos:], np.cumsum(conteos)[:-1])
+            self._postings[columna] = dict(zip(valores, grupos))
+        return self._postings[columna]
+
+    def _posiciones_valores(self, columna, seleccion):
+        postings = self._postings_columna(columna)
+        grupos = [postings[v] for v in seleccion if v in postings]
+        return np.concatenate(grupos) if grupos else np.empty(0, dtype=np.intp)
+
+    def _posiciones_fechas(self, fecha_ini, fecha_fin):
+        if self._fechas is None:
+            # Días desde epoch, ordenados, sin NaT (NaT nunca cumple el rango)
+            dias = self.df["Fecha de Invite"].to_numpy(dtype="datetime64[D]")
+            validas = np.flatnonzero(~np.isnat(dias))
+            orden = validas[np.argsort(dias[validas], kind="stable")]
+            self._fechas = (dias[orden], orden)
+        dias_ordenados, orden = self._fechas
+        inicio = np.searchsorted(dias_ordenados, np.datetime64(fecha_ini, "D"),
+                                 side="left")
+        fin = np.searchsorted(dias_ordenados, np.datetime64(fecha_fin, "D"),
+                              side="right")
+        return orden[inicio:fin]
+
+    def posiciones(self, filtro_fuente_lista, filtro_proceso, filtro_pais,
+                   filtro_industria, filtro_avatar, filtro_prospectador,
+                   filtro_invite_aceptada_simple, filtro_sesion_agendada,
+                   fecha_ini, fecha_fin):
+        """Posiciones (ordenadas) de las filas que cumplen todos los filtros activos."""
+        seleccionados = []
+
+        multiselects = [
+            ("Fuente de la Lista", filtro_fuente_lista),
+            ("Proceso", filtro_proceso),
+            ("Pais", filtro_pais),
+            ("Industria", filtro_industria),
+            ("Avatar", filtro_avatar),
+            ("¿Quién Prospecto?", filtro_prospectador),
+        ]
+        for columna, seleccion in multiselects:
+            if seleccion and TODOS not in seleccion:
+                seleccionados.append(self._posiciones_valores(columna, seleccion))
+
+        # Los estados ya vienen normalizados (invite_estado/session_estado)
+        if filtro_invite_aceptada_simple != TODOS:
+            seleccionados.append(
+                self._posiciones_valores(
+                    "invite_estado",
+                    [filtro_invite_aceptada_simple.strip().lower()]))
+        if filtro_sesion_agendada != TODOS:
+            seleccionados.append(
+                self._posiciones_valores(
+                    "session_estado", [filtro_sesion_agendada.strip().lower()]))
+
+        if fecha_ini and fecha_fin:
+            seleccionados.append(self._posiciones_fechas(fecha_ini, fecha_fin))
+
+        if not seleccionados:
+            return np.arange(self.n)
+
+        mascara = np.ones(self.n, dtype=bool)
+        for posiciones in seleccionados:
+            filtro = np.zeros(self.n, dtype=bool)
+            filtro[posiciones] = True
+            mascara &= filtro
+        return np.flatnonzero(mascara)
@@ -6,6 +6,10 @@ def limpiar_valor_kpi(val):
 def limpiar_nombre_completo(nombre, apellido):
     return (str(nombre).strip() + " " + str(apellido).strip()).lower()
 
+def limpiar_nombre_completo_serie(nombres, apellidos):
+    # limpiar_nombre_completo sobre columnas enteras, sin una llamada por fila
+    return (nombres.astype(str).str.strip() + " " + apellidos.astype(str).str.strip()).str.lower()
+
 def estandarizar_avatar(avatar):
     avatar = str(avatar).strip().title()
     equivalencias = {
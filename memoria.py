@@ -0,0 +1,64 @@
+# utils/memoria.py
+# Reporte de memoria por rerun: RSS actual y pico del proceso, y tamaño de los
+# DataFrames del pipeline. Sirve para comprobar que la memoria crece con el
+# tamaño de la hoja y no con el número de copias que se hacen de ella.
+
+import os
+import sys
+
+try:
+    import resource  # Solo Unix
+except ImportError:
+    resource = None
+
+# Presupuesto opcional (MB); si el RSS lo supera, la página muestra un aviso
+PRESUPUESTO_MEMORIA_MB = float(os.environ.get("PRESUPUESTO_MEMORIA_MB", 0)) or None
+
+MB = 1024 * 1024
+
+
+def rss_actual_mb():
+    """RSS actual del proceso en MB, o None si no se puede medir en esta plataforma."""
+    try:
+        with open("/proc/self/statm") as f:
+            paginas_residentes = int(f.read().split()[1])
+        return paginas_residentes * os.sysconf("SC_PAGE_SIZE") / MB
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def rss_pico_mb():
+    """Pico de RSS del proceso en MB, o None si no se puede medir."""
+    if resource is None:
+        return None
+    pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux lo da en KB, macOS en bytes
+    return pico / MB if sys.platform == "darwin" else pico / 1024
+
+
+def tamano_df_mb(df, profundo=False):
+    """
+    Memoria de `df` en MB. Con profundo=False las columnas de texto cuentan solo los
+    punteros, que es lo que cuesta un subconjunto que comparte strings con df_global.
+    """
+    return df.memory_usage(index=True, deep=profundo).sum() / MB
+
+
+def reporte_memoria(dataframes, rss_previo=None):
+    """
+    Devuelve un dict con el RSS actual, el pico, la variación respecto a
+    `rss_previo` y el tamaño (MB) de cada DataFrame de `dataframes` (nombre -> df).
+    """
+    rss = rss_actual_mb()
+    pico = rss_pico_mb()
+    if pico is not None and rss is not None:
+        # ru_maxrss y /proc se muestrean distinto; el pico nunca es menor que el actual
+        pico = max(pico, rss)
+    return {
+        "rss_mb": rss,
+        "rss_pico_mb": pico,
+        "delta_mb": (rss - rss_previo) if rss is not None and rss_previo is not None else None,
+        "dataframes_mb": {nombre: tamano_df_mb(df) for nombre, df in dataframes.items()},
+        "excede_presupuesto": (PRESUPUESTO_MEMORIA_MB is not None and rss is not None
+                               and rss > PRESUPUESTO_MEMORIA_MB),
+    }
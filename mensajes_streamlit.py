@@ -1,15 +1,40 @@
 # ------------------ mensajes_streamlit.py ------------------
 # mensajes_streamlit.py
 
+import functools
+import numpy as np
+import pandas as pd
+
+# Reglas de categoría: (categoría, palabras clave). Gana la primera regla con alguna
+# palabra contenida en el proceso (en minúsculas); para una categoría nueva basta con
+# añadir su regla aquí (y sus plantillas en mensajes/plantillas.py).
+REGLAS_CATEGORIA = [
+    ("H2R", ("hire", "h2r", "reclutamiento", "rh")),
+    ("P2P", ("procure", "p2p", "compras")),
+    ("O2C", ("order", "cobranza", "o2c")),
+]
+CATEGORIA_POR_DEFECTO = "General"
+
+
+@functools.lru_cache(maxsize=1024)
 def clasificar_por_proceso(proceso):
     if not isinstance(proceso, str):
-        return "General"
+        return CATEGORIA_POR_DEFECTO
     proceso = proceso.strip().lower()
-    if "hire" in proceso or "h2r" in proceso or "reclutamiento" in proceso or "rh" in proceso:
-        return "H2R"
-    elif "procure" in proceso or "p2p" in proceso or "compras" in proceso:
-        return "P2P"
-    elif "order" in proceso or "cobranza" in proceso or "o2c" in proceso:
-        return "O2C"
-    else:
-        return "General"
+    for categoria, palabras in REGLAS_CATEGORIA:
+        if any(palabra in proceso for palabra in palabras):
+            return categoria
+    return CATEGORIA_POR_DEFECTO
+
+
+def clasificar_procesos(procesos):
+    """
+    Categoría de cada valor de la serie `procesos`. Cada proceso distinto se clasifica
+    una sola vez y el resultado se reparte a las filas por su código.
+    """
+    codigos, distintos = pd.factorize(procesos)
+    categorias = np.array(
+        [clasificar_por_proceso(p) for p in distintos] + [CATEGORIA_POR_DEFECTO],
+        dtype=object)
+    # El código -1 (nulos) cae en la última posición: la categoría por defecto
+    return pd.Series(categorias[codigos], index=procesos.index, dtype=object)
@@ -0,0 +1,115 @@
+# utils/motor_kpis.py
+# Conteos del embudo de prospección con reducciones vectorizadas de NumPy.
+# Cada columna de estado se normaliza una sola vez por valor distinto (no por
+# celda) y se convierte en una máscara booleana; los KPIs son sumas de máscaras.
+
+import numpy as np
+import pandas as pd
+
+# Valores que cuentan como "sin dato" en las columnas de fecha/respuesta
+VALORES_SIN_RESPUESTA = ("no", "", "nan")
+
+
+def _mapear_por_valor(serie, funcion, valor_nulo):
+    # Aplica `funcion` solo a los valores distintos y difunde el resultado con los códigos
+    codigos, valores = pd.factorize(serie)
+    tabla = np.array([funcion(v) for v in valores] + [valor_nulo])
+    # Los nulos tienen código -1, que apunta al último elemento (valor_nulo)
+    return tabla[codigos]
+
+
+def normalizar_estado(serie):
+    """Equivalente vectorizado de limpiar_valor_kpi aplicado a toda la columna."""
+    return _mapear_por_valor(serie, lambda v: str(v).strip().lower(), "no")
+
+
+def es_si(serie):
+    """Máscara de celdas cuyo valor normalizado es "si"."""
+    return _mapear_por_valor(serie, lambda v: str(v).strip().lower() == "si",
+                             False)
+
+
+def es_no(serie):
+    """Máscara de celdas cuyo valor normalizado es "no" (los nulos cuentan como "no")."""
+    return _mapear_por_valor(serie, lambda v: str(v).strip().lower() == "no",
+                             True)
+
+
+def tiene_valor(serie):
+    """Máscara de celdas con contenido real (ni nulo, ni vacío, ni "no"/"nan")."""
+    return _mapear_por_valor(
+        serie, lambda v: str(v).strip().lower() not in VALORES_SIN_RESPUESTA,
+        False)
+
+
+# Columnas de estado precalculadas por cargar_y_procesar_datos. Son auxiliares:
+# no se muestran en tablas ni se exportan.
+COLUMNAS_ESTADO = [
+    "invite_estado", "session_estado", "invite_ok", "first_msg_sent",
+    "replied", "session_ok", "session_no"
+]
+
+
+def agregar_columnas_estado(df):
+    """Añade a `df` las columnas de estado normalizadas (una vez por carga de datos)."""
+    if "¿Invite Aceptada?" in df.columns:
+        # Estado normalizado ("si", "no", ...) para los filtros de la sidebar
+        df["invite_estado"] = pd.Categorical(
+            normalizar_estado(df["¿Invite Aceptada?"]))
+        df["invite_ok"] = (df["invite_estado"] == "si").to_numpy()
+    if "Fecha Primer Mensaje" in df.columns:
+        df["first_msg_sent"] = tiene_valor(df["Fecha Primer Mensaje"])
+    if "Respuesta Primer Mensaje" in df.columns:
+        df["replied"] = tiene_valor(df["Respuesta Primer Mensaje"])
+    if "Sesion Agendada?" in df.columns:
+        df["session_estado"] = pd.Categorical(
+            normalizar_estado(df["Sesion Agendada?"]))
+        df["session_ok"] = (df["session_estado"] == "si").to_numpy()
+        df["session_no"] = (df["session_estado"] == "no").to_numpy()
+    return df
+
+
+def mascaras_kpi(df):
+    """Devuelve las máscaras booleanas de cada etapa del embudo para `df`."""
+    n = len(df)
+    vacia = np.zeros(n, dtype=bool)
+
+    def columna(nombre, precalculada, funcion):
+        # Preferimos la columna precalculada en la carga; si no está, normalizamos aquí
+        if precalculada in df.columns:
+            return df[precalculada].to_numpy(dtype=bool)
+        return funcion(df[nombre]) if nombre in df.columns else vacia
+
+    mascaras = {
+        "inv_acept": columna("¿Invite Aceptada?", "invite_ok", es_si),
+        "primeros_mensajes_enviados": columna("Fecha Primer Mensaje",
+                                              "first_msg_sent", tiene_valor),
+        "resp_primer": columna("Respuesta Primer Mensaje", "replied",
+                               tiene_valor),
+        "sesiones": columna("Sesion Agendada?", "session_ok", es_si),
+        "sin_sesion": columna("Sesion Agendada?", "session_no", es_no),
+    }
+    # Oportunidad caliente: aceptó y respondió, pero la sesión sigue en "no"
+    mascaras["oportunidades"] = (mascaras["inv_acept"]
+                                 & mascaras["resp_primer"]
+                                 & mascaras["sin_sesion"])
+    return mascaras
+
+
+def calcular_kpis(df, posiciones=None):
+    """
+    Conteos del embudo para `df` (mismas claves que base_kpis_counts, más total y oportunidades).
+    Con `posiciones` se cuentan solo esas filas, sin materializar el subconjunto.
+    """
+    mascaras = mascaras_kpi(df)
+    if posiciones is not None:
+        mascaras = {k: m[posiciones] for k, m in mascaras.items()}
+    return {
+        "total": len(df) if posiciones is None else len(posiciones),
+        "inv_acept": int(np.count_nonzero(mascaras["inv_acept"])),
+        "primeros_mensajes_enviados_count":
+        int(np.count_nonzero(mascaras["primeros_mensajes_enviados"])),
+        "resp_primer": int(np.count_nonzero(mascaras["resp_primer"])),
+        "sesiones": int(np.count_nonzero(mascaras["sesiones"])),
+        "oportunidades": int(np.count_nonzero(mascaras["oportunidades"])),
+    }
@@ -1,7 +1,7 @@
 # componentes/oportunidades_calientes.py
 import streamlit as st
 import pandas as pd
-from utils.limpieza import limpiar_valor_kpi
+from utils.motor_kpis import mascaras_kpi
 
 
 def mostrar_oportunidades_calientes(df_prospectos):
@@ -25,12 +25,9 @@ def mostrar_oportunidades_calientes(df_prospectos):
         return
 
     try:
-        oportunidades = df_prospectos[
-            (df_prospectos["¿Invite Aceptada?"].apply(limpiar_valor_kpi) ==
-             "si") & (df_prospectos["Respuesta Primer Mensaje"].apply(
-                 lambda x: limpiar_valor_kpi(x) not in ["no", "", "nan"])) &
-            (df_prospectos["Sesion Agendada?"].apply(limpiar_valor_kpi)
-             == "no")].copy()
+        # Aceptó y respondió, pero "Sesion Agendada?" sigue en "no" (ver utils/motor_kpis.py)
+        oportunidades = df_prospectos[mascaras_kpi(df_prospectos)
+                                      ["oportunidades"]]
 
         if oportunidades.empty:
             st.info(
@@ -0,0 +1,60 @@
+# utils/paginacion_tabla.py
+# Paginación del lado de Python para la tabla de prospectos: el filtro de texto por
+# columna y el orden se calculan aquí, una vez por tabla filtrada, como un vector de
+# posiciones; al navegar solo se toma (y se envía al navegador) la página visible.
+
+import hashlib
+import numpy as np
+import pandas as pd
+
+FILAS_POR_PAGINA = 100
+OPCIONES_FILAS_POR_PAGINA = [50, 100, 250, 500]
+
+
+def firma_tabla(df):
+    """Identifica las filas de `df` (versión de datos + índice) sin recorrer su contenido."""
+    hash_indice = hashlib.blake2b(
+        pd.util.hash_pandas_object(df.index, index=False).to_numpy().tobytes(),
+        digest_size=16).hexdigest()
+    return (df.attrs.get("version_datos"), len(df), hash_indice)
+
+
+def _texto(serie):
+    return serie.astype("string")
+
+
+def orden_tabla(df, columna_orden=None, ascendente=True, columna_filtro=None,
+                texto_filtro=""):
+    """
+    Posiciones de `df` (para df.take) que contienen `texto_filtro` en `columna_filtro`
+    (sin distinguir mayúsculas), ordenadas por `columna_orden`. El orden es estable y
+    deja los vacíos al final; el texto se ordena sin distinguir mayúsculas.
+    """
+    posiciones = np.arange(len(df))
+    if columna_filtro in df.columns and texto_filtro and texto_filtro.strip():
+        coincide = _texto(df[columna_filtro]).str.contains(
+            texto_filtro.strip(), case=False, regex=False, na=False)
+        posiciones = posiciones[coincide.to_numpy(dtype=bool)]
+
+    if columna_orden in df.columns and len(posiciones) > 1:
+        valores = df[columna_orden].iloc[posiciones]
+        if valores.dtype == object or isinstance(valores.dtype, pd.CategoricalDtype):
+            # Texto (o tipos mezclados): se compara como texto en minúsculas
+            valores = _texto(valores).str.lower()
+        valores = valores.reset_index(drop=True)
+        ordenadas = valores.sort_values(ascending=ascendente, kind="stable",
+                                        na_position="last").index.to_numpy()
+        posiciones = posiciones[ordenadas]
+    return posiciones
+
+
+def numero_paginas(n_filas, filas_por_pagina=FILAS_POR_PAGINA):
+    """Páginas necesarias para `n_filas` (al menos una, aunque esté vacía)."""
+    return max(1, -(-n_filas // filas_por_pagina))
+
+
+def paginar(posiciones, pagina, filas_por_pagina=FILAS_POR_PAGINA):
+    """Posiciones de la página `pagina` (desde 1; fuera de rango se ajusta)."""
+    pagina = min(max(1, pagina), numero_paginas(len(posiciones), filas_por_pagina))
+    inicio = (pagina - 1) * filas_por_pagina
+    return posiciones[inicio:inicio + filas_por_pagina]
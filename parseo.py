@@ -0,0 +1,130 @@
+# utils/parseo.py
+# Conversión de los valores de texto de las hojas a números y fechas.
+# parse_kpi_value trabaja celda a celda; parsear_kpi_serie aplica las mismas
+# reglas a una columna entera con operaciones vectorizadas de pandas.
+# parsear_fechas convierte columnas de fecha por lotes (formato dominante
+# primero, inferencia solo para el resto) y cuenta cuántas fechas resolvió cada vía.
+
+import logging
+import functools
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+# Formato de fecha de las hojas de Google Sheets
+FORMATO_FECHA = '%d/%m/%Y'
+
+# Textos que en "Sesiones agendadas" cuentan como una sesión
+TEXTOS_SESION_AFIRMATIVA = ['vc', 'si', 'sí', 'yes', 'true']
+
+
+def parse_kpi_value(value_str, column_name=""):
+    cleaned_val = str(value_str).strip().lower()
+    if not cleaned_val: return 0.0
+    try:
+        num_val = pd.to_numeric(cleaned_val, errors='raise')
+        return 0.0 if pd.isna(num_val) else float(num_val)
+    except ValueError:
+        pass
+    if column_name == "Sesiones agendadas":
+        if cleaned_val in TEXTOS_SESION_AFIRMATIVA: return 1.0
+        return 0.0
+    else:
+        first_part = cleaned_val.split('-')[0].strip()
+        if not first_part: return 0.0
+        try:
+            num_val_from_part = pd.to_numeric(first_part, errors='raise')
+            return 0.0 if pd.isna(num_val_from_part) else float(
+                num_val_from_part)
+        except ValueError:
+            return 0.0
+
+
+def parsear_kpi_serie(serie, column_name=""):
+    """
+    Versión vectorizada de parse_kpi_value para una columna completa (devuelve floats).
+    Números tal cual; en "Sesiones agendadas" los textos afirmativos valen 1; en el
+    resto de columnas un rango "N-M" vale N; cualquier otra cosa vale 0.
+    """
+    # Las columnas repiten mucho los mismos textos: se parsea cada valor distinto una vez
+    codigos, distintos = pd.factorize(serie)
+    limpio = pd.Series(distintos, dtype=object).astype(str).str.strip().str.lower()
+    valores = pd.to_numeric(limpio, errors='coerce').astype(float)
+
+    # Solo las celdas que no son números pasan por las reglas de texto
+    fallidos = valores.isna()
+    if fallidos.any():
+        resto = limpio[fallidos]
+        if column_name == "Sesiones agendadas":
+            valores[fallidos] = resto.isin(TEXTOS_SESION_AFIRMATIVA).astype(float)
+        else:
+            primera_parte = resto.str.split('-', n=1).str[0].str.strip()
+            valores[fallidos] = pd.to_numeric(primera_parte,
+                                              errors='coerce').fillna(0.0)
+
+    # Código -1 = nulo, que parse_kpi_value convierte en "nan" -> 0.0
+    resultado = np.append(valores.to_numpy(), 0.0)[codigos]
+    return pd.Series(resultado, index=serie.index, name=serie.name)
+
+
+@functools.lru_cache(maxsize=4096)
+def _inferir_fecha(texto):
+    # Misma inferencia que pd.to_datetime(valor) celda a celda; None si no se entiende
+    try:
+        fecha = pd.to_datetime(texto, errors='raise')
+    except Exception:
+        return None
+    if pd.isna(fecha):
+        return None
+    return fecha.tz_localize(None) if fecha.tzinfo is not None else fecha
+
+
+def parsear_fechas(serie, formato=FORMATO_FECHA, inferir=True, nombre=None,
+                   devolver_conteos=False):
+    """
+    Convierte `serie` a datetime64. Cada texto distinto se parsea una sola vez: todos
+    con `formato` de golpe y, si inferir=True, los que fallen uno a uno con la
+    inferencia de pandas (como parse_date_robust). Vacíos y no reconocidos quedan NaT.
+
+    Los aciertos por vía (formato, inferidas, vacías, sin_parsear) se registran en el
+    log con `nombre` y se devuelven junto a la serie si devolver_conteos=True.
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        fechas = serie
+        conteos = {formato: int(serie.notna().sum()), "inferidas": 0,
+                   "vacías": int(serie.isna().sum()), "sin_parsear": 0}
+        return (fechas, conteos) if devolver_conteos else fechas
+
+    codigos, distintos = pd.factorize(serie)
+    textos = pd.Series(distintos, dtype=object).astype(str)
+    vacios = (textos.str.strip() == "").to_numpy()
+
+    valores = pd.to_datetime(textos, format=formato, errors='coerce').to_numpy(
+        dtype='datetime64[ns]', copy=True)
+    por_formato = ~np.isnat(valores) & ~vacios
+    valores[vacios] = np.datetime64('NaT')
+
+    inferidas = np.zeros(len(textos), dtype=bool)
+    if inferir:
+        # Solo el residuo (pocos textos distintos) pasa por la inferencia
+        for i in np.flatnonzero(~por_formato & ~vacios):
+            fecha = _inferir_fecha(textos[i])
+            if fecha is not None:
+                valores[i] = fecha.to_datetime64()
+                inferidas[i] = True
+
+    # Filas por texto distinto para contar aciertos por fila, no por valor
+    filas_por_texto = np.bincount(codigos[codigos >= 0], minlength=len(textos))
+    conteos = {
+        formato: int(filas_por_texto[por_formato].sum()),
+        "inferidas": int(filas_por_texto[inferidas].sum()),
+        "vacías": int(filas_por_texto[vacios].sum() + np.count_nonzero(codigos < 0)),
+        "sin_parsear": int(filas_por_texto[~por_formato & ~inferidas & ~vacios].sum()),
+    }
+    logger.info("Fechas %s: %s", nombre or serie.name, conteos)
+
+    # Código -1 = nulo -> NaT
+    resultado = np.append(valores, np.datetime64('NaT'))[codigos]
+    fechas = pd.Series(resultado, index=serie.index, name=serie.name)
+    return (fechas, conteos) if devolver_conteos else fechas
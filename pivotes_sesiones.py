@@ -0,0 +1,104 @@
+# utils/pivotes_sesiones.py
+# Pivotes dimensión x calificación SQL de la página de Sesiones (LG, AE, País,
+# Puesto, Empresa) en una sola pasada. Cada dimensión y SQL_Estandarizado se
+# codifican una vez por carga de datos (códigos ordenados por valor, como groupby)
+# y los conteos de todas las dimensiones salen de un único np.bincount sobre
+# códigos combinados; el top N y las tablas se arman sobre esas matrices pequeñas.
+
+import numpy as np
+import pandas as pd
+
+COLUMNA_SQL = "SQL_Estandarizado"
+
+
+class PivotesSesiones:
+    """Códigos de `dimensiones` y del SQL de `df`, reutilizables para cualquier subconjunto de filas."""
+
+    def __init__(self, df, dimensiones):
+        self._codigos_sql, self.valores_sql = pd.factorize(df[COLUMNA_SQL],
+                                                           sort=True)
+        self._codigos = {
+            dimension: pd.factorize(df[dimension], sort=True)
+            for dimension in dimensiones if dimension in df.columns
+        }
+
+    def calcular(self, posiciones, tops, orden_sql):
+        """
+        Para cada dimensión de `tops` (dimensión -> N), sobre las filas `posiciones`
+        (todas si es None), devuelve un dict con "top" (las N con más sesiones),
+        "detalle" (sesiones por dimensión y SQL de esas N, en formato largo para el
+        gráfico), "pivote" (N x SQL en el orden de `orden_sql`, más Total_Sesiones_Dim)
+        y "orden_sql". Las dimensiones que no están en los datos no aparecen.
+        """
+        n_sql = len(self.valores_sql)
+        dimensiones = [d for d in tops if d in self._codigos]
+        if n_sql == 0 or not dimensiones:
+            return {}
+
+        codigos_sql = (self._codigos_sql
+                       if posiciones is None else self._codigos_sql[posiciones])
+        # Cada dimensión ocupa su propio tramo (valores x SQL) del vector de conteos
+        tamanos = [len(self._codigos[d][1]) * n_sql for d in dimensiones]
+        inicios = np.concatenate([[0], np.cumsum(tamanos)]).astype(np.int64)
+        combinados = []
+        for dimension, inicio in zip(dimensiones, inicios):
+            codigos = self._codigos[dimension][0]
+            if posiciones is not None:
+                codigos = codigos[posiciones]
+            # Como groupby: las filas con la dimensión o el SQL nulos no cuentan
+            validas = (codigos >= 0) & (codigos_sql >= 0)
+            combinados.append(inicio + codigos[validas].astype(np.int64) * n_sql +
+                              codigos_sql[validas])
+        conteos = np.bincount(np.concatenate(combinados),
+                              minlength=int(inicios[-1]))
+
+        return {
+            dimension: self._pivote(
+                dimension, conteos[inicio:inicio + tamano].reshape(-1, n_sql),
+                tops[dimension], orden_sql)
+            for dimension, inicio, tamano in zip(dimensiones, inicios, tamanos)
+        }
+
+    def _pivote(self, dimension, matriz, top_n, orden_sql):
+        valores_dim = self._codigos[dimension][1]
+        totales = matriz.sum(axis=1)
+        presentes = np.flatnonzero(totales)
+
+        # Mismo desempate que sort_values(ascending=False).head(N) sobre el groupby
+        dim_totals = pd.DataFrame({
+            dimension: np.asarray(valores_dim, dtype=object)[presentes],
+            "Total_Sesiones": totales[presentes]
+        })
+        top = dim_totals.sort_values(
+            by="Total_Sesiones", ascending=False).head(top_n)[dimension].tolist()
+        codigos_top = valores_dim.get_indexer(top)
+
+        # Formato largo, ordenado por dimensión y SQL como el groupby original
+        codigos_ordenados = np.sort(codigos_top)
+        filas, columnas = np.nonzero(matriz[codigos_ordenados])
+        detalle = pd.DataFrame({
+            dimension:
+            np.asarray(valores_dim, dtype=object)[codigos_ordenados[filas]],
+            COLUMNA_SQL:
+            pd.Categorical(np.asarray(self.valores_sql, dtype=object)[columnas],
+                           categories=orden_sql,
+                           ordered=True),
+            "Cantidad_SQL":
+            matriz[codigos_ordenados[filas], columnas]
+        })
+
+        # Filas en el orden del top y columnas en el orden de importancia del SQL
+        columnas_sql = self.valores_sql.get_indexer(orden_sql)
+        tabla = np.where(columnas_sql >= 0,
+                         matriz[codigos_top][:, columnas_sql], 0)
+        pivote = pd.DataFrame(tabla,
+                              index=pd.Index(top, name=dimension),
+                              columns=pd.Index(orden_sql, name=COLUMNA_SQL))
+        pivote["Total_Sesiones_Dim"] = tabla.sum(axis=1)
+
+        return {
+            "top": top,
+            "detalle": detalle,
+            "pivote": pivote,
+            "orden_sql": orden_sql
+        }
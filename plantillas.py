@@ -0,0 +1,88 @@
+# mensajes/plantillas.py
+# Motor de plantillas de los mensajes personalizados (ver mensajes/mensajes.py).
+# Cada plantilla se compila una vez en segmentos literales y huecos {campo}; los
+# mensajes de un lote se arman por columnas, concatenando series de texto ya
+# preparadas (primer nombre, avatar) en lugar de hacer str.replace fila a fila.
+
+import functools
+import re
+import pandas as pd
+from mensajes.mensajes import (
+    mensaje_1_h2r, mensaje_2_h2r, mensaje_3_h2r, mensaje_1_p2p, mensaje_2_p2p,
+    mensaje_1_o2c, mensaje_2_o2c, mensaje_1_general, mensaje_2_general)
+
+# Huecos de las plantillas: {nombre}, {avatar}, ...
+PATRON_CAMPO = re.compile(r"\{(\w+)\}")
+
+# Valores cuando el prospecto no tiene nombre o avatar
+NOMBRE_POR_DEFECTO = "[Nombre]"
+AVATAR_POR_DEFECTO = "John Bermúdez"
+
+# Variantes de plantilla por categoría de proceso (ver mensajes/mensajes_streamlit.py)
+PLANTILLAS_POR_CATEGORIA = {
+    "H2R": {
+        "Mensaje 1 H2R": mensaje_1_h2r,
+        "Mensaje 2 H2R": mensaje_2_h2r,
+        "Mensaje 3 H2R": mensaje_3_h2r
+    },
+    "P2P": {
+        "Mensaje 1 P2P": mensaje_1_p2p,
+        "Mensaje 2 P2P": mensaje_2_p2p
+    },
+    "O2C": {
+        "Mensaje 1 O2C": mensaje_1_o2c,
+        "Mensaje 2 O2C": mensaje_2_o2c
+    },
+    "General": {
+        "Mensaje 1 General": mensaje_1_general,
+        "Mensaje 2 General": mensaje_2_general
+    },
+}
+
+
+class Plantilla:
+    """Texto de una plantilla partido en literales y campos: literal, campo, literal, ..."""
+
+    def __init__(self, texto):
+        partes = PATRON_CAMPO.split(texto)
+        self.literales = partes[0::2]
+        self.campos = partes[1::2]
+
+    def renderizar(self, valores, indice):
+        """
+        Un mensaje por fila de `indice`. `valores` es campo -> Series de textos con ese
+        índice; los campos sin valores se dejan tal cual ({campo}), como str.replace.
+        """
+        mensajes = pd.Series(self.literales[0], index=indice, dtype=object)
+        for campo, literal in zip(self.campos, self.literales[1:]):
+            if campo in valores:
+                mensajes = mensajes + valores[campo].astype(str)
+                mensajes = mensajes + literal
+            else:
+                mensajes = mensajes + ("{" + campo + "}" + literal)
+        return mensajes
+
+
+@functools.lru_cache(maxsize=64)
+def compilar_plantilla(texto):
+    """Plantilla compilada de `texto` (una vez por texto distinto)."""
+    return Plantilla(texto)
+
+
+def columna_o_vacia(df, columna):
+    """`df[columna]`, o una columna vacía si falta (toma los valores por defecto)."""
+    if columna in df.columns:
+        return df[columna]
+    return pd.Series(index=df.index, dtype=object)
+
+
+def primer_nombre(nombres):
+    """Primera palabra de cada nombre; NOMBRE_POR_DEFECTO si está vacío o falta."""
+    texto = nombres.astype(object).where(nombres.notna(), "").astype(str)
+    return texto.str.split(n=1).str[0].fillna(NOMBRE_POR_DEFECTO)
+
+
+def avatar_mensaje(avatares):
+    """Avatar tal cual; AVATAR_POR_DEFECTO si está vacío o falta."""
+    texto = avatares.astype(object).where(avatares.notna(), "").astype(str)
+    return texto.mask(texto.str.strip() == "", AVATAR_POR_DEFECTO)
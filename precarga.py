@@ -0,0 +1,83 @@
+# datos/precarga.py
+# Precarga concurrente de las hojas al arrancar la app. La primera página que se
+# abre lanza en un pool de hilos la lectura de todas las fuentes (prospectos, KPIs
+# semanales, sesiones); cada cargador recoge después el resultado ya leído en lugar
+# de ir a la red, así que el arranque tarda lo que la hoja más lenta y no la suma.
+# Los hilos no llaman a Streamlit: los mensajes (st.error / st.stop) siguen en la
+# página. Para KPIs y sesiones solo leen la hoja (la limpieza es de la página); para
+# prospectos ejecutan sincronizar_snapshot, que ya limpia las filas (limpiar_filas) y
+# escribe el snapshot Parquet. Si una lectura precargada falla, el cargador la repite
+# y muestra el error.
+# Un resultado más antiguo que la vida de la caché de su cargador ya no se usa: una
+# página que se abre horas después del arranque vuelve a leer la fuente.
+
+import logging
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+_futuros = {}
+# Varias sesiones pueden arrancar a la vez: la precarga se lanza una sola vez
+_lock = threading.Lock()
+# Marcador de una precarga ya entregada (no se vuelve a lanzar)
+_ENTREGADA = object()
+
+# Antigüedad máxima por defecto de un resultado precargado (la TTL típica de los cargadores)
+EDAD_MAXIMA_PRECARGA_SEGUNDOS = 300
+
+
+def iniciar_precarga(tareas):
+    """
+    Lanza en segundo plano las `tareas` (nombre -> función sin argumentos) que no se
+    hayan lanzado ya en este proceso. No espera a que terminen.
+    """
+    with _lock:
+        pendientes = {
+            nombre: tarea for nombre, tarea in tareas.items()
+            if nombre not in _futuros
+        }
+        if not pendientes:
+            return
+        executor = ThreadPoolExecutor(max_workers=len(pendientes),
+                                      thread_name_prefix="precarga")
+        for nombre, tarea in pendientes.items():
+            _futuros[nombre] = executor.submit(_ejecutar, nombre, tarea)
+        # Los hilos terminan solos al acabar su tarea
+        executor.shutdown(wait=False)
+
+
+def _ejecutar(nombre, tarea):
+    inicio = time.perf_counter()
+    try:
+        # Con el instante en que terminó, para descartar resultados demasiado antiguos
+        return tarea(), time.monotonic()
+    finally:
+        logger.info("Precarga '%s': %.2fs", nombre, time.perf_counter() - inicio)
+
+
+def obtener_precargado(nombre, cargar, edad_maxima=EDAD_MAXIMA_PRECARGA_SEGUNDOS):
+    """
+    Resultado de la precarga `nombre` (esperando si aún está en curso) o, si no se
+    precargó, falló o terminó hace más de `edad_maxima` segundos (usar la TTL del
+    cargador), el de `cargar()`. Cada precarga se entrega una sola vez: las recargas
+    posteriores (p. ej. al caducar la caché) vuelven a leer la fuente.
+    """
+    with _lock:
+        futuro = _futuros.get(nombre)
+        if futuro is not None:
+            _futuros[nombre] = _ENTREGADA
+    if futuro is None or futuro is _ENTREGADA:
+        return cargar()
+    try:
+        resultado, terminada = futuro.result()
+    except Exception as e:
+        logger.warning("Precarga '%s' fallida (%s); se vuelve a leer", nombre, e)
+        return cargar()
+    edad = time.monotonic() - terminada
+    if edad > edad_maxima:
+        logger.info("Precarga '%s' de hace %.0fs (máximo %ss); se vuelve a leer",
+                    nombre, edad, edad_maxima)
+        return cargar()
+    return resultado
@@ -2,35 +2,26 @@
 
 import streamlit as st
 import pandas as pd
-from utils.limpieza import limpiar_valor_kpi  # Asegúrate de que esta función se importe
+from utils.motor_kpis import calcular_kpis
+from utils.agregaciones import vista_para
 
 
 # La firma de la función modificada para aceptar los conteos base
-def mostrar_resumen_ejecutivo(df_kpis, limpiar_valor_kpi, base_kpis_counts,
-                              sesiones_filtered):
+def mostrar_resumen_ejecutivo(df_kpis, base_kpis_counts, sesiones_filtered,
+                              kpis_filtered=None, agregados=None):
     st.markdown("---")
     st.markdown("## 📝 Resumen Ejecutivo")
 
     # total_filtered es la cantidad de filas después de todos los filtros de la barra lateral
     total_filtered = len(df_kpis)
 
-    # Obtenemos los conteos para el conjunto filtrado
-    inv_acept_filtered = 0
-    if "¿Invite Aceptada?" in df_kpis.columns:
-        inv_acept_filtered = sum(
-            limpiar_valor_kpi(x) == "si" for x in df_kpis["¿Invite Aceptada?"])
-
-    primeros_mensajes_enviados_count_filtered = 0
-    if "Fecha Primer Mensaje" in df_kpis.columns:
-        primeros_mensajes_enviados_count_filtered = sum(
-            limpiar_valor_kpi(x) not in ["no", "", "nan"]
-            for x in df_kpis["Fecha Primer Mensaje"])
-
-    resp_primer_filtered = 0
-    if "Respuesta Primer Mensaje" in df_kpis.columns:
-        resp_primer_filtered = sum(
-            limpiar_valor_kpi(x) not in ["no", "", "nan"]
-            for x in df_kpis["Respuesta Primer Mensaje"])
+    # Obtenemos los conteos para el conjunto filtrado (vectorizados, ver utils/motor_kpis.py)
+    if kpis_filtered is None:
+        kpis_filtered = calcular_kpis(df_kpis)
+    inv_acept_filtered = kpis_filtered["inv_acept"]
+    primeros_mensajes_enviados_count_filtered = kpis_filtered[
+        "primeros_mensajes_enviados_count"]
+    resp_primer_filtered = kpis_filtered["resp_primer"]
 
     # Usamos el conteo de sesiones filtrado que se pasó como argumento
     sesiones = sesiones_filtered
@@ -76,11 +67,14 @@ def mostrar_resumen_ejecutivo(df_kpis, limpiar_valor_kpi, base_kpis_counts,
         # Deberías refactorizar para no duplicar lógica.
         # O idealmente, la función de análisis de dimensión retorna su top resultado y lo usas aquí.
         try:
-            resumen_industria = df_kpis.groupby("Industria").agg(
-                Total_Prospectados=("Industria", 'count'),
-                Sesiones_Agendadas=(
-                    "Sesion Agendada?", lambda x:
-                    (x.apply(limpiar_valor_kpi) == "si").sum())).reset_index()
+            # Mismo agregado por Industria que la sección de dimensiones (ver utils/agregaciones.py)
+            if agregados is None:
+                agregados = vista_para(df_kpis)
+            resumen_industria = agregados.por("Industria").rename(
+                columns={
+                    "Prospectados": "Total_Prospectados",
+                    "session_ok": "Sesiones_Agendadas"
+                })[["Industria", "Total_Prospectados", "Sesiones_Agendadas"]]
             resumen_industria["Tasa Agendamiento (%)"] = (
                 (resumen_industria["Sesiones_Agendadas"] /
                  resumen_industria["Total_Prospectados"]) * 100).fillna(0)
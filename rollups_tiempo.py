@@ -0,0 +1,60 @@
+# utils/rollups_tiempo.py
+# Rollups diarios para los gráficos de evolución (KPIs Semanales y Sesiones).
+# Una fila por día y combinación de las columnas de filtro de la página, con el
+# número de filas ("n") y la suma de las métricas. Se construyen una vez por carga:
+# los filtros de la página se aplican al rollup (tiene las mismas columnas) y la
+# evolución semanal o mensual se reagrega con claves enteras (año * 100 + semana/mes)
+# sobre cientos de días en lugar de sobre todas las filas.
+
+import numpy as np
+import pandas as pd
+
+# Columna de la que sale el segundo componente de la clave de cada periodo
+COLUMNA_PERIODO = {"semana": "NumSemana", "mes": "MesNum"}
+
+
+def rollup_diario(df, dimensiones, metricas=(), columna_fecha="Fecha"):
+    """
+    Agrega `df` por día de `columna_fecha` y `dimensiones`: "n" filas y la suma de cada
+    columna de `metricas`, más Año, NumSemana (ISO) y MesNum enteros de cada día.
+    Devuelve None si `columna_fecha` falta o no es de tipo fecha.
+    """
+    if columna_fecha not in df.columns or not pd.api.types.is_datetime64_any_dtype(
+            df[columna_fecha]):
+        return None
+    dimensiones = [d for d in dimensiones if d in df.columns]
+    metricas = [m for m in metricas if m in df.columns]
+
+    # Las filas sin fecha no caen en ningún periodo
+    base = df.loc[df[columna_fecha].notna(), [columna_fecha] + dimensiones + metricas]
+    base = base.assign(**{columna_fecha: base[columna_fecha].dt.normalize()}, n=1)
+    rollup = base.groupby([columna_fecha] + dimensiones, dropna=False,
+                          observed=True)[["n"] + metricas].sum().reset_index()
+
+    # Mismas columnas derivadas que los loaders, pero calculadas por día y no por fila
+    fechas = rollup[columna_fecha]
+    rollup["Año"] = fechas.dt.year.to_numpy(dtype=np.int64)
+    rollup["NumSemana"] = fechas.dt.isocalendar().week.to_numpy(dtype=np.int64)
+    rollup["MesNum"] = fechas.dt.month.to_numpy(dtype=np.int64)
+    return rollup
+
+
+def agregar_periodo(rollup, periodo, metricas, por=(), etiqueta="Periodo"):
+    """
+    Reagrega `rollup` por semana (Año + NumSemana) o mes (Año + MesNum) y `por`.
+    Agrupa por la clave entera año * 100 + semana/mes y solo al final construye la
+    columna `etiqueta` ("2024-S05" o "2024-05"). Filas ordenadas por periodo y `por`.
+    """
+    por = list(por)
+    anios = rollup["Año"].to_numpy(dtype=np.int64)
+    partes = rollup[COLUMNA_PERIODO[periodo]].to_numpy(dtype=np.int64)
+    agregado = rollup[por + list(metricas)].assign(
+        clave_periodo=anios * 100 + partes).groupby(
+            ["clave_periodo"] + por, as_index=False,
+            observed=True)[list(metricas)].sum()
+
+    anio = (agregado["clave_periodo"] // 100).astype(str)
+    parte = (agregado["clave_periodo"] % 100).astype(str).str.zfill(2)
+    separador = "-S" if periodo == "semana" else "-"
+    agregado.insert(0, etiqueta, anio + separador + parte)
+    return agregado
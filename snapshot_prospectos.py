@@ -0,0 +1,194 @@
+# datos/snapshot_prospectos.py
+# Snapshot local (Parquet) del df_base de prospectos, con sincronización
+# incremental de las filas añadidas a la hoja desde la última carga.
+# La lectura incremental no ve los cambios en filas ya leídas (estados del embudo
+# editados, una "Fecha de Invite" rellenada más tarde), así que pasada
+# EDAD_MAXIMA_SNAPSHOT desde la última lectura completa se vuelve a leer toda la hoja.
+# La hoja se lee por bloques de filas (ver fuentes_datos.FILAS_POR_BLOQUE): cada
+# bloque se limpia y se guarda como tabla Arrow, así que nunca están a la vez en
+# memoria la hoja entera como listas de Python y el DataFrame resultante.
+
+import os
+import json
+import tempfile
+import hashlib
+import datetime
+import logging
+import pandas as pd
+import pyarrow as pa
+
+logger = logging.getLogger(__name__)
+
+# Carpeta del snapshot relativa a la raíz del proyecto
+project_root = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), os.pardir))
+CARPETA_SNAPSHOT = os.path.join(project_root, "cache")
+RUTA_SNAPSHOT = os.path.join(CARPETA_SNAPSHOT, "prospectos_base.parquet")
+RUTA_METADATOS = os.path.join(CARPETA_SNAPSHOT, "prospectos_base.json")
+
+# Antigüedad máxima de la última lectura completa antes de hacer otra
+EDAD_MAXIMA_SNAPSHOT = datetime.timedelta(minutes=30)
+
+
+def leer_snapshot():
+    """Devuelve (df_base, metadatos) del snapshot local, o (None, None) si no existe o está dañado."""
+    if not (os.path.exists(RUTA_SNAPSHOT) and os.path.exists(RUTA_METADATOS)):
+        return None, None
+    try:
+        with open(RUTA_METADATOS, "r", encoding="utf-8") as f:
+            metadatos = json.load(f)
+        df_base = pd.read_parquet(RUTA_SNAPSHOT)
+    except Exception:
+        # Un snapshot ilegible se trata como inexistente: se recarga la hoja completa
+        return None, None
+    return df_base, metadatos
+
+
+def guardar_snapshot(df_base, headers, filas_hoja, fuente_id="", ultima_fila=None,
+                     lectura_completa=None):
+    """
+    Guarda df_base y la marca de agua (filas de datos leídas de la hoja), con la huella
+    de la última fila leída y la fecha de la última lectura completa (ahora si es None).
+    """
+    os.makedirs(CARPETA_SNAPSHOT, exist_ok=True)
+    ahora = datetime.datetime.now().isoformat(timespec="seconds")
+    metadatos = {
+        "fuente": fuente_id,
+        "headers": list(headers),
+        "filas_hoja": int(filas_hoja),
+        "huella_ultima_fila": _huella(ultima_fila) if ultima_fila is not None else None,
+        "lectura_completa": lectura_completa or ahora,
+        "actualizado": ahora,
+    }
+    _escribir_atomico(RUTA_SNAPSHOT, lambda ruta: df_base.to_parquet(ruta, index=True))
+    _escribir_atomico(RUTA_METADATOS, lambda ruta: _escribir_json(ruta, metadatos))
+    return metadatos
+
+
+def _escribir_atomico(ruta, escribir):
+    # Escribimos a un temporal propio y renombramos: nunca queda un archivo a medias, y
+    # dos escrituras a la vez (p. ej. la precarga y la página) no comparten temporal
+    with tempfile.NamedTemporaryFile(dir=CARPETA_SNAPSHOT, suffix=".tmp",
+                                     delete=False) as tmp:
+        ruta_tmp = tmp.name
+    try:
+        escribir(ruta_tmp)
+        os.replace(ruta_tmp, ruta)
+    except BaseException:
+        if os.path.exists(ruta_tmp):
+            os.remove(ruta_tmp)
+        raise
+
+
+def _escribir_json(ruta, datos):
+    with open(ruta, "w", encoding="utf-8") as f:
+        json.dump(datos, f, ensure_ascii=False)
+
+
+def cargar_por_bloques(fuente, headers, limpiar_filas, desde=0, progreso=None):
+    """
+    Lee las filas de datos de `fuente` desde `desde` por bloques, limpia cada bloque
+    con limpiar_filas y los une al final en un solo DataFrame (vía Arrow).
+
+    Devuelve (df, filas_hoja, ultima_fila): df es None si no había filas con datos,
+    filas_hoja es la nueva marca de agua y ultima_fila la fila cruda en filas_hoja - 1
+    (None si no se leyó ninguna). progreso(filas_hoja) se llama tras cada bloque.
+    """
+    tablas = []
+    filas_hoja = desde
+    ultima_fila = None
+    for inicio, filas in fuente.leer_bloques(desde):
+        ultima_fila = filas[-1]
+        if _hay_datos(filas):
+            df_bloque = limpiar_filas(headers, filas, desplazamiento=inicio)
+            # Columnar y sin las listas crudas del bloque, que se liberan aquí
+            tablas.append(pa.Table.from_pandas(df_bloque, preserve_index=True))
+        filas_hoja = inicio + len(filas)
+        logger.info("Prospectos: %s filas leídas", filas_hoja)
+        if progreso is not None:
+            progreso(filas_hoja)
+
+    if not tablas:
+        return None, filas_hoja, ultima_fila
+    # Un bloque sin filas válidas tiene columnas de tipo null: se unifican con el resto
+    tabla = pa.concat_tables(tablas, promote_options="default")
+    del tablas
+    return tabla.to_pandas(), filas_hoja, ultima_fila
+
+
+def sincronizar_snapshot(fuente, limpiar_filas, forzar_recarga=False, progreso=None):
+    """
+    Devuelve el df_base limpio usando el snapshot local como punto de partida.
+
+    La marca de agua es el número de filas de datos de la hoja ya incorporadas.
+    Solo se descargan las filas posteriores a esa marca; se recarga la hoja completa
+    si los encabezados cambiaron, si la fila en la marca ya no es la que se leyó (filas
+    borradas antes de ella, aunque además se hayan añadido otras), si la última
+    lectura completa tiene más de EDAD_MAXIMA_SNAPSHOT o con `forzar_recarga`.
+    Las lecturas van por bloques (ver cargar_por_bloques).
+    """
+    df_snapshot, metadatos = (None, None) if forzar_recarga else leer_snapshot()
+
+    # Un snapshot de otra fuente (p. ej. la hoja real frente a una copia local) no sirve
+    if df_snapshot is not None and metadatos.get("fuente", "") == fuente.identificador:
+        headers = metadatos.get("headers", [])
+        marca = int(metadatos.get("filas_hoja", 0))
+        # row_values recorta las celdas vacías finales; get_all_values no
+        if (_sin_vacios_finales(fuente.leer_encabezados()) == _sin_vacios_finales(headers)
+                and not _caducado(metadatos)
+                and _ultima_fila_intacta(fuente, marca, metadatos)):
+            df_nuevas, filas_hoja, ultima_fila = cargar_por_bloques(
+                fuente, headers, limpiar_filas, desde=marca, progreso=progreso)
+
+            if df_nuevas is not None:
+                df_base = pd.concat([df_snapshot, df_nuevas])
+                guardar_snapshot(df_base, headers, filas_hoja, fuente.identificador,
+                                 ultima_fila=ultima_fila,
+                                 lectura_completa=metadatos["lectura_completa"])
+                return df_base
+            return df_snapshot
+        logger.info("Prospectos: snapshot desactualizado, se recarga la hoja completa")
+
+    # Sin snapshot válido (o la hoja cambió): carga completa por bloques
+    headers = fuente.leer_encabezados()
+    df_base, filas_hoja, ultima_fila = cargar_por_bloques(fuente, headers, limpiar_filas,
+                                                          progreso=progreso)
+    if df_base is None:
+        # Hoja sin filas: mismas columnas que una carga con datos
+        df_base = limpiar_filas(headers, [])
+    guardar_snapshot(df_base, headers, filas_hoja, fuente.identificador,
+                     ultima_fila=ultima_fila)
+    return df_base
+
+
+def _caducado(metadatos):
+    # Snapshots sin fecha de lectura completa (anteriores a este campo) también caducan
+    try:
+        lectura = datetime.datetime.fromisoformat(metadatos["lectura_completa"])
+    except (KeyError, TypeError, ValueError):
+        return True
+    return datetime.datetime.now() - lectura > EDAD_MAXIMA_SNAPSHOT
+
+
+def _ultima_fila_intacta(fuente, marca, metadatos):
+    # Si se borró una fila anterior a la marca (o se editó la última), la fila en
+    # marca - 1 ya no es la que se leyó
+    if marca == 0:
+        return True
+    filas = fuente.leer_filas(marca - 1, marca)
+    return bool(filas) and _huella(filas[0]) == metadatos.get("huella_ultima_fila")
+
+
+def _huella(fila):
+    return hashlib.sha1(json.dumps(_sin_vacios_finales(fila)).encode("utf-8")).hexdigest()
+
+
+def _hay_datos(filas):
+    return any(any(str(v).strip() for v in fila) for fila in filas)
+
+
+def _sin_vacios_finales(valores):
+    valores = [str(v).strip() for v in valores]
+    while valores and not valores[-1]:
+        valores.pop()
+    return valores
@@ -1,16 +1,82 @@
 import streamlit as st
 from st_aggrid import AgGrid, GridOptionsBuilder
-import io
+from utils.motor_kpis import COLUMNAS_ESTADO
+from utils.paginacion_tabla import (FILAS_POR_PAGINA, OPCIONES_FILAS_POR_PAGINA,
+                                    firma_tabla, orden_tabla, numero_paginas, paginar)
+from componentes.boton_exportacion import mostrar_boton_exportacion
+
+SIN_ORDEN = "– Sin orden –"
+SIN_FILTRO = "– Sin filtro –"
+
+
+@st.cache_resource(max_entries=32)
+def get_orden_tabla(_df, firma, columna_orden, ascendente, columna_filtro, texto_filtro):
+    # Una vez por tabla filtrada (firma) y orden/filtro: paginar solo toma posiciones
+    return orden_tabla(_df, columna_orden, ascendente, columna_filtro, texto_filtro)
+
 
 def mostrar_tabla_filtrada(df_tabla):
     st.markdown("### 📄 Prospectos Filtrados")
 
-    columnas_excel = df_tabla.columns.tolist()
+    # Las columnas de estado precalculadas son internas: no se muestran ni se exportan
+    columnas_excel = [col for col in df_tabla.columns if col not in COLUMNAS_ESTADO]
     columnas_presentes = [col for col in columnas_excel if col in df_tabla.columns]
-    tabla_final = df_tabla[columnas_presentes].copy()
+    tabla_final = df_tabla[columnas_presentes]
+
+    # Orden y filtro de texto en Python sobre toda la tabla filtrada; al grid solo
+    # llega la página visible
+    col_orden, col_sentido, col_filtro, col_texto = st.columns([3, 2, 3, 3])
+    with col_orden:
+        columna_orden = st.selectbox("Ordenar por", [SIN_ORDEN] + columnas_presentes,
+                                     key="tabla_prospectos_orden")
+    with col_sentido:
+        ascendente = st.radio("Sentido", ["Ascendente", "Descendente"], horizontal=True,
+                              key="tabla_prospectos_sentido") == "Ascendente"
+    with col_filtro:
+        columna_filtro = st.selectbox("Filtrar columna", [SIN_FILTRO] + columnas_presentes,
+                                      key="tabla_prospectos_columna_filtro")
+    with col_texto:
+        texto_filtro = st.text_input("Contiene", key="tabla_prospectos_texto_filtro",
+                                     disabled=columna_filtro == SIN_FILTRO)
+
+    firma = firma_tabla(tabla_final)
+    orden = get_orden_tabla(
+        tabla_final, firma,
+        None if columna_orden == SIN_ORDEN else columna_orden, ascendente,
+        None if columna_filtro == SIN_FILTRO else columna_filtro,
+        texto_filtro.strip() if columna_filtro != SIN_FILTRO else "")
+
+    # Otra tabla, otro orden u otro filtro: se vuelve a la primera página
+    vista = (firma, columna_orden, ascendente, columna_filtro, texto_filtro)
+    if st.session_state.get("tabla_prospectos_vista") != vista:
+        st.session_state["tabla_prospectos_vista"] = vista
+        st.session_state["tabla_prospectos_pagina"] = 1
+
+    col_pagina, col_filas, col_info = st.columns([2, 2, 5])
+    with col_filas:
+        filas_por_pagina = st.selectbox(
+            "Filas por página", OPCIONES_FILAS_POR_PAGINA,
+            index=OPCIONES_FILAS_POR_PAGINA.index(FILAS_POR_PAGINA),
+            key="tabla_prospectos_filas_pagina")
+    n_paginas = numero_paginas(len(orden), filas_por_pagina)
+    if st.session_state.get("tabla_prospectos_pagina", 1) > n_paginas:
+        st.session_state["tabla_prospectos_pagina"] = n_paginas
+    with col_pagina:
+        pagina = st.number_input("Página", min_value=1, max_value=n_paginas, step=1,
+                                 key="tabla_prospectos_pagina")
+    posiciones_pagina = paginar(orden, pagina, filas_por_pagina)
+    ventana = tabla_final.take(posiciones_pagina)
+    with col_info:
+        if len(orden):
+            inicio = (pagina - 1) * filas_por_pagina
+            st.caption(f"Mostrando {inicio + 1:,}–{inicio + len(ventana):,} de "
+                       f"{len(orden):,} prospectos (página {pagina} de {n_paginas})")
+        else:
+            st.caption("Ningún prospecto coincide con el filtro de la tabla.")
 
-    gb = GridOptionsBuilder.from_dataframe(tabla_final)
-    gb.configure_default_column(resizable=True, sortable=True, filter='agTextColumnFilter')
+    gb = GridOptionsBuilder.from_dataframe(ventana)
+    # Orden y filtro ya aplicados en Python sobre todas las filas, no solo la página
+    gb.configure_default_column(resizable=True, sortable=False, filter=False)
 
     if "Fecha Primer Mensaje" in columnas_presentes:
         gb.configure_column("Fecha Primer Mensaje", cellRenderer=f"""
@@ -37,13 +103,14 @@ def mostrar_tabla_filtrada(df_tabla):
     gridOptions = gb.build()
 
     AgGrid(
-        tabla_final,
+        ventana,
         gridOptions=gridOptions,
         height=400,
         theme="alpine",
         enable_enterprise_modules=False,
     )
 
-    output = io.BytesIO()
-    tabla_final.to_excel(output, index=False, engine='openpyxl')
-    st.download_button("⬇️ Descargar Excel", output.getvalue(), "prospectos_filtrados.xlsx", "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+    # Excel, CSV o Parquet (para descargas grandes) de todas las páginas, con el mismo
+    # orden y filtro; generado solo al pulsar "Preparar"
+    mostrar_boton_exportacion(lambda: tabla_final.take(orden), "prospectos_filtrados",
+                              "tabla_prospectos", hoja="Prospectos", filas=len(orden))
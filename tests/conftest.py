@@ -0,0 +1,108 @@
+# tests/conftest.py
+# Las páginas importan los módulos como paquetes (datos., filtros., componentes.,
+# utils., mensajes.) aunque en el repositorio están en la raíz. Para las pruebas se
+# arma esa estructura en un directorio temporal, con enlaces a los archivos, y se
+# generan unas hojas sintéticas pequeñas como fuentes locales (FUENTE_<NOMBRE>).
+
+import os
+import re
+import sys
+import random
+import pytest
+import pandas as pd
+
+RAIZ = os.path.abspath(os.path.join(os.path.dirname(__file__), os.pardir))
+PAQUETES = ("datos", "filtros", "componentes", "utils", "mensajes")
+PAGINAS = ("✉️_Mensajes_Personalizados.py", "📈_Sesiones.py", "📊_KPIs_Semanales.py")
+PAGINA_PRINCIPAL = "🏠_Dashboard_Principal.py"
+
+
+def _modulos_por_paquete():
+    # Paquete de cada módulo según cómo lo importan los demás archivos
+    patron = re.compile(r"\b(" + "|".join(PAQUETES) + r")\.(\w+)\b")
+    destinos = {}
+    for nombre in os.listdir(RAIZ):
+        if nombre.endswith(".py"):
+            with open(os.path.join(RAIZ, nombre), encoding="utf-8") as f:
+                for paquete, modulo in patron.findall(f.read()):
+                    if os.path.exists(os.path.join(RAIZ, modulo + ".py")):
+                        destinos[modulo] = paquete
+    return destinos
+
+
+def _escribir_fuentes(carpeta, filas=600):
+    random.seed(7)
+    encabezados = [
+        "Nombre", "Apellido", "Empresa", "Puesto", "Proceso", "Avatar",
+        "Fecha de Invite", "¿Invite Aceptada?", "Fecha Primer Mensaje",
+        "Respuesta Primer Mensaje", "Respuestas Subsecuentes", "Sesion Agendada?",
+        "Fecha Sesion", "Pais", "Industria", "Fuente de la Lista",
+        "¿Quién Prospecto?", "LinkedIn"
+    ]
+    prospectos = [[
+        random.choice(["José", "Ana", "Luis", "María Paz", ""]),
+        random.choice(["Pérez", "Gómez", ""]),
+        random.choice(["Acme", "Bimbo", "Cemex"]),
+        random.choice(["CFO", "Gerente RH", "Director Compras"]),
+        random.choice(["Hire to Retire", "P2P compras", "Order to Cash", "Otro"]),
+        random.choice(["John Bermúdez", "Maria"]),
+        random.choice(["01/02/2024", "15/03/2024", "", "10/06/2024"]),
+        random.choice(["Si", "No", ""]),
+        random.choice(["No", "05/02/2024"]),
+        random.choice(["No", "Si", ""]), "",
+        random.choice(["Si", "No", ""]), "",
+        random.choice(["México", "Chile", "Perú"]),
+        random.choice(["Retail", "Banca", "Minería"]),
+        random.choice(["LinkedIn", "Evento"]),
+        random.choice(["Juan", "Pedro", ""]), "http://x"
+    ] for _ in range(filas)]
+    pd.DataFrame(prospectos, columns=encabezados).to_csv(
+        os.path.join(carpeta, "prospectos.csv"), index=False)
+
+    kpis = pd.DataFrame(
+        [[random.choice(["01/02/2024", "08/02/2024"]), "S1", "Feb", "Ana", "Norte",
+          "10", "2", "4", "1"] for _ in range(filas // 10)],
+        columns=["Fecha", "Semana", "Mes", "Analista", "Región", "Mensajes Enviados",
+                 "Respuestas", "Invites enviadas", "Sesiones agendadas"])
+    kpis.to_csv(os.path.join(carpeta, "kpis.csv"), index=False)
+
+    sesiones = pd.DataFrame(
+        [["S1", "Feb", "01/02/2024", random.choice(["SQL1", "SQL2", "MQL"]), "Acme",
+          "México", "A", "B", "CFO", "e", "AE1", "LG1", "", ""]
+         for _ in range(filas // 5)],
+        columns=["Semana", "Mes", "Fecha", "SQL", "Empresa", "País", "Nombre",
+                 "Apellido", "Puesto", "Email", "AE", "LG", "Siguientes Pasos", "RPA"])
+    sesiones.to_csv(os.path.join(carpeta, "sesiones.csv"), index=False)
+
+
+@pytest.fixture(scope="session")
+def app(tmp_path_factory):
+    """Directorio con la app armada como paquetes y las fuentes locales configuradas."""
+    carpeta = tmp_path_factory.mktemp("app")
+    for paquete in PAQUETES:
+        os.makedirs(carpeta / paquete)
+        (carpeta / paquete / "__init__.py").touch()
+    for modulo, paquete in _modulos_por_paquete().items():
+        os.symlink(os.path.join(RAIZ, modulo + ".py"), carpeta / paquete / (modulo + ".py"))
+    os.makedirs(carpeta / "pages")
+    for pagina in PAGINAS:
+        os.symlink(os.path.join(RAIZ, pagina), carpeta / "pages" / pagina)
+    os.symlink(os.path.join(RAIZ, PAGINA_PRINCIPAL), carpeta / PAGINA_PRINCIPAL)
+
+    fuentes = tmp_path_factory.mktemp("fuentes")
+    _escribir_fuentes(fuentes)
+    entorno = {
+        "FUENTE_PROSPECTOS": str(fuentes / "prospectos.csv"),
+        "FUENTE_KPIS_SEMANALES": str(fuentes / "kpis.csv"),
+        "FUENTE_SESIONES": str(fuentes / "sesiones.csv"),
+    }
+    anterior = {clave: os.environ.get(clave) for clave in entorno}
+    os.environ.update(entorno)
+    sys.path.insert(0, str(carpeta))
+    yield carpeta
+    sys.path.remove(str(carpeta))
+    for clave, valor in anterior.items():
+        if valor is None:
+            os.environ.pop(clave, None)
+        else:
+            os.environ[clave] = valor
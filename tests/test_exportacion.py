@@ -0,0 +1,25 @@
+import io
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize("filas_por_bloque", [3, 7, 100, 1000, 1001])
+def test_csv_por_bloques_igual_que_to_csv(app, filas_por_bloque):
+    from utils.exportacion import escribir_csv
+
+    filas = 1000
+    rng = np.random.default_rng(0)
+    fechas = pd.Series(pd.date_range("2024-01-01", periods=filas, freq="D"))
+    # Un solo valor con hora: en un to_csv por bloques solo su bloque la escribiría
+    fechas[filas - 1] += pd.Timedelta(hours=10)
+    df = pd.DataFrame({
+        "Fecha": fechas.where(rng.random(filas) > 0.1),
+        "Fecha UTC": fechas.dt.tz_localize("UTC"),
+        "Duracion": pd.to_timedelta(rng.integers(0, 5, filas), unit="D"),
+        "Texto": np.where(rng.random(filas) < 0.2, None, "a,b \"c\""),
+        "Numero": rng.random(filas),
+    })
+    destino = io.BytesIO()
+    escribir_csv(df, destino, filas_por_bloque=filas_por_bloque)
+    assert destino.getvalue() == df.to_csv(index=False).encode("utf-8")
@@ -0,0 +1,35 @@
+import os
+from streamlit.testing.v1 import AppTest
+from conftest import PAGINA_PRINCIPAL
+
+
+def _dashboard(app):
+    at = AppTest.from_file(os.path.join(app, PAGINA_PRINCIPAL), default_timeout=120)
+    at.run()
+    assert not at.exception
+    return at
+
+
+def test_seleccion_se_conserva_al_cambiar_otro_filtro(app):
+    # Los conteos cruzados cambian las etiquetas (y el ID) de los demás widgets
+    at = _dashboard(app)
+    at.multiselect(key="filtro_pais").set_value(["Chile"]).run()
+    at.multiselect(key="filtro_industria").set_value(["Banca"]).run()
+    at.selectbox(key="filtro_invite_aceptada_simple").set_value("Si").run()
+
+    assert not at.exception
+    assert at.multiselect(key="filtro_pais").value == ["Chile"]
+    assert at.multiselect(key="filtro_industria").value == ["Banca"]
+    assert at.selectbox(key="filtro_invite_aceptada_simple").value == "Si"
+
+
+def test_limpiar_filtros(app):
+    at = _dashboard(app)
+    total = at.metric[0].value
+    at.multiselect(key="filtro_pais").set_value(["Chile"]).run()
+    assert at.metric[0].value != total
+
+    boton = next(b for b in at.sidebar.button if "Limpiar" in b.label)
+    boton.click().run()
+    assert at.multiselect(key="filtro_pais").value == ["– Todos –"]
+    assert at.metric[0].value == total
@@ -0,0 +1,27 @@
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize("modo", ["rotacion", "ab"])
+def test_resumen_igual_que_lote(app, modo):
+    from mensajes.generacion_lote import generar_lote, resumen_lote
+
+    df = pd.DataFrame({
+        "Categoría": ["H2R", "P2P", "O2C", "General", "Otro", None] * 50,
+        "Nombre": "Ana María", "Avatar": "Sofía",
+        "Nombre_Completo": [f"p{i}" for i in range(300)], "Empresa": "E",
+        "LinkedIn": [f"l{i}" for i in range(300)],
+    })
+    lote = generar_lote(df, modo)
+    esperado = lote.groupby(["Categoría", "Plantilla"], sort=True).size().reset_index(
+        name="Mensajes")
+    assert resumen_lote(df, modo).equals(esperado)
+
+
+def test_lote_sin_nombre_ni_avatar(app):
+    from mensajes.generacion_lote import generar_lote
+    from mensajes.plantillas import NOMBRE_POR_DEFECTO, AVATAR_POR_DEFECTO
+
+    lote = generar_lote(pd.DataFrame({"Categoría": ["H2R", "General"]}))
+    assert lote["Mensaje_Personalizado"].str.contains(NOMBRE_POR_DEFECTO, regex=False).all()
+    assert lote["Mensaje_Personalizado"].str.contains(AVATAR_POR_DEFECTO, regex=False).any()
@@ -0,0 +1,21 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+
+@pytest.mark.parametrize("columna", ["Mensajes Enviados", "Sesiones agendadas"])
+def test_parsear_kpi_serie_igual_que_por_celda(app, columna):
+    from utils.parseo import parse_kpi_value, parsear_kpi_serie
+
+    muestras = np.array([
+        "12", " 7 ", "3.5", "", "nan", "10-15", " 4 - 6", "-3", "abc", "Si",
+        "sí", "VC", "yes", "True", "no", "1e2", "-", "n/a", None
+    ], dtype=object)
+    rng = np.random.default_rng(0)
+    datos = pd.Series(muestras[rng.integers(0, len(muestras), 5000)])
+    variados = rng.integers(0, 100_000, 2500).astype(str).astype(object)
+    variados[::3] = [f"{v}-{v}" for v in variados[::3]]
+    datos[rng.choice(5000, 2500, replace=False)] = variados
+
+    por_celda = datos.apply(lambda x: parse_kpi_value(x, column_name=columna))
+    assert por_celda.equals(parsear_kpi_serie(datos, column_name=columna))
@@ -0,0 +1,32 @@
+import numpy as np
+import pandas as pd
+
+
+def test_renderizar_igual_que_por_fila(app):
+    from mensajes.plantillas import (PLANTILLAS_POR_CATEGORIA, NOMBRE_POR_DEFECTO,
+                                     AVATAR_POR_DEFECTO, compilar_plantilla,
+                                     primer_nombre, avatar_mensaje)
+
+    rng = np.random.default_rng(0)
+    nombres = np.array(["Ana María", "  luis", "", None, "José Luis Pérez"], dtype=object)
+    avatares = np.array(["John Bermúdez", "Sofía Gómez", "", None], dtype=object)
+    df = pd.DataFrame({
+        "Nombre": nombres[rng.integers(0, len(nombres), 2000)],
+        "Avatar": avatares[rng.integers(0, len(avatares), 2000)],
+    })
+
+    def por_fila(texto, row):
+        nombre, avatar = row["Nombre"], row["Avatar"]
+        return texto.replace(
+            "{nombre}", str(nombre).split()[0] if pd.notna(nombre) and str(nombre).strip()
+            else NOMBRE_POR_DEFECTO).replace(
+                "{avatar}", str(avatar) if pd.notna(avatar) and str(avatar).strip()
+                else AVATAR_POR_DEFECTO)
+
+    for plantillas in PLANTILLAS_POR_CATEGORIA.values():
+        for texto in plantillas.values():
+            esperado = df.apply(lambda row: por_fila(texto, row), axis=1)
+            vectorizado = compilar_plantilla(texto).renderizar(
+                {"nombre": primer_nombre(df["Nombre"]),
+                 "avatar": avatar_mensaje(df["Avatar"])}, df.index)
+            assert vectorizado.equals(esperado)
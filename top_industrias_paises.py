@@ -2,7 +2,7 @@
 import streamlit as st
 import plotly.express as px
 import pandas as pd
-from utils.limpieza import limpiar_valor_kpi
+from utils.agregaciones import vista_para
 
 
 def mostrar_analisis_dimension_agendamiento_flexible(
@@ -10,7 +10,8 @@ def mostrar_analisis_dimension_agendamiento_flexible(
         dimension_col,
         titulo_dimension,
         top_n_grafico=10,
-        mostrar_tabla_completa=False):  # Nuevos parámetros
+        mostrar_tabla_completa=False,
+        agregados=None):  # Nuevos parámetros
     st.markdown("---")
     # Ajustar el título principal si solo se muestra el gráfico o ambos
     titulo_seccion = f"Análisis de {titulo_dimension}: Top {top_n_grafico} por Tasa de Agendamiento"
@@ -25,11 +26,14 @@ def mostrar_analisis_dimension_agendamiento_flexible(
         return
 
     # Calcular prospectados y sesiones agendadas por dimensión
-    resumen_dimension_completo = df_filtrado.groupby(
-        dimension_col, as_index=False).agg(
-            Total_Prospectados=(dimension_col, 'count'),
-            Sesiones_Agendadas=("Sesion Agendada?", lambda x:
-                                (x.apply(limpiar_valor_kpi) == "si").sum()))
+    # (agregados: VistaAgregada compartida por todas las secciones, ver utils/agregaciones.py)
+    if agregados is None:
+        agregados = vista_para(df_filtrado)
+    resumen_dimension_completo = agregados.por(dimension_col).rename(
+        columns={
+            "Prospectados": "Total_Prospectados",
+            "session_ok": "Sesiones_Agendadas"
+        })[[dimension_col, "Total_Prospectados", "Sesiones_Agendadas"]]
     resumen_dimension_completo.rename(
         columns={resumen_dimension_completo.columns[0]: dimension_col},
         inplace=True)
@@ -15,13 +15,18 @@ sys.path.insert(0, project_root)
 
 # --- IMPORTS DE TU PROYECTO EXISTENTE ---
 # Asegúrate de que estas importaciones coincidan con la ubicación real de tus archivos
-from datos.carga_datos import cargar_y_limpiar_datos  # Para cargar los datos base
+from datos.carga_datos import cargar_y_limpiar_datos, cargar_y_procesar_datos, precargar_fuentes  # Para cargar los datos base
 from filtros.aplicar_filtros import aplicar_filtros  # Para aplicar filtros (adaptaremos su uso)
-from mensajes.mensajes import (  # Tus plantillas de mensajes
-    mensaje_1_h2r, mensaje_2_h2r, mensaje_3_h2r, mensaje_1_p2p, mensaje_2_p2p,
-    mensaje_1_o2c, mensaje_2_o2c, mensaje_1_general, mensaje_2_general)
-from mensajes.mensajes_streamlit import clasificar_por_proceso  # Función para categorizar
-from utils.limpieza import limpiar_valor_kpi, estandarizar_avatar, limpiar_nombre_completo  # Funciones de utilidad
+from utils.indice_busqueda import IndiceBusqueda  # Búsqueda de texto indexada
+from filtros.catalogo_facetas import CatalogoFacetas  # Opciones de los filtros por versión de datos
+from mensajes.mensajes_streamlit import clasificar_procesos  # Función para categorizar
+from utils.limpieza import estandarizar_avatar, limpiar_nombre_completo_serie  # Funciones de utilidad
+from mensajes.plantillas import (  # Plantillas compiladas y variantes por categoría
+    PLANTILLAS_POR_CATEGORIA, compilar_plantilla, primer_nombre, avatar_mensaje,
+    columna_o_vacia)
+from mensajes.generacion_lote import (  # Todas las categorías y variantes de una vez
+    generar_lote, resumen_lote, tabla_exportacion, MODOS_ASIGNACION, FORMATOS_LOTE)
+from componentes.boton_exportacion import mostrar_boton_exportacion  # Descargas bajo demanda
 
 
 # --- FUNCIÓN PARA LIMPIAR FILTROS DE ESTA PÁGINA ---
@@ -48,6 +53,8 @@ def reset_mensaje_filtros_state():
 
 # --- CONFIGURACIÓN DE LA PÁGINA ---
 st.set_page_config(page_title="Mensajes Personalizados", layout="wide")
+# Lectura concurrente de todas las hojas en segundo plano (ver datos/precarga.py)
+precargar_fuentes()
 st.title("💌 Generador de Mensajes Personalizados")
 st.markdown(
     "Aquí puedes filtrar a los prospectos que aceptaron tu invitación y generar mensajes personalizados basados en plantillas."
@@ -61,11 +68,9 @@ st.markdown(
 def get_base_data():
     # Reutilizamos la función existente
     df_base = cargar_y_limpiar_datos()
-    # Opcional: Si tienes procesamiento adicional en cargar_y_procesar_datos
-    # que no sea dependiente de filtros y sea útil para el dataframe base, agrégalo aquí.
-    # Por ejemplo, si calcular_dias_respuesta se aplica al DF base:
-    # from datos.carga_datos import cargar_y_procesar_datos # Asegúrate de importar si es necesario
-    # df_base = cargar_y_procesar_datos(df_base.copy()) # Aplica procesamiento si es relevante aquí
+    # cargar_y_procesar_datos añade las columnas de estado normalizadas (invite_ok,
+    # invite_estado, session_estado, ...) que usan el filtro obligatorio y aplicar_filtros
+    df_base = cargar_y_procesar_datos(df_base.copy())
 
     # Asegúrate de que la columna 'Fecha de Invite' sea datetime para posibles filtros futuros
     if "Fecha de Invite" in df_base.columns:
@@ -78,6 +83,21 @@ def get_base_data():
     return df_base
 
 
+@st.cache_resource
+def get_indice_busqueda(_df, version_datos):
+    # Una vez por versión de los datos (ver datos/carga_datos.py)
+    return IndiceBusqueda(_df)
+
+
+@st.cache_resource
+def get_catalogo_facetas(_df, version_datos):
+    # Opciones y conteos de los filtros de esta página; el Avatar con strip().title()
+    return CatalogoFacetas(_df, [
+        "Fuente de la Lista", "Proceso", "Pais", "Industria",
+        "¿Quién Prospecto?"
+    ], ["Avatar"], "Fecha de Invite")
+
+
 df = get_base_data()
 
 # Manejar el caso de que no se carguen datos
@@ -133,86 +153,75 @@ st.session_state.mensaje_filtros["invite_aceptada"] = "si"
 st.write(
     "**2. Filtros Adicionales (Opcional):** Afina tu selección de prospectos.")
 
+catalogo = get_catalogo_facetas(df, df.attrs.get("version_datos"))
+
 # Contenedor para los filtros opcionales para mantenerlos juntos
 with st.expander("Filtros Opcionales"):
     # Primera fila de 2 columnas
     col1, col2 = st.columns(2)
     with col1:
         # Replicamos la lógica de crear_multiselect pero para esta página y con keys únicas
-        opciones_fuente = ["– Todos –"] + sorted(
-            df["Fuente de la Lista"].dropna().astype(str).unique().tolist(
-            )) if "Fuente de la Lista" in df.columns and not df[
-                "Fuente de la Lista"].empty else ["– Todos –"]
+        opciones_fuente = ["– Todos –"] + catalogo.opciones("Fuente de la Lista")
         st.session_state.mensaje_filtros["fuente_lista"] = st.multiselect(
             "Fuente de la Lista",
             opciones_fuente,
             default=st.session_state.mensaje_filtros.get(
                 "fuente_lista",
                 ["– Todos –"]),  # Usar .get con default por seguridad
-            key="mensaje_filtro_fuente_lista"  # Clave única para este widget
+            key="mensaje_filtro_fuente_lista",  # Clave única para este widget
+            format_func=catalogo.formato("Fuente de la Lista")
         )
 
-        opciones_proceso = ["– Todos –"] + sorted(
-            df["Proceso"].dropna().astype(str).unique().tolist(
-            )) if "Proceso" in df.columns and not df["Proceso"].empty else [
-                "– Todos –"
-            ]
+        opciones_proceso = ["– Todos –"] + catalogo.opciones("Proceso")
         st.session_state.mensaje_filtros["proceso"] = st.multiselect(
             "Proceso",
             opciones_proceso,
             default=st.session_state.mensaje_filtros.get(
                 "proceso", ["– Todos –"]),
-            key="mensaje_filtro_proceso"  # Clave única
+            key="mensaje_filtro_proceso",  # Clave única
+            format_func=catalogo.formato("Proceso")
         )
 
-        opciones_avatar = ["– Todos –"] + sorted(df["Avatar"].dropna().astype(
-            str).str.strip().str.title().unique().tolist(
-            )) if "Avatar" in df.columns and not df["Avatar"].empty else [
-                "– Todos –"
-            ]
+        opciones_avatar = ["– Todos –"] + catalogo.opciones("Avatar")
         st.session_state.mensaje_filtros["avatar"] = st.multiselect(
             "Avatar",
             opciones_avatar,
             default=st.session_state.mensaje_filtros.get(
                 "avatar", ["– Todos –"]),
-            key="mensaje_filtro_avatar"  # Clave única
+            key="mensaje_filtro_avatar",  # Clave única
+            format_func=catalogo.formato("Avatar")
         )
 
     with col2:
-        opciones_pais = ["– Todos –"] + sorted(
-            df["Pais"].dropna().astype(str).unique().tolist()
-        ) if "Pais" in df.columns and not df["Pais"].empty else ["– Todos –"]
+        opciones_pais = ["– Todos –"] + catalogo.opciones("Pais")
         st.session_state.mensaje_filtros["pais"] = st.multiselect(
             "País",
             opciones_pais,
             default=st.session_state.mensaje_filtros.get(
                 "pais", ["– Todos –"]),
-            key="mensaje_filtro_pais"  # Clave única
+            key="mensaje_filtro_pais",  # Clave única
+            format_func=catalogo.formato("Pais")
         )
 
-        opciones_industria = ["– Todos –"] + sorted(
-            df["Industria"].dropna().astype(str).unique().tolist()
-        ) if "Industria" in df.columns and not df["Industria"].empty else [
-            "– Todos –"
-        ]
+        opciones_industria = ["– Todos –"] + catalogo.opciones("Industria")
         st.session_state.mensaje_filtros["industria"] = st.multiselect(
             "Industria",
             opciones_industria,
             default=st.session_state.mensaje_filtros.get(
                 "industria", ["– Todos –"]),
-            key="mensaje_filtro_industria"  # Clave única
+            key="mensaje_filtro_industria",  # Clave única
+            format_func=catalogo.formato("Industria")
         )
 
-        opciones_prospectador = ["– Todos –"] + sorted(
-            df["¿Quién Prospecto?"].dropna().astype(str).unique().tolist(
-            )) if "¿Quién Prospecto?" in df.columns and not df[
-                "¿Quién Prospecto?"].empty else ["– Todos –"]
+        opciones_prospectador = ["– Todos –"] + catalogo.opciones(
+            "¿Quién Prospecto?")
         st.session_state.mensaje_filtros["prospectador"] = st.multiselect(
             "¿Quién Prospectó?",
             opciones_prospectador,
             default=st.session_state.mensaje_filtros.get(
                 "prospectador", ["– Todos –"]),
-            key="mensaje_filtro_prospectador"  # Clave única
+            key="mensaje_filtro_prospectador",  # Clave única
+            format_func=catalogo.formato("¿Quién Prospecto?")
         )
 
     # --- Usamos un st.container para forzar que la siguiente sección vaya debajo ---
@@ -221,14 +230,7 @@ with st.expander("Filtros Opcionales"):
         st.markdown("---")  # Separador visual
 
         # Obtener el rango de fechas de los datos para restringir la selección en el date_input
-        fecha_min_data = None
-        fecha_max_data = None
-        if "Fecha de Invite" in df.columns and pd.api.types.is_datetime64_any_dtype(
-                df["Fecha de Invite"]):
-            valid_dates = df["Fecha de Invite"].dropna()
-            if not valid_dates.empty:
-                fecha_min_data = valid_dates.min().date()
-                fecha_max_data = valid_dates.max().date()
+        fecha_min_data, fecha_max_data = catalogo.rango_fechas
 
         # Usamos 3 columnas para Sesión Agendada, Fecha Desde, Fecha Hasta
         col_sesion, col_f1, col_f2 = st.columns(3)
@@ -294,13 +296,11 @@ if st.session_state.mostrar_tabla_mensajes:
     df_mensajes_filtrado = df.copy()  # Partimos del dataframe base
 
     # --- Aplicar Filtro Obligatorio "Invite Aceptada" = "Si" ---
-    if "¿Invite Aceptada?" in df_mensajes_filtrado.columns:
+    if "invite_estado" in df_mensajes_filtrado.columns:
         df_mensajes_filtrado = df_mensajes_filtrado[
-            df_mensajes_filtrado["¿Invite Aceptada?"].apply(
-                lambda x: limpiar_valor_kpi(
-                    x) == st.session_state.mensaje_filtros["invite_aceptada"]
-            )  # Usamos el valor estandarizado 'si'
-        ]
+            df_mensajes_filtrado["invite_estado"] ==
+            st.session_state.mensaje_filtros["invite_aceptada"]
+        ]  # invite_estado ya está normalizado; comparamos con el valor estandarizado 'si'
     else:
         st.warning(
             "La columna '¿Invite Aceptada?' no se encontró. No se pueden filtrar prospectos que aceptaron la invite."
@@ -350,32 +350,14 @@ if st.session_state.mostrar_tabla_mensajes:
         busqueda_term = st.session_state.mensaje_filtros.get(
             "busqueda", "").lower().strip()
         if busqueda_term and not df_mensajes_filtrado.empty:
-            mask = pd.Series([False] * len(df_mensajes_filtrado),
-                             index=df_mensajes_filtrado.index)
-            columnas_busqueda = ["Empresa", "Puesto"]
-            for col in columnas_busqueda:
-                if col in df_mensajes_filtrado.columns:
-                    mask |= df_mensajes_filtrado[col].astype(
-                        str).str.lower().str.contains(busqueda_term, na=False)
-
-            # Manejo específico para Nombre y Apellido combinados o separados
-            if "Nombre" in df_mensajes_filtrado.columns and "Apellido" in df_mensajes_filtrado.columns:
-                # Crear una columna temporal con el nombre completo en minúsculas
-                nombre_completo = (
-                    df_mensajes_filtrado["Nombre"].fillna('') + ' ' +
-                    df_mensajes_filtrado["Apellido"].fillna('')).str.lower()
-                mask |= nombre_completo.str.contains(
-                    busqueda_term, na=False)  # Corregido: usar 'busqueda_term'
-            else:  # Si no existen ambas, buscamos en las que sí existan
-                if "Nombre" in df_mensajes_filtrado.columns:
-                    mask |= df_mensajes_filtrado["Nombre"].astype(
-                        str).str.lower().str.contains(busqueda_term, na=False)
-                if "Apellido" in df_mensajes_filtrado.columns:
-                    mask |= df_mensajes_filtrado["Apellido"].astype(
-                        str).str.lower().str.contains(busqueda_term, na=False)
-
-            # Aplicar la máscara para obtener el DataFrame resultante de la búsqueda
-            df_mensajes_filtrado = df_mensajes_filtrado[mask]
+            # Índice de texto compartido con el dashboard (Nombre completo, Empresa,
+            # Puesto), construido una vez sobre df; cruzamos por etiqueta de fila
+            indice_busqueda = get_indice_busqueda(df,
+                                                  df.attrs.get("version_datos"))
+            posiciones_busqueda = indice_busqueda.buscar(busqueda_term)
+            df_mensajes_filtrado = df_mensajes_filtrado[
+                df_mensajes_filtrado.index.isin(
+                    indice_busqueda.etiquetas(posiciones_busqueda))]
 
     # --- Preparar DataFrame Final para la Tabla y Generador ---
     df_mensajes_final = df_mensajes_filtrado.copy()
@@ -405,9 +387,9 @@ if st.session_state.mostrar_tabla_mensajes:
         # Eliminamos cualquier limpieza adicional. La columna se muestra tal cual viene de la carga base.
         # La responsabilidad de cómo se muestra recae completamente en st.dataframe y el tipo de dato cargado.
 
-        # Categorizar por Proceso (usando la función de tu proyecto)
-        df_mensajes_final["Categoría"] = df_mensajes_final["Proceso"].apply(
-            clasificar_por_proceso)
+        # Categorizar por Proceso (una clasificación por proceso distinto, ver REGLAS_CATEGORIA)
+        df_mensajes_final["Categoría"] = clasificar_procesos(
+            df_mensajes_final["Proceso"])
 
         # Estandarizar Avatar (usando la función de tu proyecto)
         if "Avatar" in df_mensajes_final.columns:  # Asegurarse de que la columna exista
@@ -423,11 +405,11 @@ if st.session_state.mostrar_tabla_mensajes:
         apellido_col = "Apellido" if "Apellido" in df_mensajes_final.columns else None
 
         if nombre_col or apellido_col:
-            df_mensajes_final["Nombre_Completo"] = df_mensajes_final.apply(
-                lambda row: limpiar_nombre_completo(row.get(
-                    nombre_col, ""), row.get(apellido_col, "")).title()
-                if nombre_col or apellido_col else "Desconocido",
-                axis=1)
+            # Por columnas; la que falte cuenta como texto vacío
+            vacio = pd.Series("", index=df_mensajes_final.index)
+            df_mensajes_final["Nombre_Completo"] = limpiar_nombre_completo_serie(
+                df_mensajes_final[nombre_col] if nombre_col else vacio,
+                df_mensajes_final[apellido_col] if apellido_col else vacio).str.title()
         else:
             df_mensajes_final["Nombre_Completo"] = "Desconocido"
 
@@ -465,26 +447,8 @@ if st.session_state.mostrar_tabla_mensajes:
             "Selecciona una categoría y plantilla para generar mensajes personalizados."
         )
 
-        # Definir opciones de mensajes (reutilizando mensajes.py)
-        opciones = {
-            "H2R": {
-                "Mensaje 1 H2R": mensaje_1_h2r,
-                "Mensaje 2 H2R": mensaje_2_h2r,
-                "Mensaje 3 H2R": mensaje_3_h2r
-            },
-            "P2P": {
-                "Mensaje 1 P2P": mensaje_1_p2p,
-                "Mensaje 2 P2P": mensaje_2_p2p
-            },
-            "O2C": {
-                "Mensaje 1 O2C": mensaje_1_o2c,
-                "Mensaje 2 O2C": mensaje_2_o2c
-            },
-            "General": {
-                "Mensaje 1 General": mensaje_1_general,
-                "Mensaje 2 General": mensaje_2_general
-            },
-        }
+        # Definir opciones de mensajes (plantillas de mensajes.py por categoría)
+        opciones = PLANTILLAS_POR_CATEGORIA
 
         # Obtener categorías disponibles en el DataFrame filtrado final
         categorias_disponibles = sorted(
@@ -531,20 +495,17 @@ if st.session_state.mostrar_tabla_mensajes:
                     df_mensajes_final["Categoría"] ==
                     categoria_seleccionada].copy()
 
-                # Generar el mensaje personalizado
+                # Generar el mensaje personalizado: plantilla compilada una vez y
+                # rellenada por columnas con el primer nombre y el avatar de cada fila
                 df_vista_previa[
-                    "Mensaje_Personalizado"] = df_vista_previa.apply(
-                        lambda row: mensaje_seleccionado.replace(
-                            "{nombre}",
-                            str(row.get("Nombre", "")).split()[0] if pd.notna(
-                                row.get("Nombre")) and str(row.get("Nombre")).
-                            strip() else "[Nombre]").replace(
-                                "{avatar}",
-                                str(row.get("Avatar", "John Bermúdez"))
-                                if pd.notna(row.get("Avatar")) and str(
-                                    row.get("Avatar")).strip() else
-                                "John Bermúdez"),
-                        axis=1)
+                    "Mensaje_Personalizado"] = compilar_plantilla(
+                        mensaje_seleccionado).renderizar(
+                            {
+                                "nombre": primer_nombre(
+                                    columna_o_vacia(df_vista_previa, "Nombre")),
+                                "avatar": avatar_mensaje(
+                                    columna_o_vacia(df_vista_previa, "Avatar"))
+                            }, df_vista_previa.index)
 
                 # **Columnas a mostrar en st.dataframe para la vista previa**
                 # Usamos el nombre de la columna ORIGINAL del link
@@ -567,50 +528,59 @@ if st.session_state.mostrar_tabla_mensajes:
                              )
 
                 # Botón de descarga
-                @st.cache_data
-                def convert_df_to_csv(
-                        df_to_convert):  # Cambiado el nombre del argumento
-                    # **Columnas para la descarga**
-                    # Usamos el nombre de la columna ORIGINAL del link
-                    cols_descarga = [
-                        "Nombre_Completo", "Empresa", "Puesto",
-                        "Sesion Agendada?", linkedin_col_name,
-                        "Mensaje_Personalizado"
-                    ]  # <-- Usamos la columna ORIGINAL
-                    # Asegurar que las columnas existan antes de intentar seleccionarlas
-                    cols_existentes_descarga = [
-                        col for col in cols_descarga
-                        if col in df_to_convert.columns
-                    ]
-                    if not cols_existentes_descarga:
-                        st.warning(
-                            "No hay columnas disponibles para descargar.")
-                        return None  # Retorna None si no hay columnas válidas
-
-                    # Asegurarse de que los valores pd.NA o None no se conviertan a la cadena "NA" en el CSV
-                    # Usamos fillna('') para reemplazar NaNs/Nones/pd.NA con string vacío en el CSV
-                    df_for_csv = df_to_convert[
-                        cols_existentes_descarga].fillna('')
-
-                    return df_for_csv.to_csv(index=False).encode('utf-8')
-
-                csv_mensajes = convert_df_to_csv(
-                    df_vista_previa
-                )  # Usamos el DF de vista previa para descargar
-
-                if csv_mensajes is not None:
-                    st.download_button(
-                        label="⬇️ Descargar Mensajes Generados (CSV)",
-                        data=csv_mensajes,
-                        file_name=
-                        f'mensajes_{categoria_seleccionada.replace(" ", "_").lower()}_{nombre_plantilla_seleccionada.replace(" ", "_").lower()}.csv',
-                        mime='text/csv',
-                    )
+                # **Columnas para la descarga**
+                # Usamos el nombre de la columna ORIGINAL del link
+                cols_descarga = [
+                    "Nombre_Completo", "Empresa", "Puesto",
+                    "Sesion Agendada?", linkedin_col_name,
+                    "Mensaje_Personalizado"
+                ]  # <-- Usamos la columna ORIGINAL
+                # Asegurar que las columnas existan antes de intentar seleccionarlas
+                cols_existentes_descarga = [
+                    col for col in cols_descarga
+                    if col in df_vista_previa.columns
+                ]
+                if not cols_existentes_descarga:
+                    st.warning("No hay columnas disponibles para descargar.")
+                else:
+                    # El CSV solo se genera al pulsar "Preparar"; fillna('') evita que
+                    # pd.NA o None se escriban como la cadena "NA"
+                    mostrar_boton_exportacion(
+                        lambda: df_vista_previa[cols_existentes_descarga].
+                        fillna(''),
+                        f'mensajes_{categoria_seleccionada.replace(" ", "_").lower()}_{nombre_plantilla_seleccionada.replace(" ", "_").lower()}',
+                        "mensaje_descarga",
+                        formatos=("csv", ),
+                        etiqueta="Descargar Mensajes Generados",
+                        filas=len(df_vista_previa))
             else:
                 st.info(
                     "Selecciona una categoría y plantilla para generar la vista previa."
                 )
 
+            # --- GENERACIÓN EN LOTE ---
+            st.markdown("### 📦 Generación en Lote (todas las categorías)")
+            st.write(
+                "Genera en un solo archivo el mensaje de cada prospecto con la plantilla de su categoría, repartiendo las variantes de cada categoría."
+            )
+            modo_lote = st.radio("Reparto de variantes",
+                                 list(MODOS_ASIGNACION),
+                                 format_func=MODOS_ASIGNACION.get,
+                                 key="mensaje_lote_modo")
+
+            # En cada rerun solo se cuenta el reparto; los mensajes se renderizan (en
+            # una sola pasada, ver mensajes/generacion_lote.py) al pulsar "Preparar"
+            resumen = resumen_lote(df_mensajes_final, modo_lote)
+            st.dataframe(resumen, hide_index=True)
+            mostrar_boton_exportacion(lambda: tabla_exportacion(
+                                          generar_lote(df_mensajes_final, modo_lote)),
+                                      f"mensajes_lote_{modo_lote}",
+                                      "mensaje_lote",
+                                      formatos=FORMATOS_LOTE,
+                                      hoja="Mensajes",
+                                      etiqueta="Descargar Lote Completo",
+                                      filas=int(resumen["Mensajes"].sum()))
+
 # --- PIE DE PÁGINA ---
 st.markdown("---")
 st.info(
@@ -2,6 +2,7 @@
 
 import streamlit as st
 import pandas as pd
+import numpy as np
 import sys
 import os
 
@@ -11,9 +12,16 @@ if project_root not in sys.path:
     sys.path.insert(0, project_root)
 
 # --- IMPORTS MODULARES ---
-from datos.carga_datos import cargar_y_limpiar_datos, cargar_y_procesar_datos
+from datos.carga_datos import cargar_y_limpiar_datos, cargar_y_procesar_datos, precargar_fuentes
+from datos.cubo_prospectos import CuboProspectos
+from datos.clientes_gspread import metricas_clientes
 from filtros.filtros_sidebar import mostrar_filtros_sidebar
-from filtros.aplicar_filtros import aplicar_filtros
+from filtros.aplicar_filtros import tomar_filas
+from filtros.indice_filtros import IndiceFiltros
+from filtros.cache_filtros import filtrar_con_cache
+from filtros.facetas_cruzadas import MotorFacetas
+from filtros.catalogo_facetas import (CatalogoFacetas, FACETAS_PROSPECTOS,
+                                     FACETAS_PROSPECTOS_NORMALIZADAS)
 from componentes.tabla_prospectos import mostrar_tabla_filtrada
 from componentes.indicadores_kpis import mostrar_kpis
 from componentes.embudo_conversion import mostrar_embudo
@@ -23,12 +31,20 @@ from componentes.analisis_procesos import mostrar_analisis_procesos_con_prospect
 from componentes.analisis_avatars import mostrar_analisis_por_avatar
 from componentes.oportunidades_calientes import mostrar_oportunidades_calientes
 
-from utils.limpieza import limpiar_valor_kpi
+from utils.memoria import reporte_memoria, tamano_df_mb
+from utils.indice_busqueda import IndiceBusqueda
+from utils.agregaciones import KernelAgregacion, VistaAgregada
+
+# Copy-on-write (activado en datos/carga_datos.py para todas las páginas): los
+# subconjuntos y selecciones de columnas comparten memoria con df_global hasta que
+# alguien los modifica, así que no hace falta copiar entre etapas
 
 # --- CONFIGURACIÓN GENERAL ---
 st.set_page_config(page_title="Dashboard Prospección Lead Generation",
                    layout="wide")
 st.title("📈 Dashboard — Lead Generation")  # Texto original del título
+# Lectura concurrente de todas las hojas en segundo plano (ver datos/precarga.py)
+precargar_fuentes()
 
 # --- INYECTAR CSS PARA AJUSTAR ANCHO DEL SIDEBAR ---
 st.markdown(
@@ -73,16 +89,67 @@ Explora métricas clave y gestiona tus leads.
 
 
 # --- CARGA Y FILTRADO BASE ---
-@st.cache_data
-def get_processed_data():
-    df_base_loaded = cargar_y_limpiar_datos()
+# cache_resource devuelve siempre el mismo objeto (cache_data lo deserializa, es
+# decir, lo copia, en cada rerun). df_global es de solo lectura: nadie lo modifica.
+@st.cache_resource
+def get_processed_data(_forzar_recarga=False):
+    # _forzar_recarga no forma parte de la clave: la recarga sustituye a la entrada cacheada
+    df_base_loaded = cargar_y_limpiar_datos(forzar_recarga=_forzar_recarga)
     if df_base_loaded is None or df_base_loaded.empty:
         return pd.DataFrame()
-    df_processed_loaded = cargar_y_procesar_datos(df_base_loaded.copy())
+    df_processed_loaded = cargar_y_procesar_datos(df_base_loaded)
     return df_processed_loaded
 
 
-df_global = get_processed_data()
+@st.cache_resource
+def get_indice_filtros(_df, version_datos):
+    # Se construye una vez por versión de los datos y se comparte entre reruns
+    return IndiceFiltros(_df)
+
+
+@st.cache_resource
+def get_indice_busqueda(_df, version_datos):
+    return IndiceBusqueda(_df)
+
+
+@st.cache_resource
+def get_catalogo_facetas(_df, version_datos):
+    # Opciones, conteos y rango de fechas de la sidebar, una vez por versión de los datos
+    return CatalogoFacetas(_df, FACETAS_PROSPECTOS,
+                           FACETAS_PROSPECTOS_NORMALIZADAS, "Fecha de Invite")
+
+
+@st.cache_resource
+def get_motor_facetas(_cubo, version_datos):
+    # Códigos de las facetas sobre las celdas del cubo; cada sesión lleva sus conteos
+    return MotorFacetas(_cubo)
+
+
+@st.cache_resource
+def get_kernel_agregacion(_df, version_datos):
+    return KernelAgregacion(_df)
+
+
+@st.cache_resource
+def get_cubo_prospectos(_df, version_datos):
+    # Cubo preagregado por las dimensiones de filtro (ver datos/cubo_prospectos.py)
+    return CuboProspectos(_df)
+
+
+@st.cache_resource
+def get_tamano_global_mb(_df, version_datos):
+    # memory_usage(deep=True) recorre todos los strings: una vez por versión de datos
+    return tamano_df_mb(_df, profundo=True)
+
+
+# Los cambios en filas ya leídas llegan con la siguiente lectura completa (ver
+# datos/snapshot_prospectos.py); este botón la fuerza en el momento
+if st.sidebar.button("🔄 Recargar hoja completa", key="recargar_hoja_completa",
+                     help="Vuelve a leer todas las filas de la hoja de prospectos."):
+    get_processed_data.clear()
+    df_global = get_processed_data(_forzar_recarga=True)
+else:
+    df_global = get_processed_data()
 
 if df_global.empty:
     st.error(
@@ -91,88 +158,71 @@ if df_global.empty:
     st.stop()
 
 # --- CÁLCULO DE MÉTRICAS BASE (ANTES DE FILTROS DE SIDEBAR) ---
-total_base = len(df_global)
-base_inv_acept = 0
-if "¿Invite Aceptada?" in df_global.columns:
-    base_inv_acept = sum(
-        limpiar_valor_kpi(x) == "si" for x in df_global["¿Invite Aceptada?"])
-
-base_primeros_mensajes_enviados_count = 0
-if "Fecha Primer Mensaje" in df_global.columns:
-    base_primeros_mensajes_enviados_count = sum(
-        pd.notna(x) and str(x).strip().lower() not in ["no", "", "nan"]
-        for x in df_global["Fecha Primer Mensaje"])
-
-base_resp_primer = 0
-if "Respuesta Primer Mensaje" in df_global.columns:
-    base_resp_primer = sum(
-        limpiar_valor_kpi(x) not in ["no", "", "nan"]
-        for x in df_global["Respuesta Primer Mensaje"])
-
-base_sesiones = 0
-if "Sesion Agendada?" in df_global.columns:
-    base_sesiones = sum(
-        limpiar_valor_kpi(x) == "si" for x in df_global["Sesion Agendada?"])
-
+cubo_prospectos = get_cubo_prospectos(df_global,
+                                      df_global.attrs.get("version_datos"))
+kpis_base = cubo_prospectos.kpis()
 base_kpis_counts = {
-    "total_base": total_base,
-    "inv_acept": base_inv_acept,
-    "primeros_mensajes_enviados_count": base_primeros_mensajes_enviados_count,
-    "resp_primer": base_resp_primer,
-    "sesiones": base_sesiones
+    "total_base": kpis_base["total"],
+    "inv_acept": kpis_base["inv_acept"],
+    "primeros_mensajes_enviados_count":
+    kpis_base["primeros_mensajes_enviados_count"],
+    "resp_primer": kpis_base["resp_primer"],
+    "sesiones": kpis_base["sesiones"]
 }
 
 # --- FILTROS SIDEBAR ---
 (filtro_fuente_lista, filtro_proceso, filtro_pais, filtro_industria,
  filtro_avatar, filtro_prospectador, filtro_invite_aceptada_simple,
  filtro_sesion_agendada, fecha_ini, fecha_fin,
- busqueda_texto) = mostrar_filtros_sidebar(df_global.copy())
+ busqueda_texto) = mostrar_filtros_sidebar(
+     df_global,
+     get_catalogo_facetas(df_global, df_global.attrs.get("version_datos")),
+     get_motor_facetas(cubo_prospectos, df_global.attrs.get("version_datos")))
 
 # --- APLICACIÓN DE FILTROS (de la barra lateral) ---
-df_filtrado_sidebar = aplicar_filtros(
-    df_global.copy(), filtro_fuente_lista, filtro_proceso, filtro_pais,
-    filtro_industria, filtro_avatar, filtro_prospectador,
-    filtro_invite_aceptada_simple, filtro_sesion_agendada, fecha_ini,
-    fecha_fin)
+# Las posiciones filtradas y sus KPIs se cachean por selección de filtros y versión
+# de datos: la búsqueda de texto o la paginación no vuelven a filtrar
+indice_filtros = get_indice_filtros(df_global,
+                                    df_global.attrs.get("version_datos"))
+filtros_sidebar = (filtro_fuente_lista, filtro_proceso, filtro_pais,
+                   filtro_industria, filtro_avatar, filtro_prospectador,
+                   filtro_invite_aceptada_simple, filtro_sesion_agendada,
+                   fecha_ini, fecha_fin)
+posiciones_filtradas, kpis_filtrados, posiciones_cubo = filtrar_con_cache(
+    df_global, indice_filtros, filtros_sidebar, cubo=cubo_prospectos)
+df_filtrado_sidebar = tomar_filas(df_global, posiciones_filtradas)
+
+# Agregados por dimensión: cada sección pide los suyos y se calculan una sola vez por
+# rerun (Industria la usan dimensiones y resumen ejecutivo). Salen de las celdas
+# filtradas del cubo; Puesto no está en el cubo y se agrega sobre las filas filtradas.
+agregados = VistaAgregada(cubo_prospectos.kernel, posiciones_cubo)
+agregados_filas = VistaAgregada(
+    get_kernel_agregacion(df_global, df_global.attrs.get("version_datos")),
+    posiciones_filtradas)
 
 # --- DataFrame para KPIs y Análisis (df_kpis) ---
-df_kpis = df_filtrado_sidebar.copy()
+# Sin copias: los componentes solo leen (y con copy-on-write cualquier escritura
+# en un componente no se propagaría a los demás)
+df_kpis = df_filtrado_sidebar
 
 # --- DataFrame para la Tabla Detallada (df_tabla_detalle) ---
-df_tabla_detalle = df_filtrado_sidebar.copy()
-if busqueda_texto:
-    busq_term = busqueda_texto.lower().strip()
-    if busq_term:
-        mask = pd.Series([False] * len(df_tabla_detalle),
-                         index=df_tabla_detalle.index)
-        columnas_busqueda_texto_config = ["Empresa", "Puesto"]
-
-        nombre_col_presente = "Nombre" in df_tabla_detalle.columns
-        apellido_col_presente = "Apellido" in df_tabla_detalle.columns
-
-        if nombre_col_presente and apellido_col_presente:
-            df_tabla_detalle["_NombreCompleto_temp_search"] = (
-                df_tabla_detalle["Nombre"].fillna('').astype(str) + ' ' +
-                df_tabla_detalle["Apellido"].fillna('').astype(str)
-            ).str.lower()
-            mask |= df_tabla_detalle[
-                "_NombreCompleto_temp_search"].str.contains(busq_term,
-                                                            na=False)
-            df_tabla_detalle.drop(columns=["_NombreCompleto_temp_search"],
-                                  inplace=True)
-        elif nombre_col_presente:
-            mask |= df_tabla_detalle["Nombre"].astype(
-                str).str.lower().str.contains(busq_term, na=False)
-        elif apellido_col_presente:
-            mask |= df_tabla_detalle["Apellido"].astype(
-                str).str.lower().str.contains(busq_term, na=False)
-
-        for col in columnas_busqueda_texto_config:
-            if col in df_tabla_detalle.columns:
-                mask |= df_tabla_detalle[col].astype(
-                    str).str.lower().str.contains(busq_term, na=False)
-
-        df_tabla_detalle = df_tabla_detalle[mask]
+df_tabla_detalle = df_filtrado_sidebar
+empresas_sugeridas = []
+if busqueda_texto and busqueda_texto.strip():
+    # Índice de texto precalculado (Nombre completo, Empresa, Puesto) sobre df_global;
+    # se cruza con las filas que pasaron los filtros de la sidebar
+    indice_busqueda = get_indice_busqueda(df_global,
+                                          df_global.attrs.get("version_datos"))
+    posiciones_busqueda = indice_busqueda.buscar(busqueda_texto)
+    if len(posiciones_busqueda) == 0:
+        # Sin coincidencias exactas: probamos con empresas de nombre parecido
+        empresas_sugeridas, posiciones_busqueda = indice_busqueda.empresas_similares(
+            busqueda_texto)
+    df_tabla_detalle = tomar_filas(
+        df_global,
+        np.intersect1d(posiciones_filtradas,
+                       posiciones_busqueda,
+                       assume_unique=True))
 
 # --- ORDEN DE LOS COMPONENTES EN EL DASHBOARD ---
 
@@ -181,12 +231,15 @@ mostrar_oportunidades_calientes(df_kpis)
 
 st.header("🔍 Detalle y Rendimiento General")  # Título de sección enfocado
 # 2. TABLA DE PROSPECTOS (Resultado de filtros sidebar + búsqueda de texto)
+if empresas_sugeridas:
+    st.caption("Sin coincidencias exactas para la búsqueda; mostrando empresas parecidas: "
+               + ", ".join(map(str, empresas_sugeridas)))
 mostrar_tabla_filtrada(df_tabla_detalle)
 
 # 3. INDICADORES CLAVE DE RENDIMIENTO (KPIs)
 (filtered_total, filtered_primeros_mensajes_enviados_count, filtered_inv_acept,
  filtered_resp_primer, filtered_sesiones,
- _) = mostrar_kpis(df_kpis, base_kpis_counts, limpiar_valor_kpi)
+ _) = mostrar_kpis(df_kpis, base_kpis_counts, kpis=kpis_filtrados)
 
 # 4. EMBUDO DE CONVERSIÓN
 mostrar_embudo(filtered_total, filtered_inv_acept, filtered_resp_primer,
@@ -205,7 +258,8 @@ if "Industria" in df_kpis.columns:
         "Industria",
         "Industrias",
         top_n_grafico=10,
-        mostrar_tabla_completa=False)
+        mostrar_tabla_completa=False,
+        agregados=agregados)
 else:
     st.caption("Columna 'Industria' no encontrada para análisis.")
 
@@ -216,7 +270,8 @@ if "Pais" in df_kpis.columns:
         "Pais",
         "Países",
         top_n_grafico=10,
-        mostrar_tabla_completa=True)
+        mostrar_tabla_completa=True,
+        agregados=agregados)
 else:
     st.caption("Columna 'Pais' no encontrada para análisis.")
 
@@ -227,7 +282,8 @@ if "Puesto" in df_kpis.columns:
         "Puesto",
         "Puestos",
         top_n_grafico=10,
-        mostrar_tabla_completa=False)
+        mostrar_tabla_completa=False,
+        agregados=agregados_filas)
 else:
     st.caption("Columna 'Puesto' no encontrada para análisis.")
 
@@ -235,16 +291,50 @@ else:
 if "Proceso" in df_kpis.columns:
     mostrar_analisis_procesos_con_prospectador(df_kpis,
                                                top_n_grafico_proceso=10,
-                                               mostrar_tabla_proceso=True)
+                                               mostrar_tabla_proceso=True,
+                                               agregados=agregados)
 else:
     st.caption("Columna 'Proceso' no encontrada para análisis de procesos.")
 
 # 7. ANÁLISIS DE RENDIMIENTO POR AVATAR (Enfoque Agendamiento)
-mostrar_analisis_por_avatar(df_kpis)
+mostrar_analisis_por_avatar(df_kpis, agregados=agregados)
 
 # 8. RESUMEN EJECUTIVO
-mostrar_resumen_ejecutivo(df_kpis, limpiar_valor_kpi, base_kpis_counts,
-                          filtered_sesiones)
+mostrar_resumen_ejecutivo(df_kpis, base_kpis_counts, filtered_sesiones,
+                          kpis_filtered=kpis_filtrados, agregados=agregados)
+
+# --- REPORTE DE MEMORIA (por rerun) ---
+memoria = reporte_memoria(
+    {
+        "df_filtrado_sidebar": df_filtrado_sidebar,
+        "df_tabla_detalle": df_tabla_detalle
+    },
+    rss_previo=st.session_state.get("rss_previo_mb"))
+st.session_state["rss_previo_mb"] = memoria["rss_mb"]
+with st.sidebar.expander("🧠 Memoria"):
+    if memoria["rss_mb"] is not None:
+        st.caption(f"RSS actual: {memoria['rss_mb']:.1f} MB")
+    if memoria["rss_pico_mb"] is not None:
+        st.caption(f"RSS pico: {memoria['rss_pico_mb']:.1f} MB")
+    if memoria["delta_mb"] is not None:
+        st.caption(f"Variación vs rerun anterior: {memoria['delta_mb']:+.1f} MB")
+    st.caption(f"df_global: {get_tamano_global_mb(df_global, df_global.attrs.get('version_datos')):.1f} MB")
+    for nombre, tamano in memoria["dataframes_mb"].items():
+        # Columnas de texto sin contar los strings, que se comparten con df_global
+        st.caption(f"{nombre}: {tamano:.1f} MB")
+    if memoria["excede_presupuesto"]:
+        st.warning("⚠️ El uso de memoria supera el presupuesto configurado (PRESUPUESTO_MEMORIA_MB).")
+
+# --- CLIENTES DE GOOGLE SHEETS (solo si alguna fuente es una hoja) ---
+metricas_gspread = metricas_clientes()
+if metricas_gspread["autorizaciones"]:
+    with st.sidebar.expander("🔑 Conexión Google Sheets"):
+        st.caption(f"Autorizaciones: {metricas_gspread['autorizaciones']} "
+                   f"(media {metricas_gspread['latencia_media_autorizacion']:.2f} s)")
+        st.caption(f"Reutilizaciones: {metricas_gspread['reutilizaciones']} "
+                   f"({metricas_gspread['tasa_reutilizacion']:.0%} de las peticiones)")
+        st.caption(f"Renovaciones de token: {metricas_gspread['renovaciones']} "
+                   f"(media {metricas_gspread['latencia_media_renovacion']:.2f} s)")
 
 # --- PIE DE PÁGINA ---
 st.markdown("---")
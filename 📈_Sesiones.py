@@ -1,12 +1,10 @@
 import streamlit as st
 import pandas as pd
 import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import datetime
 import plotly.express as px
 import os
 import sys
-import io
 
 # --- Configuración Inicial del Proyecto y Título de la Página ---
 try:
@@ -19,16 +17,29 @@ except NameError:
     if project_root not in sys.path:
         sys.path.insert(0, project_root)
 
+from datos.fuentes_datos import obtener_fuente, FUENTES
+from datos.carga_datos import precargar_fuentes
+from datos.precarga import obtener_precargado
+from utils.parseo import parsear_fechas
+from utils.rollups_tiempo import rollup_diario, agregar_periodo
+from utils.pivotes_sesiones import PivotesSesiones
+from datos.esquemas import aplicar_esquema, SQL_ORDER_OF_IMPORTANCE
+from filtros.catalogo_facetas import CatalogoFacetas
+from componentes.boton_exportacion import mostrar_boton_exportacion
+
 st.set_page_config(layout="wide", page_title="Análisis de Sesiones y SQL")
+# Lectura concurrente de todas las hojas en segundo plano (ver datos/precarga.py)
+precargar_fuentes()
 st.title("📊 Análisis de Sesiones y Calificaciones SQL")
 st.markdown(
     "Métricas por LG, AE, País, Calificación SQL (SQL1 > SQL2 > MQL > NA > Sin Calificación), Puesto y Empresa."
 )
 
 # --- Constantes ---
-CREDS_PATH = "credenciales.json"
-SHEET_URL_SESIONES = "https://docs.google.com/spreadsheets/d/1Cejc7xfxd62qqsbzBOMRSI9HiJjHe_JSFnjf3lrXai4/edit?gid=1354854902#gid=1354854902"
-SHEET_NAME_SESIONES = "Sesiones 2024-2025"
+# La URL y la pestaña de la hoja están en datos/fuentes_datos.py (FUENTES["sesiones"])
+SHEET_NAME_SESIONES = FUENTES["sesiones"]["hoja"]
+# Vida de la caché de la hoja; una precarga más antigua se vuelve a leer
+TTL_SESIONES_SEGUNDOS = 300
 
 COLUMNAS_ESPERADAS = [
     "Semana", "Mes", "Fecha", "SQL", "Empresa", "País", "Nombre", "Apellido",
@@ -37,7 +48,14 @@ COLUMNAS_ESPERADAS = [
 COLUMNAS_DERIVADAS = [
     'Año', 'NumSemana', 'MesNombre', 'AñoMes', 'SQL_Estandarizado'
 ]
-SQL_ORDER_OF_IMPORTANCE = ['SQL1', 'SQL2', 'MQL', 'NA', 'SIN CALIFICACIÓN SQL']
+# Dimensiones del análisis por SQL y cuántos valores muestra cada una
+DIMENSIONES_ANALISIS = {
+    "LG": 15,
+    "AE": 15,
+    "País": 10,
+    "Puesto": 10,
+    "Empresa": 10
+}
 
 # --- Gestión de Estado de Sesión para Filtros ---
 FILTER_KEYS_PREFIX = "sesiones_sql_lg_pais_page_v1_"
@@ -65,37 +83,20 @@ for key, value in default_filters_config.items():
 
 
 # --- Funciones de Utilidad ---
-def parse_date_robust(date_val):
-    if pd.isna(date_val) or str(date_val).strip() == "": return None
-    try:
-        return pd.to_datetime(date_val, format='%d/%m/%Y', errors='raise')
-    except ValueError:
-        try:
-            return pd.to_datetime(date_val, errors='raise')
-        except Exception:
-            return None
-    except Exception:
-        return None
-
-
-@st.cache_data(ttl=300)
+@st.cache_data(ttl=TTL_SESIONES_SEGUNDOS)
 def load_sesiones_data():
     try:
-        scope = [
-            "https://spreadsheets.google.com/feeds",
-            "https://www.googleapis.com/auth/drive"
-        ]
-        creds = ServiceAccountCredentials.from_json_keyfile_name(
-            CREDS_PATH, scope)
-        client = gspread.authorize(creds)
-        workbook = client.open_by_url(SHEET_URL_SESIONES)
+        # Google Sheets o copia local según la configuración (ver datos/fuentes_datos.py)
+        fuente = obtener_fuente("sesiones")
         try:
-            sheet = workbook.worksheet(SHEET_NAME_SESIONES)
+            fuente.conectar()
         except gspread.exceptions.WorksheetNotFound:
             st.error(f"Pestaña '{SHEET_NAME_SESIONES}' no encontrada.")
             return pd.DataFrame(columns=COLUMNAS_ESPERADAS +
                                 COLUMNAS_DERIVADAS)
-        raw_data = sheet.get_all_values()
+        # Ya leída si la precarga de arranque terminó (o esperando a que termine)
+        raw_data = obtener_precargado("sesiones", fuente.leer_valores,
+                                      edad_maxima=TTL_SESIONES_SEGUNDOS)
         if not raw_data:
             st.error(f"Pestaña '{SHEET_NAME_SESIONES}' vacía.")
             return pd.DataFrame(columns=COLUMNAS_ESPERADAS +
@@ -110,7 +111,8 @@ def load_sesiones_data():
             st.error("Columna 'Fecha' no encontrada.")
             return pd.DataFrame(columns=COLUMNAS_ESPERADAS +
                                 COLUMNAS_DERIVADAS)
-        df["Fecha"] = df["Fecha"].apply(parse_date_robust)
+        # dd/mm/aaaa en bloque y, para el resto, inferencia de formato (ver utils/parseo.py)
+        df["Fecha"] = parsear_fechas(df["Fecha"], nombre="Sesiones.Fecha")
         df.dropna(subset=["Fecha"], inplace=True)
         if df.empty:
             st.warning("No hay sesiones con fechas válidas.")
@@ -160,9 +162,14 @@ def load_sesiones_data():
                     df_final[col] = pd.Series(dtype='datetime64[ns]')
                 else:
                     df_final[col] = pd.Series(dtype='object')
+        # LG, AE, País y SQL como category; el SQL en SQL_ORDER_OF_IMPORTANCE (ver datos/esquemas.py)
+        aplicar_esquema(df_final, "sesiones")
+        # Huella de los datos para los cachés derivados (se conserva al pasar por cache_data)
+        df_final.attrs["version_datos"] = int(
+            pd.util.hash_pandas_object(df_final, index=True).sum())
         return df_final
-    except FileNotFoundError:
-        st.error(f"Error Crítico: Archivo '{CREDS_PATH}' no encontrado.")
+    except FileNotFoundError as e:
+        st.error(f"Error Crítico: {e}")
         return pd.DataFrame(columns=COLUMNAS_ESPERADAS + COLUMNAS_DERIVADAS)
     except gspread.exceptions.APIError as e:
         st.error(f"Error Crítico API Google: {e}")
@@ -173,19 +180,37 @@ def load_sesiones_data():
         return pd.DataFrame()
 
 
+@st.cache_resource
+def get_rollup_diario_sesiones(_df, version_datos):
+    # Sesiones por día y por cada columna de filtro (ver utils/rollups_tiempo.py)
+    return rollup_diario(_df, ["AE", "LG", "País", "SQL_Estandarizado"])
+
+
+@st.cache_resource
+def get_catalogo_facetas_sesiones(_df, version_datos):
+    # Opciones de la sidebar (fechas, años/semanas, LG, AE, País, SQL) por versión de datos
+    return CatalogoFacetas(_df, ["LG", "AE", "País", "SQL_Estandarizado"],
+                           columna_fecha="Fecha",
+                           columnas_semana=("Año", "NumSemana"))
+
+
+@st.cache_resource
+def get_pivotes_sesiones(_df, version_datos):
+    # Códigos de las dimensiones de análisis, una vez por versión de los datos
+    return PivotesSesiones(_df, list(DIMENSIONES_ANALISIS))
+
+
 def clear_ses_filters_callback():
     for key, value in default_filters_config.items():
         st.session_state[key] = value
     st.toast("Filtros reiniciados ✅", icon="🧹")
 
 
-def sidebar_filters_sesiones(df_options):
+def sidebar_filters_sesiones(catalogo):
+    # catalogo: CatalogoFacetas de los datos cargados (ver filtros/catalogo_facetas.py)
     st.sidebar.header("🔍 Filtros de Sesiones")
     st.sidebar.markdown("---")
-    min_d, max_d = (df_options["Fecha"].min().date(), df_options["Fecha"].max(
-    ).date()) if "Fecha" in df_options and not df_options["Fecha"].dropna(
-    ).empty and pd.api.types.is_datetime64_any_dtype(
-        df_options["Fecha"]) else (None, None)
+    min_d, max_d = catalogo.rango_fechas
     c1, c2 = st.sidebar.columns(2)
     c1.date_input("Desde",
                   value=st.session_state[SES_START_DATE_KEY],
@@ -201,10 +226,7 @@ def sidebar_filters_sesiones(df_options):
                   key=SES_END_DATE_KEY)
 
     st.sidebar.markdown("---")
-    years = ["– Todos –"
-             ] + (sorted(df_options["Año"].dropna().astype(int).unique(),
-                         reverse=True) if "Año" in df_options
-                  and not df_options["Año"].dropna().empty else [])
+    years = ["– Todos –"] + catalogo.anios()
     current_year_val_in_state = st.session_state[SES_YEAR_FILTER_KEY]
     if current_year_val_in_state not in years:
         st.session_state[SES_YEAR_FILTER_KEY] = "– Todos –"
@@ -213,13 +235,8 @@ def sidebar_filters_sesiones(df_options):
         st.session_state[SES_YEAR_FILTER_KEY]
     ) if st.session_state[SES_YEAR_FILTER_KEY] != "– Todos –" else None
 
-    weeks_df = df_options[
-        df_options["Año"] ==
-        sel_y] if sel_y is not None and "Año" in df_options.columns else df_options
-    weeks = ["– Todas –"
-             ] + (sorted(weeks_df["NumSemana"].dropna().astype(int).unique())
-                  if "NumSemana" in weeks_df
-                  and not weeks_df["NumSemana"].dropna().empty else [])
+    # Enteros de Python (no numpy), como espera apply_sesiones_filters
+    weeks = ["– Todas –"] + catalogo.semanas(sel_y)
     current_week_selection_in_state = st.session_state[SES_WEEK_FILTER_KEY]
     validated_week_selection = [
         val for val in current_week_selection_in_state if val in weeks
@@ -236,8 +253,7 @@ def sidebar_filters_sesiones(df_options):
     st.sidebar.markdown("---")
     st.sidebar.subheader("👥 Por Analistas, País y Calificación")
 
-    lgs_options = ["– Todos –"] + (sorted(df_options["LG"].dropna().unique(
-    )) if "LG" in df_options and not df_options["LG"].dropna().empty else [])
+    lgs_options = ["– Todos –"] + catalogo.opciones("LG")
     current_lg_selection_in_state = st.session_state[SES_LG_FILTER_KEY]
     validated_lg_selection = [
         val for val in current_lg_selection_in_state if val in lgs_options
@@ -250,10 +266,12 @@ def sidebar_filters_sesiones(df_options):
             if lgs_options and lgs_options[0] != "– Todos –" else [])
     elif len(validated_lg_selection) != len(current_lg_selection_in_state):
         st.session_state[SES_LG_FILTER_KEY] = validated_lg_selection
-    st.sidebar.multiselect("Analista LG", lgs_options, key=SES_LG_FILTER_KEY)
+    st.sidebar.multiselect("Analista LG",
+                           lgs_options,
+                           key=SES_LG_FILTER_KEY,
+                           format_func=catalogo.formato("LG"))
 
-    ae_options = ["– Todos –"] + (sorted(df_options["AE"].dropna().unique(
-    )) if "AE" in df_options and not df_options["AE"].dropna().empty else [])
+    ae_options = ["– Todos –"] + catalogo.opciones("AE")
     current_ae_selection_in_state = st.session_state[SES_AE_FILTER_KEY]
     validated_ae_selection = [
         val for val in current_ae_selection_in_state if val in ae_options
@@ -268,11 +286,10 @@ def sidebar_filters_sesiones(df_options):
         st.session_state[SES_AE_FILTER_KEY] = validated_ae_selection
     st.sidebar.multiselect("Account Executive (AE)",
                            ae_options,
-                           key=SES_AE_FILTER_KEY)
+                           key=SES_AE_FILTER_KEY,
+                           format_func=catalogo.formato("AE"))
 
-    paises_opts = ["– Todos –"] + (
-        sorted(df_options["País"].dropna().unique()) if "País" in df_options
-        and not df_options["País"].dropna().empty else [])
+    paises_opts = ["– Todos –"] + catalogo.opciones("País")
     current_pais_selection_in_state = st.session_state[SES_PAIS_FILTER_KEY]
     validated_pais_selection = [
         val for val in current_pais_selection_in_state if val in paises_opts
@@ -285,14 +302,15 @@ def sidebar_filters_sesiones(df_options):
             if paises_opts and paises_opts[0] != "– Todos –" else [])
     elif len(validated_pais_selection) != len(current_pais_selection_in_state):
         st.session_state[SES_PAIS_FILTER_KEY] = validated_pais_selection
-    st.sidebar.multiselect("País", paises_opts, key=SES_PAIS_FILTER_KEY)
-
-    sqls_opts = ["– Todos –"] + (
-        sorted(df_options["SQL_Estandarizado"].dropna().unique(),
-               key=lambda x: SQL_ORDER_OF_IMPORTANCE.index(x) if x in
-               SQL_ORDER_OF_IMPORTANCE else len(SQL_ORDER_OF_IMPORTANCE))
-        if "SQL_Estandarizado" in df_options
-        and not df_options["SQL_Estandarizado"].dropna().empty else [])
+    st.sidebar.multiselect("País",
+                           paises_opts,
+                           key=SES_PAIS_FILTER_KEY,
+                           format_func=catalogo.formato("País"))
+
+    sqls_opts = ["– Todos –"] + sorted(
+        catalogo.opciones("SQL_Estandarizado"),
+        key=lambda x: SQL_ORDER_OF_IMPORTANCE.index(x)
+        if x in SQL_ORDER_OF_IMPORTANCE else len(SQL_ORDER_OF_IMPORTANCE))
     current_sql_selection_in_state = st.session_state[SES_SQL_FILTER_KEY]
     validated_sql_selection = [
         val for val in current_sql_selection_in_state if val in sqls_opts
@@ -307,7 +325,8 @@ def sidebar_filters_sesiones(df_options):
         st.session_state[SES_SQL_FILTER_KEY] = validated_sql_selection
     st.sidebar.multiselect("Calificación SQL",
                            sqls_opts,
-                           key=SES_SQL_FILTER_KEY)
+                           key=SES_SQL_FILTER_KEY,
+                           format_func=catalogo.formato("SQL_Estandarizado"))
 
     st.sidebar.markdown("---")
     st.sidebar.button("🧹 Limpiar Todos los Filtros",
@@ -376,8 +395,9 @@ def display_sesiones_summary_sql(df_filtered):
         st.markdown("#### Distribución por Calificación SQL")
         # CORRECCIÓN: Eliminar observed=True de value_counts si da error, o ajustar según versión de Pandas.
         # Para compatibilidad con versiones más antiguas, se elimina.
-        sql_counts = df_filtered['SQL_Estandarizado'].value_counts(
-        ).reset_index()
+        sql_counts = df_filtered['SQL_Estandarizado'].value_counts()
+        # En una columna category value_counts incluye las calificaciones sin sesiones
+        sql_counts = sql_counts[sql_counts > 0].reset_index()
         sql_counts.columns = ['Calificación SQL', 'Número de Sesiones']
 
         category_order = get_sql_category_order(sql_counts['Calificación SQL'])
@@ -402,45 +422,26 @@ def display_sesiones_summary_sql(df_filtered):
         st.warning("Columna 'SQL_Estandarizado' no encontrada.")
 
 
-def display_analisis_por_dimension(df_filtered,
+def display_analisis_por_dimension(pivotes,
                                    dimension_col,
                                    dimension_label,
                                    top_n=10):
+    # pivotes: resultado de PivotesSesiones.calcular para esta dimensión (o None)
     st.markdown(
         f"### 📊 Análisis por {dimension_label} y Calificación SQL (Top {top_n})"
     )
-    if df_filtered.empty or dimension_col not in df_filtered.columns or 'SQL_Estandarizado' not in df_filtered.columns:
+    if pivotes is None:
         st.info(f"Datos insuficientes para análisis por {dimension_label}.")
         return
 
-    sql_category_order = get_sql_category_order(
-        df_filtered['SQL_Estandarizado'])
-
-    summary_dim_sql = df_filtered.groupby(
-        [dimension_col, 'SQL_Estandarizado'], as_index=False,
-        observed=True)['Fecha'].count().rename(
-            columns={'Fecha': 'Cantidad_SQL'})
-
-    dim_totals = df_filtered.groupby(dimension_col,
-                                     as_index=False,
-                                     observed=True)['Fecha'].count().rename(
-                                         columns={'Fecha': 'Total_Sesiones'})
-
-    top_n_dims = dim_totals.sort_values(
-        by='Total_Sesiones',
-        ascending=False).head(top_n)[dimension_col].tolist()
-    summary_dim_sql_top_n = summary_dim_sql[
-        summary_dim_sql[dimension_col].isin(top_n_dims)].copy()
+    sql_category_order = pivotes["orden_sql"]
+    top_n_dims = pivotes["top"]
+    summary_dim_sql_top_n = pivotes["detalle"]
 
     if summary_dim_sql_top_n.empty:
         st.info(f"No hay datos agregados por {dimension_label} y SQL.")
         return
 
-    summary_dim_sql_top_n['SQL_Estandarizado'] = pd.Categorical(
-        summary_dim_sql_top_n['SQL_Estandarizado'],
-        categories=sql_category_order,
-        ordered=True)
-
     if not summary_dim_sql_top_n.empty:
         fig = px.bar(summary_dim_sql_top_n,
                      x=dimension_col,
@@ -457,30 +458,8 @@ def display_analisis_por_dimension(df_filtered,
                           yaxis_title="Número de Sesiones")
         st.plotly_chart(fig, use_container_width=True)
 
-    pivot_table = summary_dim_sql_top_n.pivot_table(
-        index=dimension_col,
-        columns='SQL_Estandarizado',
-        values='Cantidad_SQL',
-        fill_value=0)
-    for sql_cat in sql_category_order:
-        if sql_cat not in pivot_table.columns: pivot_table[sql_cat] = 0
-    pivot_table_cols_ordered = [col for col in sql_category_order if col in pivot_table.columns] + \
-                               [col for col in pivot_table.columns if col not in sql_category_order]
-    pivot_table = pivot_table.reindex(columns=pivot_table_cols_ordered,
-                                      fill_value=0)
-    pivot_table = pivot_table.reindex(index=top_n_dims, fill_value=0)
-    pivot_table['Total_Sesiones_Dim'] = pivot_table.sum(axis=1)
-
-    for col in pivot_table.columns:
-        try:
-            pivot_table[col] = pd.to_numeric(
-                pivot_table[col], errors='coerce').fillna(0).astype(int)
-        except ValueError:
-            st.warning(
-                f"Advertencia: Col '{col}' en pivot_table no pudo ser convertida a entero."
-            )
-            pivot_table[col] = pivot_table[col].astype(str)
-
+    # Ya viene con las filas del top, las columnas en orden SQL y conteos enteros
+    pivot_table = pivotes["pivote"]
     format_dict = {
         col: "{:,.0f}"
         for col in pivot_table.columns
@@ -493,38 +472,24 @@ def display_analisis_por_dimension(df_filtered,
         st.dataframe(pivot_table, use_container_width=True)
 
 
-def display_evolucion_sql(df_filtered, time_agg_col, display_label,
-                          chart_title, x_axis_label):
+def display_evolucion_sql(rollup_filtered, periodo, group_col, chart_title,
+                          x_axis_label):
+    # rollup_filtered: rollup diario de sesiones con los filtros de la página aplicados
     st.markdown(f"### 📈 {chart_title}")
-    if df_filtered.empty or 'SQL_Estandarizado' not in df_filtered.columns:
+    if rollup_filtered is None or rollup_filtered.empty \
+            or 'SQL_Estandarizado' not in rollup_filtered.columns:
         st.info(f"Datos insuficientes.")
         return
-    df_agg = df_filtered.copy()
-    group_col = time_agg_col
-    if time_agg_col == 'NumSemana':
-        if not ('Año' in df_agg.columns and 'NumSemana' in df_agg.columns):
-            st.warning("Faltan Año/NumSemana.")
-            return
-        df_agg.dropna(subset=['Año', 'NumSemana'], inplace=True)
-        if df_agg.empty:
-            st.info("No hay datos para evolución semanal.")
-            return
-        df_agg['Año-Semana'] = df_agg['Año'].astype(int).astype(
-            str) + '-S' + df_agg['NumSemana'].astype(int).astype(
-                str).str.zfill(2)
-        group_col = 'Año-Semana'
-        df_agg = df_agg.sort_values(by=group_col)
-    elif time_agg_col == 'AñoMes':
-        if 'AñoMes' not in df_agg.columns:
-            st.warning("Columna 'AñoMes' faltante.")
-            return
-        df_agg = df_agg.sort_values(by='AñoMes')
-
-    sql_category_order = get_sql_category_order(df_agg['SQL_Estandarizado'])
-    summary_time_sql = df_agg.groupby(
-        [group_col, 'SQL_Estandarizado'], as_index=False,
-        observed=True)['Fecha'].count().rename(
-            columns={'Fecha': 'Número de Sesiones'})
+
+    sql_category_order = get_sql_category_order(
+        rollup_filtered['SQL_Estandarizado'])
+    # Los días se suman por semana o mes con claves enteras; "n" = sesiones del día
+    summary_time_sql = agregar_periodo(
+        rollup_filtered,
+        periodo, ["n"],
+        por=['SQL_Estandarizado'],
+        etiqueta=group_col).drop(columns='clave_periodo').rename(
+            columns={'n': 'Número de Sesiones'})
 
     if summary_time_sql.empty:
         st.info(f"No hay datos agregados por {x_axis_label.lower()} y SQL.")
@@ -568,18 +533,13 @@ def display_tabla_sesiones_detalle(df_filtered):
             df_view["Fecha"]).dt.strftime('%d/%m/%Y')
     st.dataframe(df_view, height=400, use_container_width=True)
     if not df_view.empty:
-        output = io.BytesIO()
-        with pd.ExcelWriter(output, engine='xlsxwriter') as writer:
-            df_view.to_excel(writer,
-                             index=False,
-                             sheet_name='Detalle_Sesiones')
-        st.download_button(
-            label="⬇️ Descargar Detalle (Excel)",
-            data=output.getvalue(),
-            file_name="detalle_sesiones_sql.xlsx",
-            mime=
-            "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
-            key=f"{FILTER_KEYS_PREFIX}btn_download_detalle")
+        # El archivo solo se genera al pulsar "Preparar" (no en cada rerun)
+        mostrar_boton_exportacion(df_view,
+                                  "detalle_sesiones_sql",
+                                  f"{FILTER_KEYS_PREFIX}detalle",
+                                  formatos=("xlsx", "csv"),
+                                  hoja="Detalle_Sesiones",
+                                  etiqueta="Descargar Detalle")
 
 
 # --- Flujo Principal de la Página ---
@@ -589,43 +549,59 @@ if df_sesiones_raw is None or df_sesiones_raw.empty:
     st.stop()
 
 start_f, end_f, year_f, week_f, ae_f, lg_f, pais_f, sql_f_val = sidebar_filters_sesiones(
-    df_sesiones_raw)
+    get_catalogo_facetas_sesiones(df_sesiones_raw,
+                                  df_sesiones_raw.attrs.get("version_datos")))
 df_sesiones_filtered = apply_sesiones_filters(df_sesiones_raw, start_f, end_f,
                                               year_f, week_f, ae_f, lg_f,
                                               pais_f, sql_f_val)
+# Los gráficos de evolución usan el rollup diario con los mismos filtros
+rollup_sesiones = get_rollup_diario_sesiones(
+    df_sesiones_raw, df_sesiones_raw.attrs.get("version_datos"))
+rollup_sesiones_filtered = (apply_sesiones_filters(
+    rollup_sesiones, start_f, end_f, year_f, week_f, ae_f, lg_f, pais_f,
+    sql_f_val) if rollup_sesiones is not None else None)
+# Pivotes por SQL de las cinco dimensiones en una sola pasada sobre las filas filtradas
+pivotes_sesiones = {}
+if not df_sesiones_filtered.empty and 'SQL_Estandarizado' in df_sesiones_filtered.columns:
+    pivotes_sesiones = get_pivotes_sesiones(
+        df_sesiones_raw,
+        df_sesiones_raw.attrs.get("version_datos")).calcular(
+            df_sesiones_raw.index.get_indexer(df_sesiones_filtered.index),
+            DIMENSIONES_ANALISIS,
+            get_sql_category_order(df_sesiones_filtered['SQL_Estandarizado']))
 
 display_sesiones_summary_sql(df_sesiones_filtered)
 st.markdown("---")
-display_analisis_por_dimension(df_filtered=df_sesiones_filtered,
+display_analisis_por_dimension(pivotes=pivotes_sesiones.get("LG"),
                                dimension_col="LG",
                                dimension_label="Analista LG",
                                top_n=15)
 st.markdown("---")
-display_analisis_por_dimension(df_filtered=df_sesiones_filtered,
+display_analisis_por_dimension(pivotes=pivotes_sesiones.get("AE"),
                                dimension_col="AE",
                                dimension_label="Account Executive",
                                top_n=15)
 st.markdown("---")
-display_analisis_por_dimension(df_filtered=df_sesiones_filtered,
+display_analisis_por_dimension(pivotes=pivotes_sesiones.get("País"),
                                dimension_col="País",
                                dimension_label="País",
                                top_n=10)
 st.markdown("---")
-display_analisis_por_dimension(df_filtered=df_sesiones_filtered,
+display_analisis_por_dimension(pivotes=pivotes_sesiones.get("Puesto"),
                                dimension_col="Puesto",
                                dimension_label="Cargo (Puesto)",
                                top_n=10)
 st.markdown("---")
-display_analisis_por_dimension(df_filtered=df_sesiones_filtered,
+display_analisis_por_dimension(pivotes=pivotes_sesiones.get("Empresa"),
                                dimension_col="Empresa",
                                dimension_label="Empresa",
                                top_n=10)
 st.markdown("---")
-display_evolucion_sql(df_sesiones_filtered, 'NumSemana', 'Año-Semana',
+display_evolucion_sql(rollup_sesiones_filtered, 'semana', 'Año-Semana',
                       "Evolución Semanal por Calificación SQL",
                       "Semana del Año")
 st.markdown("---")
-display_evolucion_sql(df_sesiones_filtered, 'AñoMes', 'Año-Mes',
+display_evolucion_sql(rollup_sesiones_filtered, 'mes', 'AñoMes',
                       "Evolución Mensual por Calificación SQL", "Mes del Año")
 st.markdown("---")
 display_tabla_sesiones_detalle(df_sesiones_filtered)
@@ -1,7 +1,5 @@
 import streamlit as st
 import pandas as pd
-import gspread
-from oauth2client.service_account import ServiceAccountCredentials
 import datetime
 import plotly.express as px
 import os
@@ -12,7 +10,17 @@ project_root = os.path.abspath(
     os.path.join(os.path.dirname(__file__), os.pardir))
 sys.path.insert(0, project_root)
 
+from datos.fuentes_datos import obtener_fuente, CREDS_PATH
+from datos.carga_datos import precargar_fuentes
+from datos.precarga import obtener_precargado
+from utils.parseo import parsear_kpi_serie, parsear_fechas
+from utils.rollups_tiempo import rollup_diario, agregar_periodo
+from datos.esquemas import aplicar_esquema
+from filtros.catalogo_facetas import CatalogoFacetas
+
 st.set_page_config(layout="wide")
+# Lectura concurrente de todas las hojas en segundo plano (ver datos/precarga.py)
+precargar_fuentes()
 
 st.title("📊 Dashboard de KPIs y Tasas de Conversión")
 st.markdown(
@@ -22,56 +30,25 @@ st.markdown(
 # --- Funciones de Procesamiento de Datos ---
 
 
-def parse_kpi_value(value_str, column_name=""):
-    cleaned_val = str(value_str).strip().lower()
-    if not cleaned_val: return 0.0
-    try:
-        num_val = pd.to_numeric(cleaned_val, errors='raise')
-        return 0.0 if pd.isna(num_val) else float(num_val)
-    except ValueError:
-        pass
-    if column_name == "Sesiones agendadas":
-        affirmative_session_texts = ['vc', 'si', 'sí', 'yes', 'true']
-        if cleaned_val in affirmative_session_texts: return 1.0
-        return 0.0
-    else:
-        first_part = cleaned_val.split('-')[0].strip()
-        if not first_part: return 0.0
-        try:
-            num_val_from_part = pd.to_numeric(first_part, errors='raise')
-            return 0.0 if pd.isna(num_val_from_part) else float(
-                num_val_from_part)
-        except ValueError:
-            return 0.0
-
-
 @st.cache_data
 def load_weekly_kpis_data():
-    creds_path = "credenciales.json"
-    scope = [
-        "https://spreadsheets.google.com/feeds",
-        "https://www.googleapis.com/auth/drive"
-    ]
+    # Google Sheets o copia local según la configuración (ver datos/fuentes_datos.py)
+    fuente = obtener_fuente("kpis_semanales")
     try:
-        creds = ServiceAccountCredentials.from_json_keyfile_name(
-            creds_path, scope)
-        client = gspread.authorize(creds)
-    except FileNotFoundError:
-        st.error(
-            f"Error: El archivo de credenciales '{creds_path}' no se encontró."
-        )
+        fuente.conectar()
+    except FileNotFoundError as e:
+        st.error(f"Error: {e}")
         st.info(
-            f"Por favor, asegúrate de que el archivo 'credenciales.json' esté en la ubicación correcta: {os.path.abspath(creds_path)}"
+            f"Por favor, asegúrate de que el archivo 'credenciales.json' esté en la ubicación correcta: {os.path.abspath(CREDS_PATH)}"
         )
         st.stop()
     except Exception as e:
         st.error(f"Error al autenticar con Google Sheets: {e}")
         st.stop()
 
-    sheet_url = "https://docs.google.com/spreadsheets/d/1vaJ2lPK7hbWsuikjmycPePKRrFXiOrlwXMXOdoXRY60/edit?gid=0#gid=0"
     try:
-        sheet = client.open_by_url(sheet_url).sheet1
-        raw_data = sheet.get_all_values()
+        # Ya leída si la precarga de arranque terminó (o esperando a que termine)
+        raw_data = obtener_precargado("kpis_semanales", fuente.leer_valores)
         if not raw_data or len(raw_data) <= 1:
             st.error(
                 "No se pudieron obtener datos suficientes de Google Sheets. La hoja podría estar vacía o solo tener encabezados."
@@ -87,9 +64,10 @@ def load_weekly_kpis_data():
     df = pd.DataFrame(rows, columns=cleaned_headers)
 
     if "Fecha" in df.columns:
-        df["Fecha"] = pd.to_datetime(df["Fecha"],
-                                     format='%d/%m/%Y',
-                                     errors='coerce')
+        # Solo dd/mm/aaaa, como hasta ahora (inferir=False); cuenta aciertos en el log
+        df["Fecha"] = parsear_fechas(df["Fecha"],
+                                     inferir=False,
+                                     nombre="KPIs.Fecha")
         df.dropna(subset=["Fecha"], inplace=True)
         if not df.empty:
             df['Año'] = df['Fecha'].dt.year
@@ -124,8 +102,9 @@ def load_weekly_kpis_data():
         else:
             # Aplicar siempre el parseo y conversión a int para asegurar consistencia,
             # ya que los datos de Google Sheets vienen como strings vía get_all_values().
-            df[col_name] = df[col_name].apply(
-                lambda x: parse_kpi_value(x, column_name=col_name)).astype(int)
+            # Parseo vectorizado con las mismas reglas que parse_kpi_value (ver utils/parseo.py)
+            df[col_name] = parsear_kpi_serie(
+                df[col_name], column_name=col_name).astype(int)
 
     string_cols = ["Mes", "Semana", "Analista", "Región"]
     for col in string_cols:
@@ -133,10 +112,35 @@ def load_weekly_kpis_data():
             df[col] = pd.Series(dtype='str')
         else:
             df[col] = df[col].astype(str).str.strip()
-
+            if col in ["Analista", "Región"]:
+                # Vacíos como 'N/D', igual que se muestran en filtros y desgloses
+                df[col] = df[col].replace('', 'N/D')
+    # Analista y Región como category (ver datos/esquemas.py)
+    aplicar_esquema(df, "kpis_semanales")
+
+    # Huella de los datos para los cachés derivados (se conserva al pasar por cache_data)
+    df.attrs["version_datos"] = int(
+        pd.util.hash_pandas_object(df, index=True).sum())
     return df
 
 
+@st.cache_resource
+def get_catalogo_facetas_kpis(_df, version_datos):
+    # Opciones de la sidebar (fechas, años/semanas, analistas, regiones) por versión de datos
+    return CatalogoFacetas(_df, ["Analista", "Región"],
+                           columna_fecha="Fecha",
+                           columnas_semana=("Año", "NumSemana"))
+
+
+@st.cache_resource
+def get_rollup_diario_kpis(_df, version_datos):
+    # Un rollup por día, analista y región por versión de los datos (ver utils/rollups_tiempo.py)
+    return rollup_diario(_df, ["Analista", "Región"], [
+        "Mensajes Enviados", "Respuestas", "Invites enviadas",
+        "Sesiones agendadas"
+    ])
+
+
 # --- Función para calcular tasas de forma segura ---
 def calculate_rate(numerator, denominator, round_to=1):
     if denominator == 0:
@@ -179,15 +183,12 @@ def clear_kpis_filters_callback():
     st.toast("Filtros reiniciados ✅", icon="🧹")
 
 
-def sidebar_filters(df_options):
+def sidebar_filters(catalogo):
+    # catalogo: CatalogoFacetas de los datos cargados (ver filtros/catalogo_facetas.py)
     st.sidebar.header("🔍 Filtros de KPIs")
     st.sidebar.markdown("---")
     st.sidebar.subheader("🗓️ Por Fecha")
-    min_date_data, max_date_data = None, None
-    if "Fecha" in df_options.columns and pd.api.types.is_datetime64_any_dtype(
-            df_options["Fecha"]) and not df_options["Fecha"].dropna().empty:
-        min_date_data, max_date_data = df_options["Fecha"].dropna().min().date(
-        ), df_options["Fecha"].dropna().max().date()
+    min_date_data, max_date_data = catalogo.rango_fechas
     col1_date, col2_date = st.sidebar.columns(2)
     with col1_date:
         st.date_input("Desde",
@@ -205,10 +206,7 @@ def sidebar_filters(df_options):
                       key=END_DATE_KEY)
     st.sidebar.markdown("---")
     st.sidebar.subheader("📅 Por Año y Semana")
-    year_options = ["– Todos –"] + (
-        sorted(df_options["Año"].dropna().astype(int).unique(), reverse=True)
-        if "Año" in df_options.columns and not df_options["Año"].dropna().empty
-        else [])
+    year_options = ["– Todos –"] + catalogo.anios()
     current_year_selection = st.session_state.get(YEAR_FILTER_KEY, "– Todos –")
     if current_year_selection not in year_options:
         st.session_state[YEAR_FILTER_KEY] = "– Todos –"
@@ -217,16 +215,9 @@ def sidebar_filters(df_options):
                                              key=YEAR_FILTER_KEY)
     selected_year_int = int(
         selected_year_str) if selected_year_str != "– Todos –" else None
-    week_options = ["– Todas –"]
-    df_for_week = df_options[
-        df_options["Año"] ==
-        selected_year_int] if selected_year_int is not None and "NumSemana" in df_options.columns and "Año" in df_options.columns else df_options
-    if "NumSemana" in df_for_week.columns and not df_for_week[
-            "NumSemana"].dropna().empty:
-        week_options.extend([
-            str(w) for w in sorted(df_for_week["NumSemana"].dropna().astype(
-                int).unique())
-        ])
+    week_options = ["– Todas –"] + [
+        str(w) for w in catalogo.semanas(selected_year_int)
+    ]
     current_week_selection = st.session_state.get(WEEK_FILTER_KEY,
                                                   ["– Todas –"])
     valid_week_selection = [
@@ -240,15 +231,13 @@ def sidebar_filters(df_options):
     st.sidebar.markdown("---")
     st.sidebar.subheader("👥 Por Analista y Región")
 
-    def get_multiselect_val(col_name, label, key, df_opt):
+    def get_multiselect_val(col_name, label, key):
+        # Valores ya normalizados en la carga (vacíos como 'N/D'); 'N/D' va al final
         options = ["– Todos –"]
-        if col_name in df_opt.columns and not df_opt[col_name].dropna().empty:
-            unique_vals = df_opt[col_name].astype(str).str.strip().replace(
-                '', 'N/D').unique()
-            options.extend(
-                sorted([val for val in unique_vals if val and val != 'N/D']))
-            if 'N/D' in unique_vals and 'N/D' not in options:
-                options.append('N/D')
+        unique_vals = catalogo.opciones(col_name)
+        options.extend([val for val in unique_vals if val and val != 'N/D'])
+        if 'N/D' in unique_vals:
+            options.append('N/D')
         current_selection = st.session_state.get(key, ["– Todos –"])
         if not isinstance(current_selection, list):
             current_selection = ["– Todos –"]
@@ -257,12 +246,15 @@ def sidebar_filters(df_options):
         ] or (["– Todos –"] if "– Todos –" in options else [])
         if valid_selection != current_selection:
             st.session_state[key] = valid_selection
-        return st.sidebar.multiselect(label, options, key=key)
+        return st.sidebar.multiselect(label,
+                                      options,
+                                      key=key,
+                                      format_func=catalogo.formato(col_name))
 
     analista_filter_val = get_multiselect_val("Analista", "Analista",
-                                              ANALISTA_FILTER_KEY, df_options)
+                                              ANALISTA_FILTER_KEY)
     region_filter_val = get_multiselect_val("Región", "Región",
-                                            REGION_FILTER_KEY, df_options)
+                                            REGION_FILTER_KEY)
     st.sidebar.markdown("---")
     st.sidebar.button("🧹 Limpiar Todos los Filtros",
                       on_click=clear_kpis_filters_callback,
@@ -274,7 +266,8 @@ def sidebar_filters(df_options):
 
 def apply_kpis_filters(df, start_dt, end_dt, year_val, week_list,
                        analista_list, region_list):
-    df_f = df.copy()
+    # Solo se filtra (no se modifica df): Analista/Región ya traen 'N/D' desde la carga
+    df_f = df
     if "Fecha" in df_f.columns and pd.api.types.is_datetime64_any_dtype(
             df_f["Fecha"]):
         start_dt_date = start_dt.date() if isinstance(
@@ -294,16 +287,13 @@ def apply_kpis_filters(df, start_dt, end_dt, year_val, week_list,
         selected_weeks_int = [int(w) for w in week_list if w.isdigit()]
         if selected_weeks_int:
             df_f = df_f[df_f["NumSemana"].isin(selected_weeks_int)]
-    if "Analista" in df_f.columns:
-        df_f["Analista"] = df_f["Analista"].astype(str).str.strip().replace(
-            '', 'N/D')
-    if "Región" in df_f.columns:
-        df_f["Región"] = df_f["Región"].astype(str).str.strip().replace(
-            '', 'N/D')
     if analista_list and "– Todos –" not in analista_list and "Analista" in df_f.columns:
         df_f = df_f[df_f["Analista"].isin(analista_list)]
     if region_list and "– Todos –" not in region_list and "Región" in df_f.columns:
         df_f = df_f[df_f["Región"].isin(region_list)]
+    if analista_list and "– Todos –" not in analista_list and "N/D" not in analista_list \
+            and "Analista" in df_f.columns:
+        df_f = df_f[~df_f["Analista"].isin(['N/D', ''])]
     return df_f
 
 
@@ -415,7 +405,8 @@ def display_grouped_breakdown(df_filtered,
         return
 
     summary_df = df_to_group.groupby(group_by_col,
-                                     as_index=False)[actual_kpi_cols].sum()
+                                     as_index=False,
+                                     observed=True)[actual_kpi_cols].sum()
 
     # Calcular tasas
     mensajes_col, respuestas_col, sesiones_col = "Mensajes Enviados", "Respuestas", "Sesiones agendadas"
@@ -495,8 +486,8 @@ def display_grouped_breakdown(df_filtered,
             st.plotly_chart(fig_rate, use_container_width=True)
 
 
-def display_time_evolution(df_filtered,
-                           time_col_agg,
+def display_time_evolution(rollup_filtered,
+                           periodo,
                            time_col_label,
                            chart_title,
                            x_axis_label,
@@ -505,22 +496,13 @@ def display_time_evolution(df_filtered,
     st.caption(
         f"KPIs sumados por {x_axis_label.lower()} dentro del período filtrado."
     )
-    required_cols = ['Fecha', time_col_agg]
-    if 'NumSemana' in time_col_agg: required_cols.extend(['Año', 'NumSemana'])
-    if 'AñoMes' in time_col_agg:
-        required_cols.extend(['Año', 'MesNum', 'AñoMes'])
-    cols_missing = [
-        col for col in list(set(required_cols))
-        if col not in df_filtered.columns
-    ]
-    fecha_col = df_filtered.get(
-        'Fecha', pd.Series(dtype='object'))  # Usar .get para seguridad
-    if cols_missing or not pd.api.types.is_datetime64_any_dtype(fecha_col):
+    # rollup_filtered: rollup diario con los filtros aplicados (None si no hay 'Fecha')
+    if rollup_filtered is None:
         st.info(
-            f"Datos insuficientes (faltan: {', '.join(cols_missing)}) o en formato incorrecto para {chart_title.lower()}."
+            f"Datos insuficientes (faltan: Fecha) o en formato incorrecto para {chart_title.lower()}."
         )
         return
-    if df_filtered.empty:
+    if rollup_filtered.empty:
         st.info(f"No hay datos filtrados para {chart_title.lower()}.")
         return
     kpi_cols_to_sum = [
@@ -528,41 +510,26 @@ def display_time_evolution(df_filtered,
         "Sesiones agendadas"
     ]
     kpi_cols_present = [
-        col for col in kpi_cols_to_sum if col in df_filtered.columns
-        and pd.api.types.is_numeric_dtype(df_filtered[col])
+        col for col in kpi_cols_to_sum if col in rollup_filtered.columns
+        and pd.api.types.is_numeric_dtype(rollup_filtered[col])
     ]
     if not kpi_cols_present:
         st.info(
             f"No hay columnas de KPI numéricas para la agregación por {x_axis_label.lower()}."
         )
         return
-    group_by_cols = [time_col_agg]
-    if time_col_agg == 'NumSemana': group_by_cols = ['Año', 'NumSemana']
-    df_agg = df_filtered.groupby(group_by_cols,
-                                 as_index=False)[kpi_cols_present].sum()
+    # Los días del rollup se suman por semana o mes con claves enteras; la etiqueta
+    # ("2024-S05" / "2024-05") se construye solo para las filas agregadas
+    df_agg = agregar_periodo(rollup_filtered,
+                             periodo,
+                             kpi_cols_present,
+                             etiqueta=time_col_label)
     if df_agg.empty:
         st.info(
             f"No hay datos agregados para mostrar la evolución por {x_axis_label.lower()}."
         )
         return
 
-    # Construir etiqueta para el eje X
-    if time_col_agg == 'NumSemana':
-        df_agg = df_agg.sort_values(by=['Año', 'NumSemana'])
-        df_agg[time_col_label] = df_agg['Año'].astype(
-            str) + '-S' + df_agg['NumSemana'].astype(str).str.zfill(2)
-    elif time_col_agg == 'AñoMes':
-        df_agg = df_agg.sort_values(by=['AñoMes'])
-        # time_col_label ya es 'AñoMes'
-
-    # Verificar si time_col_label se creó correctamente
-    if time_col_label not in df_agg.columns and (time_col_agg == 'NumSemana'
-                                                 or time_col_agg == 'AñoMes'):
-        st.error(
-            f"No se pudo crear la columna de etiqueta temporal '{time_col_label}'. Revise la lógica de agregación."
-        )
-        return
-
     df_display = df_agg[[time_col_label] + kpi_cols_present].copy()
     for kpi_col in kpi_cols_present:
         df_display[kpi_col] = df_display[kpi_col].map('{:,}'.format)
@@ -589,16 +556,18 @@ def display_time_evolution(df_filtered,
 
 # --- Flujo Principal de la Página ---
 start_date_val, end_date_val, year_val, week_val, analista_val, region_val = sidebar_filters(
-    df_kpis_semanales_raw)
+    get_catalogo_facetas_kpis(df_kpis_semanales_raw,
+                              df_kpis_semanales_raw.attrs.get("version_datos")))
 
-df_kpis_filtered = apply_kpis_filters(df_kpis_semanales_raw, start_date_val,
-                                      end_date_val, year_val, week_val,
-                                      analista_val, region_val)
+filtros_kpis = (start_date_val, end_date_val, year_val, week_val, analista_val,
+                region_val)
+df_kpis_filtered = apply_kpis_filters(df_kpis_semanales_raw, *filtros_kpis)
 
-if "Analista" in df_kpis_filtered.columns and analista_val and "– Todos –" not in analista_val:
-    if "N/D" not in analista_val:
-        df_kpis_filtered = df_kpis_filtered[~df_kpis_filtered["Analista"].
-                                            isin(['N/D', ''])]
+# Los gráficos de evolución usan el rollup diario con los mismos filtros
+rollup_kpis = get_rollup_diario_kpis(
+    df_kpis_semanales_raw, df_kpis_semanales_raw.attrs.get("version_datos"))
+rollup_kpis_filtered = (apply_kpis_filters(rollup_kpis, *filtros_kpis)
+                        if rollup_kpis is not None else None)
 
 # --- Presentación del Dashboard ---
 display_kpi_summary(df_kpis_filtered)
@@ -617,15 +586,15 @@ with col_breakdown2:
 st.markdown("---")
 display_filtered_kpis_table(df_kpis_filtered)
 st.markdown("---")
-display_time_evolution(df_kpis_filtered,
-                       'NumSemana',
+display_time_evolution(rollup_kpis_filtered,
+                       'semana',
                        'Año-Semana',
                        "Evolución Semanal de KPIs",
                        "Semana",
                        chart_icon="🗓️")
 st.markdown("---")
-display_time_evolution(df_kpis_filtered,
-                       'AñoMes',
+display_time_evolution(rollup_kpis_filtered,
+                       'mes',
                        'AñoMes',
                        "Evolución Mensual de KPIs",
                        "Mes (Año-Mes)",